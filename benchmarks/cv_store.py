@@ -0,0 +1,230 @@
+"""Ingestion throughput and query latency of the multi-candidate CV store
+
+Fills a fresh persistent Chroma collection with synthetic candidate chunks
+(clustered embeddings per role, candidate metadata like the real
+ingestion writes) and measures bulk insert throughput, query latency for
+plain and metadata-filtered similarity search, and recall@10 against exact
+search. Embedding API time is not included, vectors are generated locally.
+Each size runs with Chroma's default HNSW settings and with the ones
+`cv_to_salary` creates its collection with.
+
+    uv run python benchmarks/cv_store.py                       # 10k and 100k chunks
+    uv run python benchmarks/cv_store.py --sizes 10000 --dim 256 --json out.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "modules", "cv_to_salary"))
+
+from candidates import SENIORITY_LEVELS, find_candidates
+from utils import CV_HNSW_CONFIGURATION
+
+ROLES = 40
+CHUNKS_PER_CANDIDATE = 8
+CITIES = [
+    ("jakarta", "indonesia"),
+    ("bandung", "indonesia"),
+    ("singapore", "singapore"),
+    ("berlin", "germany"),
+    ("london", "united kingdom"),
+    ("new york", "united states"),
+    ("san francisco", "united states"),
+    ("bangalore", "india"),
+    ("sydney", "australia"),
+    ("toronto", "canada"),
+]
+CONFIGURATIONS = {
+    "default": {"space": "cosine"},
+    "tuned": CV_HNSW_CONFIGURATION,
+}
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def synthetic_chunks(size: int, dim: int, rng: np.random.Generator) -> dict:
+    """Chunks of `size // CHUNKS_PER_CANDIDATE` candidates spread over ROLES role clusters"""
+    centroids = normalize(rng.standard_normal((ROLES, dim), dtype=np.float32))
+    candidates = -(-size // CHUNKS_PER_CANDIDATE)
+    roles = rng.integers(ROLES, size=candidates)
+    profiles = normalize(
+        centroids[roles]
+        + 0.6 * rng.standard_normal((candidates, dim), dtype=np.float32) / dim**0.5
+    )
+
+    owner = np.arange(size) // CHUNKS_PER_CANDIDATE
+    embeddings = normalize(
+        profiles[owner]
+        + 0.8 * rng.standard_normal((size, dim), dtype=np.float32) / dim**0.5
+    )
+    metadatas = []
+    for index, candidate in enumerate(owner):
+        city, country = CITIES[candidate % len(CITIES)]
+        metadatas.append(
+            {
+                "document_type": "cv_extraction",
+                "candidate_id": f"candidate-{candidate}",
+                "page_number": 1,
+                "chunk_index": index % CHUNKS_PER_CANDIDATE,
+                "section": "Work Experience",
+                "role": f"role {roles[candidate]}",
+                "seniority": SENIORITY_LEVELS[candidate % len(SENIORITY_LEVELS)],
+                "location": f"{city.title()}, {country.title()}",
+                "city": city,
+                "country": country,
+                "years_experience": float(candidate % 21),
+            }
+        )
+    documents = [
+        f"## Work Experience\n- Position: {metadata['role']} at Company "
+        f"{index % 997}\n- Duration: {metadata['years_experience']:.0f} years\n"
+        "- Key Technologies: Python, TypeScript, PostgreSQL, Amazon Web Services"
+        for index, metadata in enumerate(metadatas)
+    ]
+    return {
+        "ids": [f"candidate-{c}_page_1_chunk_{i}" for i, c in enumerate(owner)],
+        "embeddings": embeddings,
+        "metadatas": metadatas,
+        "documents": documents,
+        "centroids": centroids,
+    }
+
+
+def percentile(samples: list[float], q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000
+
+
+def run(size: int, dim: int, queries: int, name: str, seed: int) -> dict:
+    import chromadb
+
+    rng = np.random.default_rng(seed)
+    data = synthetic_chunks(size, dim, rng)
+    path = tempfile.mkdtemp(prefix=f"cv-store-{name}-")
+    try:
+        client = chromadb.PersistentClient(path=path)
+        collection = client.create_collection(
+            name="cv_data",
+            embedding_function=None,
+            configuration={"hnsw": CONFIGURATIONS[name]},
+        )
+
+        batch = client.get_max_batch_size()
+        started = time.perf_counter()
+        for start in range(0, size, batch):
+            end = start + batch
+            collection.add(
+                ids=data["ids"][start:end],
+                embeddings=data["embeddings"][start:end],
+                metadatas=data["metadatas"][start:end],
+                documents=data["documents"][start:end],
+            )
+        ingest_seconds = time.perf_counter() - started
+
+        targets = normalize(
+            data["centroids"][rng.integers(ROLES, size=queries)]
+            + rng.standard_normal((queries, dim), dtype=np.float32) / dim**0.5
+        )
+        # Warm the index and the metadata store before timing
+        collection.query(query_embeddings=[targets[0]], n_results=10)
+
+        latencies = {"top10": [], "top10_location": [], "candidates_filtered": []}
+        recall = []
+        for index, target in enumerate(targets):
+            started = time.perf_counter()
+            result = collection.query(query_embeddings=[target], n_results=10)
+            latencies["top10"].append(time.perf_counter() - started)
+
+            exact = np.argsort(-(data["embeddings"] @ target))[:10]
+            expected = {data["ids"][i] for i in exact}
+            recall.append(len(expected & set(result["ids"][0])) / 10)
+
+            city, _ = CITIES[index % len(CITIES)]
+            started = time.perf_counter()
+            collection.query(
+                query_embeddings=[target], n_results=10, where={"city": city}
+            )
+            latencies["top10_location"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            find_candidates(
+                collection,
+                location=city,
+                seniority=SENIORITY_LEVELS[index % len(SENIORITY_LEVELS)],
+                min_years=5,
+                limit=10,
+                query_embedding=target.tolist(),
+            )
+            latencies["candidates_filtered"].append(time.perf_counter() - started)
+
+        return {
+            "size": size,
+            "dim": dim,
+            "configuration": name,
+            "ingest_seconds": round(ingest_seconds, 2),
+            "chunks_per_second": round(size / ingest_seconds),
+            "recall_at_10": round(float(np.mean(recall)), 3),
+            "latency_ms": {
+                kind: {
+                    "p50": round(percentile(samples, 50), 2),
+                    "p95": round(percentile(samples, 95), 2),
+                }
+                for kind, samples in latencies.items()
+            },
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['size']:>7} chunks x {report['dim']} dims, {report['configuration']}: "
+        f"ingest {report['ingest_seconds']:.1f}s ({report['chunks_per_second']} chunks/s), "
+        f"recall@10 {report['recall_at_10']:.3f}"
+    )
+    for kind, stats in report["latency_ms"].items():
+        print(f"    {kind:22} p50 {stats['p50']:8.2f} ms   p95 {stats['p95']:8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Chunk counts"
+    )
+    parser.add_argument(
+        "--dim", type=int, default=1536, help="Embedding size (text-embedding-3-small)"
+    )
+    parser.add_argument("--queries", type=int, default=200, help="Queries per kind")
+    parser.add_argument(
+        "--configuration",
+        action="append",
+        choices=CONFIGURATIONS,
+        help="HNSW settings to measure, can be repeated (default: all)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Data generation seed")
+    parser.add_argument("--json", help="Also write the reports to this JSON file")
+    args = parser.parse_args()
+
+    reports = []
+    for size in args.sizes:
+        for name in args.configuration or list(CONFIGURATIONS):
+            report = run(size, args.dim, args.queries, name, args.seed)
+            reports.append(report)
+            print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(reports, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""Local stand-ins for the OpenAI, Tavily and Mistral HTTP APIs
+
+One threaded HTTP server answers every route the pipelines use:
+
+- POST /v1/chat/completions  (OpenAI, scripted tool calls for orchestrators)
+- POST /v1/embeddings        (OpenAI, deterministic vectors)
+- POST /search               (Tavily)
+- POST /v1/files, GET /v1/files/{id}/url, POST /v1/ocr  (Mistral)
+
+Every response is delayed by a latency sampled from a per-route
+distribution, so runs are repeatable for a given seed. The server counts
+round trips and request/response bytes per route.
+"""
+
+import base64
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+
+EMBEDDING_DIMENSIONS = 1536
+
+# Latency in milliseconds: median and lognormal sigma, plus a per output token cost
+DEFAULT_LATENCIES = {
+    "chat": {"median": 600, "sigma": 0.4, "per_token": 0.5},
+    "embeddings": {"median": 150, "sigma": 0.3},
+    "search": {"median": 1200, "sigma": 0.5},
+    "files": {"median": 300, "sigma": 0.3},
+    "ocr": {"median": 2500, "sigma": 0.3},
+}
+
+# Scripted orchestrator turns, chosen by the tool set of the request. Each turn
+# is a list of (tool name, arguments); an empty turn ends the conversation.
+# {artifacts}, {first_artifact} and {last_artifact} are the artifact handles
+# returned by earlier tool calls, passed on like the prompts ask.
+SCRIPTS = {
+    "generate_learning": [
+        [
+            ("broadcast", {"message": "📋 PLANNING"}),
+            ("research_plan", {"topic": "{subject}"}),
+        ],
+        [
+            ("resource_search", {"query": "{subject} beginner course"}),
+            ("resource_search", {"query": "{subject} official documentation"}),
+            ("resource_search", {"query": "{subject} hands-on projects"}),
+            ("resource_search", {"query": "{subject} advanced topics"}),
+        ],
+        [("generate_learning", {"topic": "{subject}", "content": "{artifacts}"})],
+        [("self_reflection", {"topic": "{subject}", "results": "{last_artifact}"})],
+        [],
+    ],
+    "generate_analysis": [
+        [
+            ("broadcast", {"message": "📋 PLANNING"}),
+            ("research_plan", {"query": "{subject}"}),
+        ],
+        [
+            ("resource_search", {"query": "{subject} latest data"}),
+            ("resource_search", {"query": "{subject} analyst forecasts"}),
+            ("resource_search", {"query": "{subject} policy outlook"}),
+        ],
+        [
+            (
+                "generate_analysis",
+                {
+                    "research_plan": "{first_artifact}",
+                    "search_results": ["{artifacts}"],
+                },
+            )
+        ],
+        [("self_reflection", {"analysis": "{last_artifact}"})],
+        [],
+    ],
+    "get_cv_data": [
+        [("get_cv_data", {"query": "current job title and years of experience"})],
+        [("search_salary_info", {"job_role": "Software Engineer"})],
+        [],
+    ],
+}
+
+ARTIFACT_HANDLE = re.compile(r"artifact:[0-9a-f]{12}")
+
+FILLER_PARAGRAPH = (
+    "Structured learning resource with hands-on exercises, estimated at "
+    "12 hours, suitable for beginners, free to audit with paid certificate. "
+)
+# Salary pages quote a few figures amid the filler, like real job boards
+SALARY_LINES = (
+    "The average salary in Jakarta, Indonesia is Rp {low} juta - Rp {high} juta per month.",
+    "In Singapore the range is S${low},000 to {high},000 monthly.",
+    "Engineers in the United States earn ${low}0k-${high}0k per year.",
+)
+
+
+def filler(tokens: int) -> str:
+    """Roughly `tokens` tokens of markdown"""
+    words = FILLER_PARAGRAPH.split()
+    return "\n\n".join(
+        " ".join(words) for _ in range(max(1, tokens // (len(words) + 4)))
+    )
+
+
+def fill(value, subject: str, tokens: int, handles: list[str] = ()):
+    """Substitute {subject}, {filler} and the artifact handles in scripted tool arguments"""
+    if isinstance(value, dict):
+        return {
+            key: fill(item, subject, tokens, handles) for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [fill(item, subject, tokens, handles) for item in value]
+    return value.format(
+        subject=subject,
+        filler=filler(tokens),
+        artifacts=" ".join(handles),
+        first_artifact=handles[0] if handles else "",
+        last_artifact=handles[-1] if handles else "",
+    )
+
+
+class FakeAPIState:
+    def __init__(
+        self,
+        latencies: dict | None = None,
+        seed: int = 0,
+        completion_tokens: int = 400,
+        search_results: int = 5,
+        page_tokens: int = 1500,
+        ocr_pages: int = 2,
+    ) -> None:
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.completion_tokens = completion_tokens
+        self.search_results = search_results
+        self.page_tokens = page_tokens
+        self.ocr_pages = ocr_pages
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats = {}
+
+    def record(self, route: str, bytes_in: int, bytes_out: int, seconds: float):
+        with self._lock:
+            stats = self.stats.setdefault(
+                route, {"requests": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+            )
+            stats["requests"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["seconds"] += seconds
+
+    def delay(self, route: str, output_tokens: int = 0) -> float:
+        config = self.latencies[route]
+        with self._lock:
+            sample = config["median"] * self._random.lognormvariate(
+                0, config.get("sigma", 0)
+            )
+        seconds = (sample + config.get("per_token", 0) * output_tokens) / 1000
+        time.sleep(seconds)
+        return seconds
+
+
+def chat_completion(state: FakeAPIState, body: dict) -> tuple[dict, int]:
+    messages = body.get("messages", [])
+    tools = body.get("tools") or []
+    tool_names = {tool.get("function", {}).get("name") for tool in tools}
+    prompt_tokens = len(json.dumps(messages)) // 4
+
+    message = {"role": "assistant", "content": None}
+    script = next((SCRIPTS[name] for name in SCRIPTS if name in tool_names), None)
+    if script is None:
+        message["content"] = filler(state.completion_tokens)
+    else:
+        turn_index = sum(m.get("role") == "assistant" for m in messages)
+        turn = script[min(turn_index, len(script) - 1)]
+        user = next((m for m in messages if m.get("role") == "user"), {})
+        subject = str(user.get("content", "")).strip().splitlines()[0][:80]
+        handles = list(
+            dict.fromkeys(
+                handle
+                for m in messages
+                if m.get("role") == "tool"
+                for handle in ARTIFACT_HANDLE.findall(str(m.get("content", "")))
+            )
+        )
+        if not turn:
+            message["content"] = "✅ COMPLETE"
+        else:
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{turn_index}_{index}",
+                    "type": "function",
+                    "function": {
+                        "name": name,
+                        "arguments": json.dumps(
+                            fill(arguments, subject, state.completion_tokens, handles)
+                        ),
+                    },
+                }
+                for index, (name, arguments) in enumerate(turn)
+            ]
+
+    completion_tokens = len(json.dumps(message)) // 4
+    response = {
+        "id": f"chatcmpl-{hashlib.md5(json.dumps(body).encode()).hexdigest()[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4.1-mini"),
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+    return response, completion_tokens
+
+
+def embedding(text: str) -> list[float]:
+    """Deterministic unit-ish vector derived from the text hash"""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+    rng = random.Random(seed)
+    return [rng.uniform(-1, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+
+
+def embeddings(body: dict) -> dict:
+    inputs = body.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    data = []
+    for index, text in enumerate(inputs):
+        vector = embedding(str(text))
+        if body.get("encoding_format") == "base64":
+            vector = base64.b64encode(struct.pack(f"{len(vector)}f", *vector)).decode()
+        data.append({"object": "embedding", "index": index, "embedding": vector})
+    tokens = sum(len(str(text)) // 4 for text in inputs)
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "text-embedding-3-small"),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+def search(state: FakeAPIState, body: dict) -> dict:
+    query = body.get("query", "")
+    count = min(body.get("max_results") or state.search_results, state.search_results)
+    include_raw = body.get("include_raw_content")
+    results = []
+    for index in range(count):
+        raw_content = filler(state.page_tokens) if include_raw else None
+        if raw_content and "salary" in query.lower():
+            line = SALARY_LINES[index % len(SALARY_LINES)]
+            raw_content += "\n\n" + line.format(low=8 + index, high=14 + 2 * index)
+        result = {
+            "url": f"https://example.com/{re.sub(r'\W+', '-', query.lower())}/{index}",
+            "title": f"{query} - result {index + 1}",
+            "content": FILLER_PARAGRAPH,
+            "score": round(1 - index * 0.1, 2),
+            "raw_content": raw_content,
+        }
+        results.append(result)
+    return {"query": query, "results": results, "response_time": 1.0}
+
+
+def ocr(state: FakeAPIState, request: dict) -> dict:
+    indexes = request.get("pages") or range(state.ocr_pages)
+    pages = [
+        {
+            "index": index,
+            "markdown": f"# Page {index + 1}\n\n"
+            "Software Engineer at Example Corp (2019 - 2024), Jakarta, Indonesia. "
+            "Python, TypeScript, AWS, PostgreSQL.\n\n" + filler(300),
+            "images": [],
+            "dimensions": {"dpi": 200, "height": 2200, "width": 1700},
+        }
+        for index in indexes
+    ]
+    return {
+        "pages": pages,
+        "model": "mistral-ocr-latest",
+        "usage_info": {"pages_processed": len(pages), "doc_size_bytes": 100_000},
+    }
+
+
+def make_handler(state: FakeAPIState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _send(self, route: str, body: bytes, payload: dict, seconds: float):
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("x-ratelimit-limit-requests", "10000")
+            self.send_header("x-ratelimit-remaining-requests", "9999")
+            self.send_header("x-ratelimit-limit-tokens", "10000000")
+            self.send_header("x-ratelimit-remaining-tokens", "9999999")
+            self.end_headers()
+            self.wfile.write(data)
+            state.record(route, len(body) + len(str(self.headers)), len(data), seconds)
+
+        def do_GET(self) -> None:
+            body = self._read_body()
+            match = re.fullmatch(r"/v1/files/([\w-]+)/url.*", self.path)
+            if not match:
+                self.send_error(404)
+                return
+            seconds = state.delay("files")
+            url = f"http://{self.headers['Host']}/signed/{match.group(1)}"
+            self._send("mistral.files", body, {"url": url}, seconds)
+
+        def do_POST(self) -> None:
+            body = self._read_body()
+            path = self.path.split("?")[0]
+            if path.endswith("/chat/completions"):
+                payload, tokens = chat_completion(state, json.loads(body))
+                seconds = state.delay("chat", tokens)
+                self._send("openai.chat", body, payload, seconds)
+            elif path.endswith("/embeddings"):
+                seconds = state.delay("embeddings")
+                self._send(
+                    "openai.embeddings", body, embeddings(json.loads(body)), seconds
+                )
+            elif path.endswith("/search"):
+                seconds = state.delay("search")
+                self._send(
+                    "tavily.search", body, search(state, json.loads(body)), seconds
+                )
+            elif path == "/v1/files":
+                seconds = state.delay("files")
+                payload = {
+                    "id": hashlib.md5(body).hexdigest(),
+                    "object": "file",
+                    "bytes": len(body),
+                    "created_at": int(time.time()),
+                    "filename": "cv.pdf",
+                    "purpose": "ocr",
+                    "sample_type": "ocr_input",
+                    "source": "upload",
+                }
+                self._send("mistral.files", body, payload, seconds)
+            elif path == "/v1/ocr":
+                seconds = state.delay("ocr")
+                self._send("mistral.ocr", body, ocr(state, json.loads(body)), seconds)
+            else:
+                self.send_error(404)
+
+    return Handler
+
+
+class FakeAPIServer:
+    """Run the fake APIs on a background thread
+
+    >>> with FakeAPIServer(FakeAPIState(seed=1)) as server:
+    ...     server.base_url
+    """
+
+    def __init__(self, state: FakeAPIState, host: str = "127.0.0.1", port: int = 0):
+        self.state = state
+        self._server = ThreadingHTTPServer((host, port), make_handler(state))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        """Environment variables that point the pipelines at this server"""
+        return {
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+            "TAVILY_BASE_URL": self.base_url,
+            "MISTRAL_SERVER_URL": self.base_url,
+            "OPENAI_API_KEY": "fake",
+            "TAVILY_API_KEY": "fake",
+            "MISTRAL_API_KEY": "fake",
+        }
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,117 @@
+"""Cold-start import time benchmark for the module entry points
+
+Runs `python -X importtime -c "import <entry>"` inside each module directory,
+keeps the fastest of several runs and compares the cumulative import time of
+the entry module against the budgets in import_budgets.json. Exits with a
+non-zero status when an entry point is over budget.
+
+    uv run python benchmarks/import_time.py            # check against budgets
+    uv run python benchmarks/import_time.py --update   # record new budgets
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGETS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "import_budgets.json"
+)
+
+ENTRY_POINTS = [
+    ("learning_path_generator", "main"),
+    ("learning_path_generator", "batch"),
+    ("financial_analysis", "main"),
+    ("cv_to_salary", "main"),
+]
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module_dir: str, entry: str) -> tuple[int, list[tuple[int, str]]]:
+    """Return the cumulative import time of `entry` in µs and its slowest imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry}"],
+        cwd=os.path.join(ROOT, "modules", module_dir),
+        capture_output=True,
+        text=True,
+        check=False,
+        # Nothing should need credentials at import time
+        env={
+            **os.environ,
+            "OPENAI_API_KEY": "",
+            "TAVILY_API_KEY": "",
+            "MISTRAL_API_KEY": "",
+        },
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {entry} failed in {module_dir}:\n{result.stderr}")
+
+    total, children, heaviest = None, [], []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        # Children are printed before their parent, two spaces deeper
+        if len(indent) == 3:
+            children.append((int(cumulative), name))
+        elif len(indent) == 1:
+            if name == entry:
+                total, heaviest = int(cumulative), children
+            children = []
+    return total, sorted(heaviest, reverse=True)[:5]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Runs per entry point")
+    parser.add_argument(
+        "--update", action="store_true", help="Write the measured times as budgets"
+    )
+    parser.add_argument(
+        "--headroom",
+        type=float,
+        default=1.5,
+        help="Budget multiplier applied to measured times with --update",
+    )
+    args = parser.parse_args()
+
+    budgets = {}
+    if os.path.exists(BUDGETS_PATH):
+        with open(BUDGETS_PATH) as file:
+            budgets = json.load(file)
+
+    failed = False
+    measured = {}
+    for module_dir, entry in ENTRY_POINTS:
+        key = f"{module_dir}/{entry}"
+        runs = [measure(module_dir, entry) for _ in range(args.runs)]
+        best, heaviest = min(runs, key=lambda run: run[0])
+        measured[key] = best
+
+        budget = budgets.get(key)
+        status = "ok"
+        if budget is not None and best > budget:
+            status = "OVER BUDGET"
+            failed = True
+        budget_str = f"{budget / 1000:.1f}ms" if budget else "-"
+        print(f"{key:40} {best / 1000:8.1f}ms  budget {budget_str:>9}  {status}")
+        for cumulative, name in heaviest:
+            print(f"    {name:36} {cumulative / 1000:8.1f}ms")
+
+    if args.update:
+        budgets = {key: int(value * args.headroom) for key, value in measured.items()}
+        with open(BUDGETS_PATH, "w") as file:
+            json.dump(budgets, file, indent=2)
+            file.write("\n")
+        print(f"Budgets written to {BUDGETS_PATH}")
+    elif failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
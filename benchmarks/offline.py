@@ -0,0 +1,244 @@
+"""Offline end-to-end benchmark of the pipelines against fake APIs
+
+Starts the local stand-ins from fake_apis.py, runs each pipeline in its own
+process against them and reports wall time, API round trips, bytes sent and
+received, and the critical path broken down per tool. Latencies are sampled
+from seeded distributions, so runs with the same options are comparable.
+
+    uv run python benchmarks/offline.py                       # all pipelines
+    uv run python benchmarks/offline.py -p learning --repeat 2  # cold + warm cache
+
+Token counts need the o200k_base encoding, which tiktoken downloads on first
+use. Without it in the tiktoken cache the pipelines count tokens with an
+approximation instead; seed the cache once while online for exact counts:
+
+    uv run python -c "import tiktoken; tiktoken.get_encoding('o200k_base')"
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from fake_apis import DEFAULT_LATENCIES, FakeAPIServer, FakeAPIState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+O200K_BASE_URL = (
+    "https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken"
+)
+
+PIPELINES = {
+    "learning": ("learning_path_generator", "Rust programming"),
+    "financial": ("financial_analysis", "Outlook for Indonesian bank stocks"),
+    "salary": ("cv_to_salary", ""),
+}
+
+
+def critical_path(spans: list[dict], wall_time: float) -> dict[str, float]:
+    """Attribute every instant of the run to the tool that held it up
+
+    While several tools overlap, the one that finishes last is the one the
+    orchestrator is waiting for. Time with no tool running is spent in the
+    orchestrator itself (model calls and bookkeeping).
+    """
+    points = sorted(
+        {0.0, wall_time, *(s["start"] for s in spans), *(s["end"] for s in spans)}
+    )
+    breakdown = {}
+    for start, end in itertools.pairwise(points):
+        running = [s for s in spans if s["start"] <= start and s["end"] >= end]
+        name = (
+            max(running, key=lambda s: s["end"])["name"] if running else "orchestrator"
+        )
+        breakdown[name] = breakdown.get(name, 0.0) + end - start
+    return dict(sorted(breakdown.items(), key=lambda item: -item[1]))
+
+
+def tokenizer_cached() -> bool:
+    """Whether tiktoken can load o200k_base without downloading it
+
+    Follows where tiktoken's read_file_cached looks for the encoding file.
+    """
+    if "TIKTOKEN_CACHE_DIR" in os.environ:
+        cache_dir = os.environ["TIKTOKEN_CACHE_DIR"]
+    elif "DATA_GYM_CACHE_DIR" in os.environ:
+        cache_dir = os.environ["DATA_GYM_CACHE_DIR"]
+    else:
+        cache_dir = os.path.join(tempfile.gettempdir(), "data-gym-cache")
+    if not cache_dir:
+        return False
+    cache_key = hashlib.sha1(O200K_BASE_URL.encode()).hexdigest()
+    return os.path.exists(os.path.join(cache_dir, cache_key))
+
+
+def run_pipeline(
+    pipeline: str, server: FakeAPIServer, workdir: str, approximate_tokens: bool
+) -> dict:
+    module_dir, pipeline_input = PIPELINES[pipeline]
+    output = os.path.join(workdir, f"{pipeline}-timeline.json")
+    server.state.reset()
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            os.path.join(ROOT, "benchmarks", "run_pipeline.py"),
+            pipeline,
+            pipeline_input,
+            "--output",
+            output,
+        ],
+        cwd=workdir,
+        capture_output=True,
+        text=True,
+        # A crash is reported from the missing timeline, with its stderr
+        check=False,
+        env={
+            **os.environ,
+            **server.env(),
+            "PYTHONPATH": os.path.join(ROOT, "modules", module_dir),
+            "CACHE_DIR": os.path.join(workdir, ".cache"),
+            "LANGFUSE_TRACING_ENABLED": "false",
+            "ANONYMIZED_TELEMETRY": "False",
+            **({"BENCH_APPROXIMATE_TOKENS": "1"} if approximate_tokens else {}),
+        },
+    )
+    if not os.path.exists(output):
+        raise RuntimeError(f"{pipeline} crashed:\n{result.stderr[-2000:]}")
+    with open(output) as file:
+        timeline = json.load(file)
+
+    routes = server.state.stats
+    return {
+        "pipeline": pipeline,
+        "error": timeline["error"],
+        "wall_time": round(timeline["wall_time"], 3),
+        "round_trips": sum(route["requests"] for route in routes.values()),
+        "bytes_sent": sum(route["bytes_in"] for route in routes.values()),
+        "bytes_received": sum(route["bytes_out"] for route in routes.values()),
+        "routes": routes,
+        "critical_path": {
+            name: round(seconds, 3)
+            for name, seconds in critical_path(
+                timeline["spans"], timeline["wall_time"]
+            ).items()
+        },
+    }
+
+
+def print_report(report: dict, run: int) -> None:
+    status = f"  ERROR {report['error']}" if report["error"] else ""
+    print(
+        f"{report['pipeline']} (run {run}): {report['wall_time']:.2f}s, "
+        f"{report['round_trips']} round trips, "
+        f"{report['bytes_sent'] / 1024:.1f} KiB sent, "
+        f"{report['bytes_received'] / 1024:.1f} KiB received{status}"
+    )
+    for route, stats in sorted(report["routes"].items()):
+        print(
+            f"    {route:24} {stats['requests']:4} requests "
+            f"{stats['bytes_in'] / 1024:9.1f} KiB in {stats['bytes_out'] / 1024:9.1f} KiB out"
+        )
+    print("  critical path:")
+    for name, seconds in report["critical_path"].items():
+        share = seconds / report["wall_time"] * 100 if report["wall_time"] else 0
+        print(f"    {name:24} {seconds:8.2f}s {share:5.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-p",
+        "--pipeline",
+        action="append",
+        choices=PIPELINES,
+        help="Pipeline to run, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Runs per pipeline sharing one cache, so later runs are warm",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Latency sampling seed")
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="Multiply every simulated latency, 0 disables them",
+    )
+    parser.add_argument(
+        "--latencies",
+        help="JSON file overriding the per-route latency distributions",
+    )
+    parser.add_argument(
+        "--ocr-pages", type=int, default=2, help="Pages in the fake OCR response"
+    )
+    parser.add_argument(
+        "--force-ocr",
+        action="store_true",
+        help="Ignore the PDF text layer, so every page goes through the fake OCR",
+    )
+    parser.add_argument(
+        "--approximate-tokens",
+        action="store_true",
+        help="Count tokens with an approximation even if o200k_base is cached",
+    )
+    parser.add_argument("--json", help="Also write the reports to this JSON file")
+    args = parser.parse_args()
+
+    latencies = dict(DEFAULT_LATENCIES)
+    if args.latencies:
+        with open(args.latencies) as file:
+            latencies.update(json.load(file))
+    latencies = {
+        route: {
+            **config,
+            "median": config["median"] * args.latency_scale,
+            "per_token": config.get("per_token", 0) * args.latency_scale,
+        }
+        for route, config in latencies.items()
+    }
+
+    if args.force_ocr:
+        os.environ["PDF_TEXT_MIN_DENSITY"] = "inf"
+
+    approximate_tokens = args.approximate_tokens or not tokenizer_cached()
+    if approximate_tokens and not args.approximate_tokens:
+        print(
+            "o200k_base is not in the tiktoken cache, counting tokens with an "
+            "approximation. For exact counts, seed the cache once while online:\n"
+            '    uv run python -c "import tiktoken; '
+            "tiktoken.get_encoding('o200k_base')\"",
+            file=sys.stderr,
+        )
+
+    reports = []
+    state = FakeAPIState(latencies=latencies, seed=args.seed, ocr_pages=args.ocr_pages)
+    with FakeAPIServer(state) as server:
+        for pipeline in args.pipeline or list(PIPELINES):
+            workdir = tempfile.mkdtemp(prefix=f"bench-{pipeline}-")
+            shutil.copy(os.path.join(ROOT, "cv.pdf"), workdir)
+            try:
+                for run in range(1, args.repeat + 1):
+                    report = run_pipeline(pipeline, server, workdir, approximate_tokens)
+                    report["run"] = run
+                    reports.append(report)
+                    print_report(report, run)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(reports, file, indent=2)
+    if any(report["error"] for report in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
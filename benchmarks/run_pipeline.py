@@ -0,0 +1,166 @@
+"""Run one pipeline end to end and record when each tool was running
+
+Started by offline.py in a fresh process, with the module directory on
+PYTHONPATH and the API base URLs pointing at the fake servers, because the
+modules share top-level names such as `main`, `utils` and `tools`.
+
+    python benchmarks/run_pipeline.py learning "Rust" --output run.json
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import re
+import time
+
+PIPELINES = ("learning", "financial", "salary")
+
+# A word or a run of punctuation, with the whitespace before it
+PIECE = re.compile(r"\s*\w+|\s*[^\w\s]+|\s+")
+
+
+class Timeline:
+    """Collect (name, start, end) intervals relative to the start of the run"""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.spans = []
+
+    def add(self, name: str, start: float) -> None:
+        self.spans.append(
+            {
+                "name": name,
+                "start": start - self.origin,
+                "end": time.perf_counter() - self.origin,
+            }
+        )
+
+    def wrap(self, name: str, func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def timed_async(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.add(name, start)
+
+            return timed_async
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, start)
+
+        return timed
+
+
+class ApproximateEncoding:
+    """Stand-in for o200k_base when it is not in the tiktoken cache
+
+    One token per word or punctuation run, which is close to the real count
+    for English text, so compaction and passage budgets behave about the same.
+    """
+
+    def __init__(self) -> None:
+        self.ids = {}
+        self.pieces = []
+
+    def encode(self, text: str) -> list[int]:
+        tokens = []
+        for piece in PIECE.findall(text):
+            if piece not in self.ids:
+                self.ids[piece] = len(self.pieces)
+                self.pieces.append(piece)
+            tokens.append(self.ids[piece])
+        return tokens
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(self.pieces[token] for token in tokens)
+
+
+def use_approximate_tokens() -> None:
+    from shared import compaction
+
+    encoding = ApproximateEncoding()
+    compaction.get_encoding = lambda: encoding
+
+
+def import_main(timeline: Timeline):
+    start = time.perf_counter()
+    import main
+
+    timeline.add("startup", start)
+    return main
+
+
+def run_learning(timeline: Timeline, topic: str) -> None:
+    main = import_main(timeline)
+
+    for name, func in main.tools_dict.items():
+        main.tools_dict[name] = timeline.wrap(name, func)
+    asyncio.run(main.main_process(topic))
+
+
+def run_financial(timeline: Timeline, query: str) -> None:
+    main = import_main(timeline)
+
+    for name, func in main.tools_dict.items():
+        main.tools_dict[name] = timeline.wrap(name, func)
+    main.main_process(query)
+
+
+def run_salary(timeline: Timeline, _: str) -> None:
+    from agents import set_default_openai_api, set_tracing_disabled
+
+    main = import_main(timeline)
+
+    # The fake server only speaks chat completions, and traces would be
+    # exported to the real OpenAI backend
+    set_default_openai_api("chat_completions")
+    set_tracing_disabled(True)
+
+    main.process_cv_ocr = timeline.wrap("process_cv_ocr", main.process_cv_ocr)
+    for tool in main.salary_agent.tools:
+        tool.on_invoke_tool = timeline.wrap(tool.name, tool.on_invoke_tool)
+    asyncio.run(main.main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pipeline", choices=PIPELINES)
+    parser.add_argument("input", help="Topic or query passed to the pipeline")
+    parser.add_argument("--output", required=True, help="Where to write the timeline")
+    args = parser.parse_args()
+
+    runners = {
+        "learning": run_learning,
+        "financial": run_financial,
+        "salary": run_salary,
+    }
+    if os.getenv("BENCH_APPROXIMATE_TOKENS"):
+        use_approximate_tokens()
+
+    timeline = Timeline()
+    error = None
+    try:
+        runners[args.pipeline](timeline, args.input)
+    # Any failure of the pipeline is reported in the timeline
+    except Exception as e:  # noqa: BLE001
+        error = f"{type(e).__name__}: {e}"
+    wall_time = time.perf_counter() - timeline.origin
+
+    with open(args.output, "w") as file:
+        json.dump(
+            {"wall_time": wall_time, "spans": timeline.spans, "error": error}, file
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Compile time and lookup latency of the offline salary reference dataset
+
+Writes a synthetic salary CSV (roles x countries x seniority levels,
+log-normal salaries), compiles it with `cv_to_salary`'s salary_reference
+and times opening the compiled dataset and answering lookups, against
+computing the same percentiles from the raw records on every query.
+
+    uv run python benchmarks/salary_lookup.py                    # 200k records
+    uv run python benchmarks/salary_lookup.py --records 1000000 --json out.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "modules", "cv_to_salary"))
+
+from candidates import SENIORITY_LEVELS
+from salary_reference import SalaryReference, compile_reference
+from salary_stats import QUANTILES
+
+COUNTRIES = [
+    "Indonesia",
+    "Singapore",
+    "Germany",
+    "United Kingdom",
+    "United States",
+    "India",
+    "Australia",
+    "Canada",
+]
+
+
+def write_records(path: str, records: int, roles: int, rng: np.random.Generator):
+    role = rng.integers(roles, size=records)
+    country = rng.integers(len(COUNTRIES), size=records)
+    level = rng.integers(len(SENIORITY_LEVELS), size=records)
+    salary = rng.lognormal(10.5 + 0.15 * level + 0.1 * country, 0.35)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["role", "location", "seniority", "salary"])
+        for r, c, s, value in zip(role, country, level, salary):
+            writer.writerow(
+                [
+                    f"role {r} engineer",
+                    COUNTRIES[c],
+                    SENIORITY_LEVELS[s],
+                    f"{value:.0f}",
+                ]
+            )
+    return role, country, level, salary
+
+
+def micros(samples: list[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1e6, 2)
+
+
+def run(records: int, roles: int, queries: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    path = tempfile.mkdtemp(prefix="salary-reference-")
+    try:
+        csv_path = os.path.join(path, "salaries.csv")
+        role, country, level, salary = write_records(csv_path, records, roles, rng)
+
+        started = time.perf_counter()
+        buckets = compile_reference(csv_path, os.path.join(path, "compiled"))
+        compile_seconds = time.perf_counter() - started
+        size = sum(
+            os.path.getsize(os.path.join(path, "compiled", name))
+            for name in os.listdir(os.path.join(path, "compiled"))
+        )
+
+        started = time.perf_counter()
+        reference = SalaryReference(os.path.join(path, "compiled"))
+        open_ms = (time.perf_counter() - started) * 1000
+
+        asks = [
+            (
+                int(rng.integers(roles)),
+                int(rng.integers(len(COUNTRIES))),
+                int(rng.integers(len(SENIORITY_LEVELS))),
+            )
+            for _ in range(queries)
+        ]
+        lookups, raw = [], []
+        for r, c, s in asks:
+            started = time.perf_counter()
+            reference.lookup(f"{SENIORITY_LEVELS[s]} role {r} engineer", COUNTRIES[c])
+            lookups.append(time.perf_counter() - started)
+        for r, c, s in asks:
+            started = time.perf_counter()
+            selected = salary[(role == r) & (country == c) & (level == s)]
+            if len(selected):
+                np.percentile(selected, QUANTILES)
+            raw.append(time.perf_counter() - started)
+
+        return {
+            "records": records,
+            "buckets": buckets,
+            "compile_seconds": round(compile_seconds, 2),
+            "compiled_kib": round(size / 1024, 1),
+            "open_ms": round(open_ms, 2),
+            "lookup_us": {"p50": micros(lookups, 50), "p95": micros(lookups, 95)},
+            "raw_percentiles_us": {"p50": micros(raw, 50), "p95": micros(raw, 95)},
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['records']:>8} records, {report['buckets']} buckets: "
+        f"compile {report['compile_seconds']:.1f}s ({report['compiled_kib']} KiB), "
+        f"open {report['open_ms']:.2f} ms"
+    )
+    for kind in ("lookup_us", "raw_percentiles_us"):
+        stats = report[kind]
+        print(
+            f"    {kind:20} p50 {stats['p50']:10.2f} us   p95 {stats['p95']:10.2f} us"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, nargs="+", default=[200_000])
+    parser.add_argument("--roles", type=int, default=300, help="Distinct job roles")
+    parser.add_argument("--queries", type=int, default=2000, help="Lookups to time")
+    parser.add_argument("--seed", type=int, default=0, help="Data generation seed")
+    parser.add_argument("--json", help="Also write the reports to this JSON file")
+    args = parser.parse_args()
+
+    reports = []
+    for records in args.records:
+        report = run(records, args.roles, args.queries, args.seed)
+        reports.append(report)
+        print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(reports, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import os
+import time
+
+from candidates import candidate_id_for
+from loguru import logger
+from main import analyze_candidate, save_report
+from shared.metrics import track_run
+from tools.process_cv_ocr import process_cv_ocr
+from utils import cv_collection
+
+MAX_CONCURRENT_SESSIONS = int(os.getenv("MAX_CONCURRENT_SESSIONS", "8"))
+
+SUMMARY_FIELDS = [
+    "candidate_id",
+    "file",
+    "status",
+    "error",
+    "role",
+    "seniority",
+    "location",
+    "years_experience",
+    "report",
+    "wall_time",
+    "prompt_tokens",
+    "completion_tokens",
+]
+
+
+def find_cvs(folder: str) -> list[tuple[str, str]]:
+    """(candidate id, path) of every PDF in the folder
+
+    Ids come from each file's content, so they do not depend on which other
+    files are in the folder. Copies of one CV under names that give the same
+    id are analyzed once.
+    """
+    paths = sorted(
+        path
+        for path in glob.glob(os.path.join(folder, "*"))
+        if path.lower().endswith(".pdf")
+    )
+    cvs = {}
+    for path in paths:
+        candidate_id = candidate_id_for(path)
+        if candidate_id in cvs:
+            logger.warning(f"{path} is a copy of {cvs[candidate_id]}, skipping")
+            continue
+        cvs[candidate_id] = path
+    return list(cvs.items())
+
+
+def candidate_profile(candidate_id: str) -> dict:
+    stored = cv_collection.get(
+        where={"candidate_id": candidate_id}, limit=1, include=["metadatas"]
+    )
+    metadata = stored["metadatas"][0] if stored["metadatas"] else {}
+    years = metadata.get("years_experience", -1)
+    return {
+        "role": metadata.get("role", ""),
+        "seniority": metadata.get("seniority", ""),
+        "location": metadata.get("location", ""),
+        "years_experience": years if years >= 0 else "",
+    }
+
+
+async def run_candidate(candidate_id: str, path: str) -> dict:
+    """Ingest one CV, run the salary agent on it and return its summary entry"""
+    start = time.perf_counter()
+    entry = {"candidate_id": candidate_id, "file": path, "error": None}
+    try:
+        await process_cv_ocr(path, candidate_id=candidate_id)
+        result, usage = await analyze_candidate(candidate_id)
+        entry["report"] = save_report(candidate_id, result)
+        entry["prompt_tokens"] = usage.input_tokens
+        entry["completion_tokens"] = usage.output_tokens
+        entry.update(await asyncio.to_thread(candidate_profile, candidate_id))
+        entry["status"] = "ok"
+    # One failed CV is recorded in the summary, the batch goes on
+    except Exception as e:  # noqa: BLE001
+        logger.exception(f"Salary analysis for {path} failed")
+        entry["status"] = "error"
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["wall_time"] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+async def run_batch(
+    cvs: list[tuple[str, str]],
+    summary_path: str,
+    max_sessions: int = MAX_CONCURRENT_SESSIONS,
+) -> list[dict]:
+    """Analyze many CVs with at most `max_sessions` candidates in flight
+
+    Each entry is appended to the JSONL summary as soon as its candidate
+    finishes, so a partial summary survives an interrupted batch. Search
+    results are cached and shared, so candidates with the same role reuse
+    one salary search.
+    """
+    os.makedirs(os.path.dirname(summary_path) or ".", exist_ok=True)
+    entries = []
+    pending = iter(cvs)
+
+    # One line is appended per finished candidate, cheap enough for the loop
+    with open(summary_path, "w") as summary:  # noqa: ASYNC230
+
+        async def worker() -> None:
+            for candidate_id, path in pending:
+                entry = await run_candidate(candidate_id, path)
+                entries.append(entry)
+                summary.write(json.dumps(entry) + "\n")
+                summary.flush()
+                logger.info(
+                    f"[{entry['status']}] {candidate_id} in {entry['wall_time']}s"
+                )
+
+        await asyncio.gather(*(worker() for _ in range(max_sessions)))
+
+    return entries
+
+
+def write_csv(entries: list[dict], path: str) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for entry in sorted(entries, key=lambda entry: entry["candidate_id"]):
+            writer.writerow(entry)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the salary analysis for every CV in a folder concurrently"
+    )
+    parser.add_argument("folder", help="Folder containing the CV PDFs")
+    parser.add_argument(
+        "--summary",
+        default=f"results/salaries/batches/batch-{int(time.time() * 1000)}.jsonl",
+        help="Where to write the per-candidate JSONL summary, a CSV is written next to it",
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=MAX_CONCURRENT_SESSIONS,
+        help="Maximum number of candidates processed at the same time",
+    )
+    args = parser.parse_args()
+
+    cvs = find_cvs(args.folder)
+    logger.info(f"Found {len(cvs)} CVs in {args.folder}")
+
+    start = time.perf_counter()
+    with track_run("salary-batch"):
+        entries = asyncio.run(run_batch(cvs, args.summary, args.sessions))
+
+    csv_path = f"{os.path.splitext(args.summary)[0]}.csv"
+    write_csv(entries, csv_path)
+
+    succeeded = sum(entry["status"] == "ok" for entry in entries)
+    logger.info(
+        f"Batch finished in {time.perf_counter() - start:.1f}s: "
+        f"{succeeded}/{len(entries)} succeeded"
+    )
+    logger.info(f"Summary saved to {args.summary} and {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from loguru import logger
+
+# OpenAI embedding request limits
+MAX_EMBEDDING_INPUTS = 2048
+MAX_EMBEDDING_TOKENS = 300_000
+
+# Flush thresholds of the writer
+CV_WRITE_BATCH_SIZE = int(os.getenv("CV_WRITE_BATCH_SIZE", "64"))
+CV_WRITE_MAX_DELAY = float(os.getenv("CV_WRITE_MAX_DELAY", "2.0"))
+
+
+def estimate_tokens(text: str) -> int:
+    # Conservative for English and code, so batches stay under the API limit
+    return len(text) // 3 + 1
+
+
+def embedding_batches(
+    documents: list[str],
+    max_inputs: int = MAX_EMBEDDING_INPUTS,
+    max_tokens: int = MAX_EMBEDDING_TOKENS,
+) -> list[tuple[int, int]]:
+    """Split documents into (start, end) ranges that each fit one embedding request"""
+    batches, start, tokens = [], 0, 0
+    for index, document in enumerate(documents):
+        document_tokens = estimate_tokens(document)
+        if index > start and (
+            index - start >= max_inputs or tokens + document_tokens > max_tokens
+        ):
+            batches.append((start, index))
+            start, tokens = index, 0
+        tokens += document_tokens
+    if start < len(documents):
+        batches.append((start, len(documents)))
+    return batches
+
+
+class BatchWriter:
+    """Buffer documents for a Chroma collection and write them in bulk
+
+    A background thread embeds and upserts the buffer once it holds
+    `max_documents` entries or its oldest entry is `max_delay` seconds old,
+    using as few embedding requests as the API limits allow. `flush()`
+    blocks until everything added so far is stored; it also runs at exit.
+    Each `add()` returns a future for its documents, so a failed write is
+    only reported to the callers whose documents were in it.
+    """
+
+    def __init__(
+        self,
+        collection,
+        embedding_function,
+        max_documents: int = CV_WRITE_BATCH_SIZE,
+        max_delay: float = CV_WRITE_MAX_DELAY,
+        max_chroma_batch: int | None = None,
+    ) -> None:
+        self.collection = collection
+        self.embedding_function = embedding_function
+        self.max_documents = max_documents
+        self.max_delay = max_delay
+        self.max_chroma_batch = max_chroma_batch or MAX_EMBEDDING_INPUTS
+
+        self._pending = []
+        self._pending_writes = []
+        self._oldest = None
+        self._added = 0
+        self._written = 0
+        self._flush_target = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="chroma-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(
+        self, ids: list[str], documents: list[str], metadatas: list[dict]
+    ) -> Future:
+        """Queue documents for writing, never blocking on the network
+
+        The returned future completes when they are stored, or with the
+        error of the write that contained them.
+        """
+        write = Future()
+        with self._condition:
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._pending.extend(zip(ids, documents, metadatas))
+            self._pending_writes.append(write)
+            self._added += len(ids)
+            self._condition.notify_all()
+        return write
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            self._closed
+            or len(self._pending) >= self.max_documents
+            or time.monotonic() - self._oldest >= self.max_delay
+            or self._written < self._flush_target
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._due():
+                    if self._closed and not self._pending:
+                        return
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = self._oldest + self.max_delay - time.monotonic()
+                    self._condition.wait(timeout=timeout)
+                batch, self._pending, self._oldest = self._pending, [], None
+                writes, self._pending_writes = self._pending_writes, []
+
+            try:
+                self._write(batch)
+            # Not swallowed, every caller waiting on the batch gets the error
+            except Exception as e:  # noqa: BLE001
+                logger.exception(f"Failed to write {len(batch)} documents to Chroma")
+                for write in writes:
+                    write.set_exception(e)
+            else:
+                for write in writes:
+                    write.set_result(None)
+            with self._condition:
+                self._written += len(batch)
+                self._condition.notify_all()
+
+    def _write(self, batch: list[tuple]) -> None:
+        ids, documents, metadatas = (list(column) for column in zip(*batch))
+        embeddings = []
+        for start, end in embedding_batches(documents):
+            embeddings.extend(self.embedding_function(documents[start:end]))
+
+        for start in range(0, len(ids), self.max_chroma_batch):
+            end = start + self.max_chroma_batch
+            self.collection.upsert(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                metadatas=metadatas[start:end],
+                embeddings=embeddings[start:end],
+            )
+        logger.debug(f"Wrote {len(ids)} documents to {self.collection.name}")
+
+    def flush(self, writes: list[Future] = ()) -> None:
+        """Block until every document added so far has been written
+
+        Raises the error of the first of `writes`, futures returned by
+        `add()`, that failed. Failures of other callers' documents are not
+        raised here.
+        """
+        with self._condition:
+            target = self._added
+            self._flush_target = max(self._flush_target, target)
+            self._condition.notify_all()
+            while self._written < target and self._thread.is_alive():
+                self._condition.wait()
+        for write in writes:
+            if not write.done():
+                raise RuntimeError("The Chroma writer stopped before writing")
+            if write.exception() is not None:
+                raise write.exception()
+
+    def close(self) -> None:
+        """Write what is left and stop the background thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
@@ -0,0 +1,157 @@
+import os
+import re
+from dataclasses import dataclass
+
+from manifest import file_sha256
+
+SENIORITY_LEVELS = ("intern", "junior", "mid", "senior", "lead", "principal")
+
+# Chunks fetched per requested candidate: a candidate's chunks rank close
+# together, and a filtered query costs about the same for a few hundred results
+CANDIDATE_OVERFETCH = 16
+
+FIELD = r"^\s*[-*]\s*\**{label}\**\s*:\s*(.+?)\s*$"
+UNSPECIFIED = {"", "not specified", "n/a", "none", "unknown"}
+YEARS = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+
+
+@dataclass
+class SalaryContext:
+    """Run context of the salary agent, scoping its tools to one candidate"""
+
+    candidate_id: str
+
+
+def candidate_id_for(file_path: str, source_sha256: str | None = None) -> str:
+    """Candidate id from a CV's content, `CVs/Jane Doe.pdf` -> `jane-doe-3f2a9c1b7e4d`
+
+    The file name only makes the id readable, the suffix comes from the source
+    sha256: two different files both named `cv.pdf` get different ids, and the
+    same file ingested again keeps its id. A revised CV is a new candidate
+    unless an explicit id is given.
+    """
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    slug = re.sub(r"[^a-z0-9]+", "-", stem.lower()).strip("-") or "candidate"
+    return f"{slug}-{(source_sha256 or file_sha256(file_path))[:12]}"
+
+
+def field(markdown: str, label: str) -> str | None:
+    match = re.search(FIELD.format(label=label), markdown, re.IGNORECASE | re.MULTILINE)
+    if not match or match.group(1).strip("*[] ").lower() in UNSPECIFIED:
+        return None
+    return match.group(1).strip("*[] ")
+
+
+def parse_profile(markdown: str) -> dict:
+    """Role, seniority, location and experience from one structured CV page"""
+    profile = {}
+    if role := field(markdown, "Current Role"):
+        profile["role"] = role
+    if seniority := field(markdown, "Seniority Level"):
+        for level in SENIORITY_LEVELS:
+            if level in seniority.lower():
+                profile["seniority"] = level
+                break
+    if location := field(markdown, "Location"):
+        parts = [part.strip().lower() for part in location.split(",") if part.strip()]
+        if parts:
+            profile["location"] = location
+            profile["city"], profile["country"] = parts[0], parts[-1]
+    experience = field(markdown, "Total Experience")
+    if experience and (match := YEARS.search(experience)):
+        profile["years_experience"] = float(match.group(1))
+    return profile
+
+
+def merge_profiles(profiles: list[dict]) -> dict:
+    """Candidate metadata from page profiles in page order, the first value of a field wins
+
+    Every field is present so stale values are overwritten on re-ingestion;
+    Chroma metadata cannot be None, so unknown is "" or -1 years.
+    """
+    merged = {
+        "role": "",
+        "seniority": "",
+        "location": "",
+        "city": "",
+        "country": "",
+        "years_experience": -1.0,
+    }
+    for profile in reversed(profiles):
+        merged.update(profile)
+    return merged
+
+
+def candidate_filter(
+    location: str | None = None, seniority: str | None = None
+) -> dict | None:
+    """Chroma `where` clause for the candidate metadata filters that are set"""
+    clauses = []
+    if location:
+        location = location.strip().lower()
+        clauses.append({"$or": [{"city": location}, {"country": location}]})
+    if seniority:
+        clauses.append({"seniority": seniority.strip().lower()})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def find_candidates(
+    collection,
+    query: str | None = None,
+    location: str | None = None,
+    seniority: str | None = None,
+    min_years: float | None = None,
+    limit: int = 10,
+    query_embedding: list[float] | None = None,
+) -> list[dict]:
+    """Top `limit` candidates for a role query, filtered on their metadata
+
+    Chunks are ranked by vector similarity within the location and seniority
+    filter and each candidate is scored by its best chunk. `min_years` is
+    checked on the results instead: Chroma pre-filters by scanning every
+    row a clause matches, and a range matches most of the store. Pass
+    `query_embedding` to skip embedding the query text.
+    """
+    where = candidate_filter(location, seniority)
+    search = (
+        {"query_embeddings": [query_embedding]}
+        if query_embedding is not None
+        else {"query_texts": [query]}
+    )
+    n_results = limit * CANDIDATE_OVERFETCH
+
+    while True:
+        results = collection.query(
+            **search,
+            n_results=n_results,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+        candidates = {}
+        for document, metadata, distance in zip(
+            results["documents"][0], results["metadatas"][0], results["distances"][0]
+        ):
+            candidate_id = metadata["candidate_id"]
+            if candidate_id in candidates:
+                continue
+            if (
+                min_years is not None
+                and metadata.get("years_experience", -1) < min_years
+            ):
+                continue
+            candidates[candidate_id] = {
+                "candidate_id": candidate_id,
+                "distance": distance,
+                "role": metadata.get("role", ""),
+                "seniority": metadata.get("seniority", ""),
+                "location": metadata.get("location", ""),
+                "years_experience": metadata.get("years_experience", -1.0),
+                "match": document,
+            }
+        # Too few distinct candidates among the chunks, widen the search
+        # unless every matching chunk was already returned
+        if len(candidates) >= limit or len(results["ids"][0]) < n_results:
+            return list(candidates.values())[:limit]
+        n_results *= 4
@@ -0,0 +1,83 @@
+import os
+import re
+
+from batch_writer import estimate_tokens
+
+# Upper bound for one indexed chunk, longer sections are split on lines
+CV_CHUNK_MAX_TOKENS = int(os.getenv("CV_CHUNK_MAX_TOKENS", "400"))
+
+# Changing how pages are chunked makes stored pages be chunked again
+CHUNK_LAYOUT = "sections-v1"
+
+HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+# Experience entries start with a `Position:` bullet in the extraction format
+ENTRY = re.compile(r"^\s*[-*]\s+\**Position\**\s*:", re.IGNORECASE)
+
+
+def split_sections(markdown: str) -> list[tuple[str, list[str]]]:
+    """(heading, lines) of each section, text before the first heading has an empty heading"""
+    sections = [("", [])]
+    for line in markdown.splitlines():
+        if match := HEADING.match(line):
+            sections.append((match.group(1).strip(), []))
+        else:
+            sections[-1][1].append(line)
+    return [(heading, lines) for heading, lines in sections if "".join(lines).strip()]
+
+
+def split_entries(lines: list[str]) -> list[list[str]]:
+    """Split a section into entries, one per `Position:` bullet when there are any"""
+    entries = [[]]
+    for line in lines:
+        if ENTRY.match(line) and "".join(entries[-1]).strip():
+            entries.append([])
+        entries[-1].append(line)
+    return entries
+
+
+def split_long(lines: list[str], max_tokens: int) -> list[list[str]]:
+    parts, current, current_tokens = [], [], 0
+    for line in lines:
+        tokens = estimate_tokens(line)
+        if current and current_tokens + tokens > max_tokens:
+            parts.append(current)
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_sections(
+    markdown: str, max_tokens: int = CV_CHUNK_MAX_TOKENS
+) -> list[tuple[str, str]]:
+    """Split a structured CV page into (section, text) chunks for indexing
+
+    Each section (skills, experience, education, ...) becomes a chunk, with
+    one chunk per entry in sections listing several roles. Every chunk
+    repeats its heading so it embeds and reads well on its own.
+    """
+    chunks = []
+    for heading, lines in split_sections(markdown):
+        for entry in split_entries(lines):
+            for part in split_long(entry, max_tokens):
+                body = "\n".join(part).strip()
+                if body:
+                    text = f"## {heading}\n{body}" if heading else body
+                    chunks.append((heading or "General", text))
+    return chunks
+
+
+def join_chunks(chunks: list[str]) -> str:
+    """Rebuild page text from its chunks in order, dropping repeated headings"""
+    lines, previous_heading = [], None
+    for chunk in chunks:
+        first, _, rest = chunk.partition("\n")
+        if HEADING.match(first):
+            if first != previous_heading:
+                lines.extend(["", first] if lines else [first])
+            previous_heading = first
+            chunk = rest
+        lines.append(chunk)
+    return "\n".join(lines).strip()
@@ -0,0 +1,179 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+
+import numpy as np
+from batch_writer import embedding_batches
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from loguru import logger
+from shared.metrics import inc
+
+EMBEDDING_CACHE_DIR = os.getenv(
+    "EMBEDDING_CACHE_DIR", os.path.join(os.getenv("CACHE_DIR", ".cache"), "embeddings")
+)
+
+# Index records: sha256 of model and text, row of its vector in the array file
+RECORD = struct.Struct("<32sQ")
+
+
+def text_key(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{text}".encode()).digest()
+
+
+class EmbeddingStore:
+    """Append-only float32 vectors of one embedding model, with a key -> row index
+
+    `{name}.f32` holds the vectors row after row and `{name}.idx` one
+    fixed-size record per vector, so both only ever grow. The array file
+    is memory-mapped for reads. Appends take an exclusive file lock, so
+    processes sharing the directory never hand out the same row.
+    """
+
+    def __init__(self, directory: str, model: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r"[^\w.-]+", "-", model)
+        self.model = model
+        self.vectors_path = os.path.join(directory, f"{name}.f32")
+        self.index_path = os.path.join(directory, f"{name}.idx")
+        self.meta_path = os.path.join(directory, f"{name}.json")
+        self.dimensions = None
+        self.rows = {}
+        self._mapped = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not all(
+            os.path.exists(path)
+            for path in (self.meta_path, self.index_path, self.vectors_path)
+        ):
+            return
+        with open(self.meta_path) as file:
+            self.dimensions = json.load(file)["dimensions"]
+        with open(self.index_path, "rb") as file:
+            data = file.read()
+        # A torn last record or vector from a crashed append is ignored
+        complete_rows = os.path.getsize(self.vectors_path) // (4 * self.dimensions)
+        usable = len(data) - len(data) % RECORD.size
+        for key, row in RECORD.iter_unpack(data[:usable]):
+            if row < complete_rows:
+                self.rows[key] = row
+
+    def _row(self, row: int) -> np.ndarray:
+        if self._mapped is None or row >= len(self._mapped):
+            # Map the complete rows only, the file grows with every append
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dimensions)
+            self._mapped = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(rows, self.dimensions),
+            )
+        return np.array(self._mapped[row])
+
+    def get(self, keys: list[bytes]) -> list[np.ndarray | None]:
+        with self._lock:
+            return [
+                self._row(row) if (row := self.rows.get(key)) is not None else None
+                for key in keys
+            ]
+
+    def put(self, keys: list[bytes], vectors: list[np.ndarray]) -> None:
+        if not keys:
+            return
+        array = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = array.shape[1]
+                with open(self.meta_path, "w") as file:
+                    json.dump(
+                        {"model": self.model, "dimensions": self.dimensions}, file
+                    )
+            if array.shape[1] != self.dimensions:
+                raise ValueError(
+                    f"{self.model} returned {array.shape[1]} dimensions, "
+                    f"the cache holds {self.dimensions}"
+                )
+            row_bytes = 4 * self.dimensions
+            with open(self.index_path, "ab") as index:
+                fcntl.flock(index, fcntl.LOCK_EX)
+                try:
+                    # Appends start after the last complete record and row,
+                    # overwriting what a crashed append left behind
+                    index.truncate(index.tell() // RECORD.size * RECORD.size)
+                    with open(self.vectors_path, "ab") as rows:
+                        first = rows.tell() // row_bytes
+                        rows.truncate(first * row_bytes)
+                        rows.write(array.tobytes())
+                    index.write(
+                        b"".join(
+                            RECORD.pack(key, first + offset)
+                            for offset, key in enumerate(keys)
+                        )
+                    )
+                finally:
+                    fcntl.flock(index, fcntl.LOCK_UN)
+            for offset, key in enumerate(keys):
+                self.rows[key] = first + offset
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Chroma embedding function that only sends texts it has not embedded before
+
+    Vectors are keyed by model and content hash and persisted in an
+    EmbeddingStore, so re-ingesting or re-querying known text needs no
+    network call. Misses are deduplicated and embedded in as few requests
+    as the API limits allow. The wrapped function's name and config are
+    reported as its own, so existing collections open unchanged.
+    """
+
+    def __init__(self, embedding_function, directory: str = EMBEDDING_CACHE_DIR):
+        self.embedding_function = embedding_function
+        dimensions = getattr(embedding_function, "dimensions", None)
+        self.model = embedding_function.model_name + (
+            f"-{dimensions}" if dimensions else ""
+        )
+        self.store = EmbeddingStore(directory, self.model)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [text_key(self.model, text) for text in input]
+        vectors = self.store.get(keys)
+        misses = {}
+        for index, vector in enumerate(vectors):
+            if vector is None:
+                misses.setdefault(keys[index], input[index])
+        inc("embedding_cache_total", {"event": "hit"}, len(input) - len(misses))
+
+        if misses:
+            inc("embedding_cache_total", {"event": "miss"}, len(misses))
+            miss_keys, texts = list(misses), list(misses.values())
+            embedded = []
+            for start, end in embedding_batches(texts):
+                embedded.extend(self.embedding_function(texts[start:end]))
+            self.store.put(miss_keys, embedded)
+            fresh = dict(zip(miss_keys, embedded))
+            vectors = [
+                vector if vector is not None else np.asarray(fresh[key], np.float32)
+                for key, vector in zip(keys, vectors)
+            ]
+            logger.debug(f"Embedded {len(misses)} of {len(input)} texts")
+        return vectors
+
+    def name(self) -> str:
+        return self.embedding_function.name()
+
+    def get_config(self) -> dict:
+        return self.embedding_function.get_config()
+
+    def default_space(self):
+        return self.embedding_function.default_space()
+
+    def supported_spaces(self):
+        return self.embedding_function.supported_spaces()
+
+    def is_legacy(self) -> bool:
+        return self.embedding_function.is_legacy()
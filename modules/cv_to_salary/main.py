@@ -1,18 +1,20 @@
+import asyncio
 import os
 import time
 
-from agents import Agent, Runner
+from candidates import SalaryContext, candidate_id_for
 from loguru import logger
-from tools.get_cv_data import get_cv_data
+from shared.lazy import Lazy
+from shared.metrics import observe, track_run
 from tools.process_cv_ocr import process_cv_ocr
-from tools.search_salary_info import search_salary_info
-from utils import cv_collection
+from utils import async_openai_client, cv_collection
 
 SYSTEM_PROMPT = """
     You are a CV to Salary Analysis Agent.
 
     WORKFLOW:
-    1. Use get_cv_data to retrieve CV information
+    1. Use get_cv_data with a focused query to retrieve CV information,
+       e.g. "current job title and years of experience", then "technical skills" or "location"
     2. Extract the primary job role from the CV data  
     3. Use search_salary_info to find salary data for that role
     4. Provide a focused salary analysis with:
@@ -27,50 +29,105 @@ SYSTEM_PROMPT = """
     - Include source URLs
     - Keep analysis concise and actionable
     """
+SEARCH_STEP = "3. Use search_salary_info to find salary data for that role"
+# With a compiled reference dataset, salary searches are only a fallback
+REFERENCE_STEP = """3. Use lookup_salary_reference with the role, location and seniority from the CV.
+       Only when it reports no coverage, use search_salary_info to find salary data for that role"""
+
+
+def build_salary_agent():
+    """Create the salary agent, importing the Agents SDK only when it is needed"""
+    from agents import Agent, set_default_openai_client
+    from salary_reference import reference_available
+    from tools.get_cv_data import get_cv_data
+    from tools.search_salary_info import search_salary_info
+
+    # Route the agent's model calls through the shared rate limiter
+    set_default_openai_client(async_openai_client.resolve())
+
+    instructions, tools = SYSTEM_PROMPT, [get_cv_data, search_salary_info]
+    if reference_available():
+        from tools.lookup_salary_reference import lookup_salary_reference
+
+        instructions = SYSTEM_PROMPT.replace(SEARCH_STEP, REFERENCE_STEP)
+        tools.insert(1, lookup_salary_reference)
+
+    return Agent(
+        name="CV Salary Analyzer",
+        instructions=instructions,
+        model="gpt-4o-mini",
+        tools=tools,
+    )
+
 
-salary_agent = Agent(
-    name="CV Salary Analyzer",
-    instructions=SYSTEM_PROMPT,
-    model="gpt-4o-mini",
-    tools=[get_cv_data, search_salary_info],
-)
+salary_agent = Lazy(build_salary_agent)
 
 
-def check_cv_data(cv_path_name: str) -> None:
-    """Ensure CV data is available in the collection, process PDF if doesn't exist"""
+async def check_cv_data(
+    cv_path_name: str, candidate_id: str | None = None
+) -> str | None:
+    """Ensure the collection matches the CV, processing only what changed since last time
+
+    Returns the candidate id the CV is stored under: `candidate_id` if given,
+    otherwise one derived from the CV's content. An explicit id keeps a
+    candidate's id, and the pages that did not change, across CV revisions.
+    """
+    if candidate_id is None and os.path.exists(cv_path_name):
+        candidate_id = candidate_id_for(cv_path_name)
     try:
-        results = cv_collection.get()
-        if not results["documents"]:
-            logger.info("No CV data found, processing PDF...")
-            if os.path.exists(cv_path_name):
-                process_cv_ocr(cv_path_name)
-                logger.info("✅ CV processed successfully")
-            else:
-                logger.error("❌ cv.pdf not found")
+        if os.path.exists(cv_path_name):
+            await process_cv_ocr(cv_path_name, candidate_id=candidate_id)
+            logger.info("✅ CV data is up to date")
+        elif candidate_id is None:
+            logger.error(f"❌ {cv_path_name} not found")
+        else:
+            stored = await asyncio.to_thread(
+                cv_collection.get, where={"candidate_id": candidate_id}, limit=1
+            )
+            if not stored["ids"]:
+                logger.error(f"❌ {cv_path_name} not found")
     except Exception as e:
         logger.error(f"Error checking/processing CV: {e}")
+    return candidate_id
 
 
-async def main() -> None:
-    """Main function to run CV to salary analysis"""
-    logger.info("🚀 Starting CV to Salary Analysis")
-    cv_path_name = "cv.pdf"
-
-    check_cv_data(cv_path_name)
+async def analyze_candidate(candidate_id: str):
+    """Run the salary agent for one stored candidate, returning its report and token usage"""
+    from agents import Runner
 
     runner = await Runner.run(
-        starting_agent=salary_agent,
+        starting_agent=salary_agent.resolve(),
         input="Analyze my CV and provide salary insights for my role",
+        context=SalaryContext(candidate_id),
     )
+    usage = runner.context_wrapper.usage
+    observe("llm_prompt_tokens", {"tag": "salary_agent"}, usage.input_tokens)
+    observe("llm_completion_tokens", {"tag": "salary_agent"}, usage.output_tokens)
+    return runner.final_output, usage
 
-    result = runner.final_output
+
+def save_report(candidate_id: str, result: str) -> str:
     timestamp = int(time.time() * 1000)
-    result_file_name = f"salary-analysis-{timestamp}.md"
+    result_file_name = f"salary-analysis-{candidate_id}-{timestamp}.md"
     result_file_path = f"results/salaries/{result_file_name}"
 
-    os.makedirs("results", exist_ok=True)
+    os.makedirs(os.path.dirname(result_file_path), exist_ok=True)
     with open(result_file_path, "w") as f:
         f.write(f"# CV to Salary Analysis\n\n{result}")
+    return result_file_path
+
+
+async def main(cv_path_name: str = "cv.pdf", candidate_id: str | None = None) -> None:
+    """Main function to run CV to salary analysis"""
+    logger.info("🚀 Starting CV to Salary Analysis")
+
+    with track_run("salary-analysis"):
+        candidate_id = await check_cv_data(cv_path_name, candidate_id)
+        if candidate_id is None:
+            return
+        result, _ = await analyze_candidate(candidate_id)
+
+    result_file_path = save_report(candidate_id, result)
 
     logger.info(f"✅ Analysis complete! Saved to: {result_file_path}")
     print("\n" + "=" * 60)
@@ -81,7 +138,7 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    import asyncio
+    import sys
     import time
 
-    asyncio.run(main())
+    asyncio.run(main(*sys.argv[1:3]))
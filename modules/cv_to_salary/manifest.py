@@ -0,0 +1,46 @@
+import hashlib
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def read_manifest(collection, candidate_id: str) -> dict:
+    """Return the ingestion manifest of one candidate, kept on its chunks
+
+    `{"source_sha256": ..., "page_hashes": {page_number: markdown sha256},
+    "layout": chunk layout}`. The source hash and layout only count when
+    every chunk agrees, so an interrupted ingestion is never skipped.
+    """
+    stored = collection.get(where={"candidate_id": candidate_id}, include=["metadatas"])
+    metadatas = stored["metadatas"]
+    sources = {metadata.get("source_sha256") for metadata in metadatas}
+    layouts = {metadata.get("layout") for metadata in metadatas}
+    return {
+        "source_sha256": sources.pop() if len(sources) == 1 else None,
+        "page_hashes": {
+            metadata["page_number"]: metadata.get("page_sha256")
+            for metadata in metadatas
+        },
+        "layout": layouts.pop() if len(layouts) == 1 else None,
+    }
+
+
+def write_manifest(
+    collection, candidate_id: str, source_sha256: str, layout: str, profile: dict
+) -> None:
+    """Stamp every chunk of the candidate with the source hash, layout and profile"""
+    stored = collection.get(where={"candidate_id": candidate_id}, include=[])
+    if not stored["ids"]:
+        return
+    metadata = {**profile, "source_sha256": source_sha256, "layout": layout}
+    # update() merges into the existing chunk metadata
+    collection.update(ids=stored["ids"], metadatas=[metadata] * len(stored["ids"]))
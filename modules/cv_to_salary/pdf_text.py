@@ -0,0 +1,107 @@
+import math
+import os
+import re
+
+from loguru import logger
+
+# Alphanumeric characters per square inch for a page's text layer to be
+# trusted, below that the page is treated as scanned and sent to OCR
+PDF_TEXT_MIN_DENSITY = float(os.getenv("PDF_TEXT_MIN_DENSITY", "2.0"))
+
+# Lines set this much larger than the body text become headings
+HEADING_SCALE = 1.2
+BULLETS = "•●▪■◦‣–-*"
+DOUBLED_WORD = re.compile(r"^(?:(.)\1)+$")
+
+
+def undouble(line: str) -> str:
+    """Undo fonts that map every glyph twice, `AAbboouutt` or `A Ab bo ou ut t` -> `About`"""
+    words = [word.replace(" ", "") for word in re.split(r"\s{2,}", line.strip())]
+    if sum(map(len, words)) < 4 or not all(DOUBLED_WORD.match(word) for word in words):
+        return line
+    return " ".join(word[::2] for word in words)
+
+
+def text_density(text: str, width: float, height: float) -> float:
+    """Alphanumeric characters per square inch of page"""
+    area = max(width * height / 72**2, 1.0)
+    return sum(char.isalnum() for char in text) / area
+
+
+def page_lines(page) -> list[tuple[float, str]]:
+    """(font size, text) of each line on the page, top to bottom"""
+    spans = []
+
+    def visit(text, cm, tm, font_dict, font_size) -> None:
+        if not text.strip():
+            return
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        size = font_size * math.hypot(tm[2], tm[3]) * math.hypot(cm[2], cm[3])
+        spans.append((round(y), x, size, text.strip("\n")))
+
+    page.extract_text(visitor_text=visit)
+
+    lines = {}
+    for y, x, size, text in spans:
+        lines.setdefault(y, []).append((x, size, text))
+
+    result = []
+    for y in sorted(lines, reverse=True):
+        parts = sorted(lines[y], key=lambda part: part[0])
+        text = ""
+        for _, _, part in parts:
+            if text and not text[-1].isspace() and not part[0].isspace():
+                text += " "
+            text += part
+        text = " ".join(undouble(text).split())
+        result.append((max(size for _, size, _ in parts), text))
+    return result
+
+
+def to_markdown(lines: list[tuple[float, str]]) -> str:
+    """Render lines as markdown, with headings from font size and list items from bullets"""
+    if not lines:
+        return ""
+    sizes = sorted(size for size, _ in lines)
+    body_size = sizes[len(sizes) // 2]
+    title_size = sizes[-1]
+
+    blocks = []
+    for size, text in lines:
+        if size >= body_size * HEADING_SCALE:
+            level = "#" if size == title_size else "##"
+            blocks.append(f"\n{level} {text}\n")
+        elif text[0] in BULLETS and len(text) > 1 and text[1] == " ":
+            blocks.append(f"- {text[2:]}")
+        else:
+            blocks.append(text)
+    return "\n".join(blocks).strip() + "\n"
+
+
+def extract_pages(
+    file_path: str, min_density: float = PDF_TEXT_MIN_DENSITY
+) -> list[str | None]:
+    """Markdown of each page read from the PDF's own text layer
+
+    Pages whose text layer is missing or too sparse to be trusted are None
+    and need OCR. An empty list means the file could not be read locally.
+    """
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(file_path)
+        pages = []
+        for page in reader.pages:
+            lines = page_lines(page)
+            text = "\n".join(text for _, text in lines)
+            box = page.mediabox
+            if text_density(text, float(box.width), float(box.height)) < min_density:
+                pages.append(None)
+            else:
+                pages.append(to_markdown(lines))
+        return pages
+    # pypdf fails in many ways on malformed files, OCR reads those instead
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"Could not read the text layer of {file_path}: {e}")
+        return []
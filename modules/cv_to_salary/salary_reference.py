@@ -0,0 +1,197 @@
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+from candidates import SENIORITY_LEVELS
+from salary_stats import COUNTRIES, FX_TO_USD, LOCATION_WORDS, PERIODS, QUANTILES
+from shared.lazy import Lazy
+
+SALARY_REFERENCE_DIR = os.getenv("SALARY_REFERENCE_DIR", "data/salary_reference")
+# Buckets with fewer records do not count as coverage
+SALARY_REFERENCE_MIN_RECORDS = int(os.getenv("SALARY_REFERENCE_MIN_RECORDS", "5"))
+
+REFERENCE_FORMAT = 1
+ANY = "*"
+STATS = ("count", "min", *(f"p{q}" for q in QUANTILES), "max")
+SENIORITY_WORDS = {
+    "intern": "intern",
+    "internship": "intern",
+    "junior": "junior",
+    "jr": "junior",
+    "entry": "junior",
+    "mid": "mid",
+    "intermediate": "mid",
+    "senior": "senior",
+    "sr": "senior",
+    "lead": "lead",
+    "staff": "lead",
+    "principal": "principal",
+}
+
+
+@lru_cache(maxsize=1024)
+def split_role(role: str) -> tuple[str, str | None]:
+    """Role words without seniority and the seniority they name, `Sr. Data Engineer`
+    -> (`data engineer`, `senior`)"""
+    words, seniority = [], None
+    for word in re.findall(r"[a-z0-9+#]+", role.lower()):
+        if word in SENIORITY_WORDS:
+            seniority = seniority or SENIORITY_WORDS[word]
+        else:
+            words.append(word)
+    return " ".join(words), seniority
+
+
+@lru_cache(maxsize=1024)
+def seniority_key(seniority: str | None) -> str | None:
+    if not seniority:
+        return None
+    for word in re.findall(r"[a-z]+", seniority.lower()):
+        if word in SENIORITY_WORDS:
+            return SENIORITY_WORDS[word]
+    level = seniority.strip().lower()
+    return level if level in SENIORITY_LEVELS else None
+
+
+@lru_cache(maxsize=1024)
+def location_key(location: str | None) -> str | None:
+    """Country of a place, `Jakarta, Indonesia` -> `indonesia`"""
+    if not location or not location.strip():
+        return None
+    if match := LOCATION_WORDS.search(location):
+        return COUNTRIES[match.group(1).lower()][0].lower()
+    return location.split(",")[-1].strip().lower()
+
+
+def bucket_key(role: str, location: str, seniority: str) -> str:
+    return f"{role}|{location}|{seniority}"
+
+
+def read_records(csv_path: str) -> dict[str, list[float]]:
+    """Yearly USD salaries of every bucket a CSV record belongs to"""
+    buckets = defaultdict(list)
+    with open(csv_path, newline="") as file:
+        for line, row in enumerate(csv.DictReader(file), start=2):
+            try:
+                role, title_seniority = split_role(row["role"])
+                currency = (row.get("currency") or "USD").strip().upper()
+                period = (row.get("period") or "year").strip().lower()
+                salary = float(row["salary"]) * FX_TO_USD[currency] * PERIODS[period]
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"{csv_path}:{line}: invalid record ({e})") from e
+            location = location_key(row.get("location")) or ANY
+            seniority = seniority_key(row.get("seniority")) or title_seniority or ANY
+            for loc in dict.fromkeys((location, ANY)):
+                for level in dict.fromkeys((seniority, ANY)):
+                    buckets[bucket_key(role, loc, level)].append(salary)
+    return buckets
+
+
+def compile_reference(csv_path: str, out_dir: str = SALARY_REFERENCE_DIR) -> int:
+    """Compile the CSV into `out_dir`, replacing it whole, and return the bucket count
+
+    The CSV has `role`, `location`, `seniority` and `salary` columns, with
+    optional `currency` (default USD) and `period` (default year). Records
+    are grouped into role / location / seniority buckets plus their "any
+    location" and "any seniority" roll-ups. Each bucket is one float32 row
+    of count, min, percentiles and max, memory-mapped when read, so a
+    lookup is a dict hit and a row read.
+    """
+    buckets = read_records(csv_path)
+    keys = sorted(buckets)
+    table = np.empty((len(keys), len(STATS)), dtype=np.float32)
+    for row, key in enumerate(keys):
+        values = np.asarray(buckets[key], dtype=np.float64)
+        table[row, 0] = len(values)
+        table[row, 1] = values.min()
+        table[row, 2:-1] = np.percentile(values, QUANTILES)
+        table[row, -1] = values.max()
+
+    staging = f"{out_dir}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    np.save(os.path.join(staging, "stats.npy"), table)
+    with open(os.path.join(staging, "buckets.json"), "w") as file:
+        json.dump(
+            {
+                "format": REFERENCE_FORMAT,
+                "stats": STATS,
+                "source": os.path.abspath(csv_path),
+                "buckets": {key: row for row, key in enumerate(keys)},
+            },
+            file,
+        )
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(staging, out_dir)
+    return len(keys)
+
+
+def reference_available(path: str = SALARY_REFERENCE_DIR) -> bool:
+    return os.path.exists(os.path.join(path, "buckets.json"))
+
+
+class SalaryReference:
+    """Read side of a compiled reference dataset"""
+
+    def __init__(self, path: str = SALARY_REFERENCE_DIR) -> None:
+        with open(os.path.join(path, "buckets.json")) as file:
+            index = json.load(file)
+        if index.get("format") != REFERENCE_FORMAT:
+            raise ValueError(f"{path} has an unsupported format, compile it again")
+        self.buckets = index["buckets"]
+        # A plain ndarray view of the mapping reads rows several times faster
+        # than indexing the np.memmap subclass
+        self.stats = np.asarray(np.load(os.path.join(path, "stats.npy"), mmap_mode="r"))
+
+    def lookup(
+        self,
+        job_role: str,
+        location: str | None = None,
+        seniority: str | None = None,
+        min_records: int = SALARY_REFERENCE_MIN_RECORDS,
+    ) -> dict | None:
+        """Stats of the narrowest covered bucket, or None without coverage
+
+        Seniority falls back to all levels of the role. A location is never
+        dropped: another market's figures are no answer for it.
+        """
+        role, title_seniority = split_role(job_role)
+        level = seniority_key(seniority) or title_seniority
+        loc = location_key(location) or ANY
+        for candidate_level in dict.fromkeys((level or ANY, ANY)):
+            row = self.buckets.get(bucket_key(role, loc, candidate_level))
+            if row is None:
+                continue
+            stats = dict(zip(STATS, self.stats[row].tolist()))
+            if stats["count"] >= min_records:
+                stats.update(role=role, location=loc, seniority=candidate_level)
+                return stats
+        return None
+
+
+def format_match(match: dict) -> str:
+    location = "all locations" if match["location"] == ANY else match["location"]
+    seniority = "all levels" if match["seniority"] == ANY else match["seniority"]
+    percentiles = ", ".join(f"P{q} {match[f'p{q}']:,.0f}" for q in QUANTILES)
+    return (
+        f"Reference salaries for {match['role']} ({seniority}, {location}), "
+        f"yearly USD from {match['count']:.0f} records: {percentiles} "
+        f"(range {match['min']:,.0f} - {match['max']:,.0f})"
+    )
+
+
+salary_reference = Lazy(SalaryReference)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        sys.exit(f"usage: {sys.argv[0]} salaries.csv [output dir]")
+    out_dir = sys.argv[2] if len(sys.argv) == 3 else SALARY_REFERENCE_DIR
+    count = compile_reference(sys.argv[1], out_dir)
+    print(f"Compiled {count} salary buckets to {out_dir}")
@@ -0,0 +1,358 @@
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+# Figures are compared in this currency per year, at these approximate
+# rates (units of USD per unit of currency, mid 2025)
+SALARY_CURRENCY = "USD"
+FX_TO_USD = {
+    "USD": 1.0,
+    "EUR": 1.10,
+    "GBP": 1.30,
+    "CHF": 1.15,
+    "SGD": 0.75,
+    "AUD": 0.65,
+    "CAD": 0.73,
+    "IDR": 1 / 16_200,
+    "INR": 1 / 84,
+    "MYR": 0.22,
+    "PHP": 1 / 57,
+    "JPY": 1 / 150,
+}
+# Annualized figures outside this range (USD) are misparsed numbers, not salaries
+PLAUSIBLE_USD = (
+    float(os.getenv("SALARY_MIN_USD", "1000")),
+    float(os.getenv("SALARY_MAX_USD", "2000000")),
+)
+
+SYMBOLS = {
+    "US$": "USD",
+    "S$": "SGD",
+    "A$": "AUD",
+    "C$": "CAD",
+    "€": "EUR",
+    "£": "GBP",
+    "¥": "JPY",
+    "₹": "INR",
+    "₱": "PHP",
+    "RP": "IDR",
+    "RP.": "IDR",
+    "RM": "MYR",
+}
+MULTIPLIERS = {
+    "k": 1e3,
+    "thousand": 1e3,
+    "m": 1e6,
+    "mn": 1e6,
+    "million": 1e6,
+    "juta": 1e6,
+    "jt": 1e6,
+    "l": 1e5,
+    "lakh": 1e5,
+    "lakhs": 1e5,
+    "lpa": 1e5,
+    "cr": 1e7,
+    "crore": 1e7,
+    "crores": 1e7,
+}
+PERIODS = {"year": 1, "month": 12, "week": 52, "day": 260, "hour": 2080}
+PERIOD_WORDS = re.compile(
+    r"\b(?:(?P<year>years?|yr|annum|annual(?:ly)?|p\.?a|lpa|tahun)"
+    r"|(?P<month>months?|mo|monthly|bulan(?:an)?)"
+    r"|(?P<week>weeks?|weekly)"
+    r"|(?P<day>days?|daily)"
+    r"|(?P<hour>hours?|hr|hourly))\b",
+    re.IGNORECASE,
+)
+
+# Country or city names mapped to the country figures near them are for
+COUNTRIES = {
+    "united states": ("United States", "USD"),
+    "usa": ("United States", "USD"),
+    "new york": ("United States", "USD"),
+    "san francisco": ("United States", "USD"),
+    "seattle": ("United States", "USD"),
+    "united kingdom": ("United Kingdom", "GBP"),
+    "uk": ("United Kingdom", "GBP"),
+    "london": ("United Kingdom", "GBP"),
+    "germany": ("Germany", "EUR"),
+    "berlin": ("Germany", "EUR"),
+    "munich": ("Germany", "EUR"),
+    "netherlands": ("Netherlands", "EUR"),
+    "amsterdam": ("Netherlands", "EUR"),
+    "france": ("France", "EUR"),
+    "paris": ("France", "EUR"),
+    "switzerland": ("Switzerland", "CHF"),
+    "zurich": ("Switzerland", "CHF"),
+    "indonesia": ("Indonesia", "IDR"),
+    "jakarta": ("Indonesia", "IDR"),
+    "bandung": ("Indonesia", "IDR"),
+    "surabaya": ("Indonesia", "IDR"),
+    "singapore": ("Singapore", "SGD"),
+    "malaysia": ("Malaysia", "MYR"),
+    "kuala lumpur": ("Malaysia", "MYR"),
+    "philippines": ("Philippines", "PHP"),
+    "manila": ("Philippines", "PHP"),
+    "india": ("India", "INR"),
+    "bangalore": ("India", "INR"),
+    "bengaluru": ("India", "INR"),
+    "australia": ("Australia", "AUD"),
+    "sydney": ("Australia", "AUD"),
+    "melbourne": ("Australia", "AUD"),
+    "canada": ("Canada", "CAD"),
+    "toronto": ("Canada", "CAD"),
+    "japan": ("Japan", "JPY"),
+    "tokyo": ("Japan", "JPY"),
+}
+# Where figures with no place nearby are for, by their currency
+HOME_COUNTRY = {
+    currency: country for country, currency in reversed(list(COUNTRIES.values()))
+} | {"EUR": "Eurozone"}
+
+# Letter codes and `RM` / `Rp` only count as written and not inside a word,
+# so `platform 150,000` or `firm 300k` are not ringgit
+CODES = "|".join(FX_TO_USD)
+PREFIX = r"(?<![A-Za-z])(?:US\$|S\$|A\$|C\$|\$|€|£|¥|₹|₱|Rp\.?|RM|" + CODES + ")"
+NUMBER = r"\d{1,3}(?:[.,\s]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d+)?"
+MULTIPLIER = (
+    r"(?:\s?(?:k|K|m|M|L"
+    r"|(?i:thousand|mn|million|juta|jt|lakhs?|lpa|crores?|cr))\b)?"
+)
+# `$120,000`, `Rp 8 juta`, `45.000 EUR`, optionally followed by the top of a range
+SALARY = re.compile(
+    rf"(?:(?P<cur>{PREFIX})\s?(?P<num>{NUMBER})(?P<mult>{MULTIPLIER})"
+    rf"|(?P<num2>{NUMBER})(?P<mult2>{MULTIPLIER})\s?(?P<cur2>{CODES})\b)"
+    rf"(?:\s?(?:-|–|—|(?i:to|sampai|hingga))\s?"
+    rf"(?:(?:{PREFIX})\s?)?(?P<hi_num>{NUMBER})(?P<hi_mult>{MULTIPLIER}))?"
+)
+LOCATION_WORDS = re.compile(
+    r"\b("
+    + "|".join(sorted(map(re.escape, COUNTRIES), key=len, reverse=True))
+    + r")\b",
+    re.IGNORECASE,
+)
+QUANTILES = (10, 25, 50, 75, 90)
+
+
+@dataclass
+class SalaryFigure:
+    low: float
+    high: float
+    currency: str
+    period: str
+    location: str
+    text: str
+    url: str
+
+
+def parse_number(number: str, multiplier: str | None) -> float:
+    """`120,000` `45.000` `1.5` `8 000` with an optional `k` / `juta` / `lakh` suffix"""
+    number = number.replace(" ", "")
+    groups = re.split(r"[.,]", number)
+    if len(groups) > 1 and all(len(group) == 3 for group in groups[1:]):
+        # Thousands separators, either style
+        value = float("".join(groups))
+    elif len(groups) > 2:
+        # `1.234.567,89` or `1,234,567.89`
+        value = float("".join(groups[:-1]) + "." + groups[-1])
+    else:
+        value = float(number.replace(",", "."))
+    if multiplier and multiplier.strip():
+        value *= MULTIPLIERS[multiplier.strip().lower()]
+    return value
+
+
+def local_currency(country: str | None) -> str | None:
+    return next((cur for name, cur in COUNTRIES.values() if name == country), None)
+
+
+def currency_for(symbol: str, country: str | None) -> str:
+    symbol = symbol.upper()
+    if symbol == "$":
+        # A bare dollar is the local dollar on pages about dollar countries
+        local = local_currency(country)
+        return local if local in ("SGD", "AUD", "CAD") else "USD"
+    return SYMBOLS.get(symbol, symbol)
+
+
+def page_country(title: str, content: str) -> str | None:
+    """Country a page is about, from its title or else its most mentioned place"""
+    for text in (title, content):
+        mentions = Counter(
+            COUNTRIES[match.lower()][0] for match in LOCATION_WORDS.findall(text)
+        )
+        if mentions:
+            return mentions.most_common(1)[0][0]
+    return None
+
+
+def infer_period(context: str, currency: str, low: float, multiplier: str) -> str:
+    if multiplier.strip().lower() == "lpa":
+        return "year"
+    if match := PERIOD_WORDS.search(context):
+        return match.lastgroup
+    # Unlabelled figures are yearly unless too small to be a yearly salary
+    return "year" if low * FX_TO_USD[currency] >= 3000 else "month"
+
+
+def sentence_bounds(text: str, start: int, end: int) -> tuple[int, int]:
+    """Span of the sentence or line a match is in, where its period and place are written"""
+    begin = max(text.rfind(". ", 0, start), text.rfind("\n", 0, start)) + 1
+    stops = [i for i in (text.find(". ", end), text.find("\n", end)) if i >= 0]
+    return begin, min(stops, default=len(text))
+
+
+def extract_figures(text: str, url: str = "", title: str = "") -> list[SalaryFigure]:
+    """Salary amounts and ranges with their currency, period and location"""
+    country = page_country(title, text)
+    figures = []
+    for match in SALARY.finditer(text):
+        number = match.group("num") or match.group("num2")
+        multiplier = match.group("mult") or match.group("mult2") or ""
+        symbol = match.group("cur") or match.group("cur2")
+        high_multiplier = match.group("hi_mult") or ""
+        try:
+            low = parse_number(number, multiplier)
+            high = low
+            if match.group("hi_num"):
+                high = parse_number(match.group("hi_num"), high_multiplier)
+                # `80-120k`: the unit of a range is often only written once
+                if not multiplier.strip() and high_multiplier.strip():
+                    scaled = parse_number(number, high_multiplier)
+                    if scaled <= high:
+                        low, multiplier = scaled, high_multiplier
+        except (KeyError, ValueError):
+            continue
+        if low <= 0 or high < low:
+            continue
+
+        begin, stop = sentence_bounds(text, match.start(), match.end())
+        sentence = text[begin:stop]
+        place = LOCATION_WORDS.search(sentence)
+        if place:
+            location = COUNTRIES[place.group(1).lower()][0]
+            currency = currency_for(symbol, location)
+        else:
+            currency = currency_for(symbol, country)
+            # The page's country only claims figures quoted in its own currency,
+            # so `$180k` on a Jakarta page counts for the United States
+            location = (
+                country
+                if currency == local_currency(country)
+                else HOME_COUNTRY.get(currency, "Unknown")
+            )
+        # The period right after the figure wins over one elsewhere in the sentence
+        after = text[match.end() : min(stop, match.end() + 40)]
+        period = infer_period(after + " " + sentence, currency, low, multiplier)
+        figures.append(
+            SalaryFigure(
+                low, high, currency, period, location, match.group(0).strip(), url
+            )
+        )
+    return figures
+
+
+def summarize(figures: list[SalaryFigure]) -> list[dict]:
+    """Percentiles and spread of yearly salaries per location, in USD and local currency
+
+    A range contributes both its ends so wide ranges weigh into the spread.
+    Implausible yearly values are dropped as misparsed numbers.
+    """
+    if not figures:
+        return []
+    low = np.array([figure.low for figure in figures])
+    high = np.array([figure.high for figure in figures])
+    yearly = np.array([PERIODS[figure.period] for figure in figures], dtype=float)
+    rate = np.array([FX_TO_USD[figure.currency] for figure in figures])
+    locations = np.array([figure.location for figure in figures])
+    currencies = np.array([figure.currency for figure in figures])
+
+    low_usd, high_usd = low * yearly * rate, high * yearly * rate
+    keep = (low_usd >= PLAUSIBLE_USD[0]) & (high_usd <= PLAUSIBLE_USD[1])
+
+    rows = []
+    for location in dict.fromkeys(locations[keep]):
+        in_location = keep & (locations == location)
+        values = np.concatenate([low_usd[in_location], high_usd[in_location]])
+        p10, p25, p50, p75, p90 = np.percentile(values, QUANTILES)
+        # Local figures are the location's most quoted currency
+        names, counts = np.unique(currencies[in_location], return_counts=True)
+        local = names[counts.argmax()]
+        in_local = in_location & (currencies == local)
+        local_values = np.concatenate(
+            [low[in_local] * yearly[in_local], high[in_local] * yearly[in_local]]
+        )
+        rows.append(
+            {
+                "location": str(location),
+                "figures": int(in_location.sum()),
+                "p10": p10,
+                "p25": p25,
+                "median": p50,
+                "p75": p75,
+                "p90": p90,
+                "iqr": p75 - p25,
+                "spread": p90 / p10 if p10 else float("nan"),
+                "local_currency": str(local),
+                "local_median": float(np.median(local_values)),
+            }
+        )
+    return sorted(rows, key=lambda row: -row["figures"])
+
+
+def compact(value: float) -> str:
+    if value >= 1e6:
+        return f"{value / 1e6:.2f}M"
+    if value >= 1e3:
+        return f"{value / 1e3:.1f}k"
+    return f"{value:.0f}"
+
+
+def format_summary(results: list[dict], snippet_chars: int = 300) -> str:
+    """Compact salary table for the agent from search results with their raw page content"""
+    figures, sources = [], []
+    for result in results:
+        text = result.get("raw_content") or result.get("content") or ""
+        found = extract_figures(text, result.get("url", ""), result.get("title", ""))
+        figures.extend(found)
+        sources.append((result, found))
+
+    rows = summarize(figures)
+    lines = []
+    if rows:
+        lines += [
+            (
+                f"Yearly salary in {SALARY_CURRENCY} "
+                f"({sum(row['figures'] for row in rows)} figures, "
+                "ranges count both ends, approximate FX rates)"
+            ),
+            "",
+            "| Location | Figures | P10 | P25 | Median | P75 | P90 | IQR | P90/P10 | Local median |",
+            "|---|---|---|---|---|---|---|---|---|---|",
+        ]
+        for row in rows:
+            lines.append(
+                f"| {row['location']} | {row['figures']} | "
+                + " | ".join(
+                    compact(row[key])
+                    for key in ("p10", "p25", "median", "p75", "p90", "iqr")
+                )
+                + f" | {row['spread']:.1f}x | {row['local_currency']} "
+                f"{compact(row['local_median'])} |"
+            )
+    else:
+        lines.append("No salary figures found in the search results.")
+
+    lines += ["", "Sources:"]
+    for result, found in sources:
+        line = f"- {result.get('title', '')} ({result.get('url', '')})"
+        if found:
+            examples = "; ".join(dict.fromkeys(f"{f.text} /{f.period}" for f in found))
+            line += f": {examples[:snippet_chars]}"
+        elif not rows:
+            line += f": {(result.get('content') or '')[:snippet_chars]}"
+        lines.append(line)
+    return "\n".join(lines)
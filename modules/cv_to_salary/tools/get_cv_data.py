@@ -1,14 +1,77 @@
-from agents import function_tool
+import asyncio
+import os
+
+from agents import RunContextWrapper, function_tool
+from batch_writer import estimate_tokens
+from candidates import SalaryContext
+from chunking import join_chunks
+from shared.metrics import instrument_tool
 from utils import cv_collection
 
+# Chunks returned for a query, and the token budget of the tool output
+CV_QUERY_TOP_K = int(os.getenv("CV_QUERY_TOP_K", "6"))
+CV_DATA_TOKEN_CAP = int(os.getenv("CV_DATA_TOKEN_CAP", "2000"))
+
+
+def pack_chunks(chunks: list[tuple], token_cap: int) -> list[tuple]:
+    """Keep chunks in rank order until `token_cap` tokens are used"""
+    packed, used = [], 0
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk[-1])
+        if packed and used + tokens > token_cap:
+            break
+        packed.append(chunk)
+        used += tokens
+    return packed
+
+
+def format_chunks(chunks: list[tuple], total: int) -> str:
+    # Document order reads better than rank order
+    text = join_chunks([document for *_, document in sorted(chunks)])
+    if len(chunks) < total:
+        text += f"\n\n({total - len(chunks)} more CV sections not shown)"
+    return text
+
+
+def read_chunks(candidate_id: str, query: str | None) -> list[tuple]:
+    """(page, chunk index, text) of the candidate's chunks, ranked for `query` if given"""
+    where = {"candidate_id": candidate_id}
+    if not query:
+        results = cv_collection.get(where=where, include=["documents", "metadatas"])
+        return sorted(
+            (metadata["page_number"], metadata.get("chunk_index", 0), document)
+            for document, metadata in zip(results["documents"], results["metadatas"])
+        )
+
+    results = cv_collection.query(
+        query_texts=[query],
+        n_results=CV_QUERY_TOP_K,
+        where=where,
+        include=["documents", "metadatas"],
+    )
+    return [
+        (metadata["page_number"], metadata.get("chunk_index", 0), document)
+        for document, metadata in zip(results["documents"][0], results["metadatas"][0])
+    ]
+
 
 @function_tool
-def get_cv_data() -> str:
-    """Get CV data from vector database collection"""
+@instrument_tool
+async def get_cv_data(
+    ctx: RunContextWrapper[SalaryContext], query: str | None = None
+) -> str:
+    """Get CV data of the candidate being analyzed from vector database collection
+
+    Args:
+        query: What to look up in the CV, e.g. "current job title and years of experience"
+            or "technical skills". Leave empty to get the whole CV.
+    """
     try:
-        results = cv_collection.get(include=["documents"])
-        if results["documents"]:
-            return "\n\n".join(results["documents"])
-        return "No CV data found"
-    except Exception as e:
+        # Chroma is blocking (local storage, query embedding), keep it off the event loop
+        chunks = await asyncio.to_thread(read_chunks, ctx.context.candidate_id, query)
+        if not chunks:
+            return "No CV data found"
+        return format_chunks(pack_chunks(chunks, CV_DATA_TOKEN_CAP), len(chunks))
+    # The agent gets the error as the tool result instead of the run failing
+    except Exception as e:  # noqa: BLE001
         return f"Error retrieving CV data: {e}"
@@ -0,0 +1,29 @@
+from agents import function_tool
+from salary_reference import format_match, salary_reference
+from shared.metrics import instrument_tool
+
+
+@function_tool
+@instrument_tool
+def lookup_salary_reference(
+    job_role: str, location: str | None = None, seniority: str | None = None
+) -> str:
+    """Look up salary percentiles for a role in the offline reference dataset
+
+    Args:
+        job_role: Job title without company, e.g. "Backend Engineer"
+        location: City or country of the candidate, e.g. "Jakarta, Indonesia"
+        seniority: One of intern, junior, mid, senior, lead, principal
+    """
+    try:
+        # A dict hit and a memory-mapped row read, fast enough for the event loop
+        match = salary_reference.lookup(job_role, location, seniority)
+        if match is None:
+            return (
+                f"No reference coverage for {job_role} in {location or 'any location'}, "
+                "use search_salary_info"
+            )
+        return format_match(match)
+    # The agent gets the error as the tool result instead of the run failing
+    except Exception as e:  # noqa: BLE001
+        return f"Error looking up salary reference: {e}"
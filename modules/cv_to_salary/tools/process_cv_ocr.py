@@ -1,8 +1,19 @@
+import asyncio
 import os
 import time
+from concurrent.futures import Future
+from pathlib import Path
 
+from candidates import candidate_id_for, merge_profiles, parse_profile
+from chunking import CHUNK_LAYOUT, chunk_sections, join_chunks
 from loguru import logger
-from utils import cv_collection, mistral_client, openai_client
+from manifest import file_sha256, read_manifest, text_sha256, write_manifest
+from pdf_text import extract_pages
+from shared.metrics import instrument_tool, record_completion
+from utils import async_openai_client, cv_collection, cv_writer, mistral_client
+
+# Pages structured by the model at the same time
+CV_EXTRACTION_CONCURRENCY = int(os.getenv("CV_EXTRACTION_CONCURRENCY", "4"))
 
 
 def create_conversion_prompt(markdown_content) -> str:
@@ -24,29 +35,153 @@ def create_conversion_prompt(markdown_content) -> str:
             """
 
 
-def process_cv_ocr(file_path: str, file_name: str = "cv.pdf") -> None:
-    """Main function for the OCR to Structured CV Data script"""
+async def run_ocr(
+    file_path: str, file_name: str, pages: list[int] | None = None
+) -> list[dict]:
+    """Upload the PDF to Mistral and return the OCR pages
+
+    `pages` restricts OCR to those 0-based page indexes.
+    """
     logger.info("Uploading file to storage...")
-    uploaded_pdf = mistral_client.files.upload(
-        file={
-            "file_name": file_name,
-            "content": open(file_path, "rb"),
-        },
+    content = await asyncio.to_thread(Path(file_path).read_bytes)
+    uploaded_pdf = await mistral_client.files.upload_async(
+        file={"file_name": file_name, "content": content},
         purpose="ocr",
     )
 
-    signed_url = mistral_client.files.get_signed_url(file_id=uploaded_pdf.id)
+    signed_url = await mistral_client.files.get_signed_url_async(
+        file_id=uploaded_pdf.id
+    )
 
     logger.info("Processing OCR...")
-    ocr_response = mistral_client.ocr.process(
+    ocr_response = await mistral_client.ocr.process_async(
         model="mistral-ocr-latest",
         document={
             "type": "document_url",
             "document_url": signed_url.url,
         },
+        **({"pages": pages} if pages is not None else {}),
+    )
+    return ocr_response.model_dump().get("pages")
+
+
+async def read_markdown(file_path: str, file_name: str) -> list[str]:
+    """Markdown of every page, from the PDF text layer where it is usable
+
+    Only pages without a usable text layer go through remote OCR, and
+    digital PDFs skip the upload and OCR round trips entirely.
+    """
+    local = await asyncio.to_thread(extract_pages, file_path)
+    missing = [index for index, markdown in enumerate(local) if markdown is None]
+    if local and not missing:
+        logger.info(f"Read {len(local)} pages from the text layer of {file_name}")
+        return local
+
+    if local and len(missing) < len(local):
+        logger.info(f"Pages {[index + 1 for index in missing]} need OCR")
+        for page in await run_ocr(file_path, file_name, pages=missing):
+            local[page["index"]] = page.get("markdown")
+        return local
+
+    return [page.get("markdown") for page in await run_ocr(file_path, file_name)]
+
+
+def stored_pages(candidate_id: str) -> dict[int, str]:
+    """Page text of the candidate in the collection by page number, rebuilt from its chunks"""
+    stored = cv_collection.get(
+        where={"candidate_id": candidate_id}, include=["documents", "metadatas"]
+    )
+    chunks = sorted(
+        (metadata["page_number"], metadata.get("chunk_index", 0), document)
+        for document, metadata in zip(stored["documents"], stored["metadatas"])
+    )
+    pages = {}
+    for page_num, _, document in chunks:
+        pages.setdefault(page_num, []).append(document)
+    return {page_num: join_chunks(documents) for page_num, documents in pages.items()}
+
+
+def delete_pages(candidate_id: str, page_numbers: list[int]) -> None:
+    cv_collection.delete(
+        where={
+            "$and": [
+                {"candidate_id": candidate_id},
+                {"page_number": {"$in": page_numbers}},
+            ]
+        }
+    )
+
+
+def store_page(
+    candidate_id: str, page_num: int, result: str, page_sha256: str
+) -> Future:
+    """Queue the section chunks of one structured page for the batched CV collection writer"""
+    chunks = chunk_sections(result)
+    # Store with enhanced metadata for better retrieval
+    return cv_writer.add(
+        documents=[text for _, text in chunks],
+        metadatas=[
+            {
+                "document_type": "cv_extraction",
+                "candidate_id": candidate_id,
+                "page_number": page_num,
+                "page_sha256": page_sha256,
+                "chunk_index": index,
+                "section": section,
+                "content_category": "structured_cv_data",
+                "extraction_date": time.strftime("%Y-%m-%d"),
+                "suitable_for": "salary_analysis",
+            }
+            for index, (section, _) in enumerate(chunks)
+        ],
+        ids=[
+            f"{candidate_id}_page_{page_num}_chunk_{index}"
+            for index in range(len(chunks))
+        ],
     )
 
-    pages = ocr_response.model_dump().get("pages")
+
+def save_cv_data(path: str, all_cv_data: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("# Structured CV Data for Salary Analysis\n\n")
+        file.write(all_cv_data)
+
+
+@instrument_tool
+async def process_cv_ocr(
+    file_path: str,
+    file_name: str | None = None,
+    concurrency: int = CV_EXTRACTION_CONCURRENCY,
+    candidate_id: str | None = None,
+) -> str:
+    """Main function for the OCR to Structured CV Data script
+
+    Ingests one CV under `candidate_id` (derived from the file content by
+    default) and returns that id. Chunks carry the candidate profile (role,
+    seniority, location, experience) for filtered candidate search.
+
+    Text extraction (OCR only for pages without a usable text layer),
+    per-page structuring and storage run as pipeline stages joined by
+    bounded queues, with up to `concurrency` pages being structured at once.
+    A file that was already ingested is skipped, and only pages whose OCR
+    text changed since the last ingestion are structured and embedded again.
+    Pages are indexed as section chunks; pages stored with an older chunk
+    layout are chunked again without being structured again.
+    """
+    file_name = file_name or os.path.basename(file_path)
+    source_sha256 = await asyncio.to_thread(file_sha256, file_path)
+    candidate_id = candidate_id or candidate_id_for(file_path, source_sha256)
+    # The collection proxy is resolved (chromadb import, client start) off the loop
+    manifest = await asyncio.to_thread(read_manifest, cv_collection, candidate_id)
+    relayout = manifest["layout"] != CHUNK_LAYOUT
+    if manifest["source_sha256"] == source_sha256 and not relayout:
+        logger.info(f"{file_name} is unchanged since the last ingestion, skipping")
+        return candidate_id
+
+    previous_hashes = manifest["page_hashes"]
+    existing = await asyncio.to_thread(stored_pages, candidate_id)
+    page_hashes = {}
 
     SYSTEM_PROMPT = """
         You are an expert CV data extractor specialized in preparing resumes for salary prediction analysis.
@@ -116,50 +251,106 @@ def process_cv_ocr(file_path: str, file_name: str = "cv.pdf") -> None:
         - Normalize all skill names to full, searchable terms
         """
 
-    all_cv_data = ""
-
-    for page_num, page in enumerate(pages, start=1):
-        markdown = page.get("markdown")
-
-        if not markdown or markdown.strip() == "":
-            logger.warning(f"Empty content on page {page_num}, skipping...")
-            continue
-
-        logger.info(f"Processing page {page_num}...")
-
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": create_conversion_prompt(markdown)},
-            ],
-        )
-        result = response.choices[0].message.content
-        all_cv_data += result + "\n\n"
-
-        # Store each page with enhanced metadata
-        # Store with enhanced metadata for better retrieval
-        cv_collection.add(
-            documents=[result],
-            metadatas=[
-                {
-                    "document_type": "cv_extraction",
-                    "page_number": page_num,
-                    "content_category": "structured_cv_data",
-                    "extraction_date": time.strftime("%Y-%m-%d"),
-                    "suitable_for": "salary_analysis",
-                }
-            ],
-            ids=[f"cv_extraction_page_{page_num}"],
-        )
+    pages_queue = asyncio.Queue(maxsize=concurrency * 2)
+    results_queue = asyncio.Queue(maxsize=concurrency * 2)
+    results = {}
+    writes = []
+
+    async def read_pages() -> None:
+        pages = await read_markdown(file_path, file_name)
+        for page_num, markdown in enumerate(pages, start=1):
+            await pages_queue.put((page_num, markdown))
+        for _ in range(concurrency):
+            await pages_queue.put(None)
+
+    async def structure_pages() -> None:
+        while (item := await pages_queue.get()) is not None:
+            page_num, markdown = item
+
+            if not markdown or markdown.strip() == "":
+                logger.warning(f"Empty content on page {page_num}, skipping...")
+                continue
+
+            page_hashes[page_num] = text_sha256(markdown)
+            if (
+                page_num in existing
+                and previous_hashes.get(page_num) == (page_hashes[page_num])
+            ):
+                logger.info(f"Page {page_num} is unchanged, reusing its extraction")
+                await results_queue.put((page_num, existing[page_num], relayout))
+                continue
+
+            logger.info(f"Processing page {page_num}...")
+
+            response = await async_openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": create_conversion_prompt(markdown)},
+                ],
+            )
+            record_completion("cv_extraction", response, cached=False)
+            await results_queue.put(
+                (page_num, response.choices[0].message.content, True)
+            )
+        await results_queue.put(None)
+
+    async def store_pages() -> None:
+        finished_workers = 0
+        while finished_workers < concurrency:
+            item = await results_queue.get()
+            if item is None:
+                finished_workers += 1
+                continue
+            page_num, result, changed = item
+            if changed:
+                # The page may now have fewer chunks than the stored version
+                if page_num in existing:
+                    await asyncio.to_thread(delete_pages, candidate_id, [page_num])
+                writes.append(
+                    store_page(candidate_id, page_num, result, page_hashes[page_num])
+                )
+            results[page_num] = result
+
+    try:
+        async with asyncio.TaskGroup() as pipeline:
+            pipeline.create_task(read_pages())
+            for _ in range(concurrency):
+                pipeline.create_task(structure_pages())
+            pipeline.create_task(store_pages())
+    except ExceptionGroup as group:
+        # Callers handle the error of a single page, as with a sequential loop
+        for error in group.exceptions[1:]:
+            logger.opt(exception=error).error(f"Processing {file_name} also failed")
+        raise group.exceptions[0] from None
+
+    # Pages that disappeared or became empty would otherwise linger
+    if stale := sorted(set(existing) - set(results)):
+        logger.info(f"Deleting stale pages {stale}")
+        await asyncio.to_thread(delete_pages, candidate_id, stale)
+
+    # Pages are embedded and written in bulk, wait until they are queryable.
+    # If any of them failed, no manifest is written and the CV is ingested
+    # again next time
+    await asyncio.to_thread(cv_writer.flush, writes)
+    profile = merge_profiles([parse_profile(results[page]) for page in sorted(results)])
+    await asyncio.to_thread(
+        write_manifest,
+        cv_collection,
+        candidate_id,
+        source_sha256,
+        CHUNK_LAYOUT,
+        profile,
+    )
+
+    # Pages finish out of order, the report follows the document
+    all_cv_data = "".join(f"{results[page_num]}\n\n" for page_num in sorted(results))
 
     timestamp = int(time.time() * 1000)
-    result_file_name = f"cv_data-{timestamp}.md"
+    result_file_name = f"cv_data-{candidate_id}-{timestamp}.md"
     result_file_path = f"results/cv/{result_file_name}"
 
-    os.makedirs("results", exist_ok=True)
-    with open(result_file_path, "w", encoding="utf-8") as file:
-        file.write("# Structured CV Data for Salary Analysis\n\n")
-        file.write(all_cv_data)
+    await asyncio.to_thread(save_cv_data, result_file_path, all_cv_data)
 
-    logger.info("CV processing complete!")
+    logger.info(f"CV processing complete for {candidate_id}!")
+    return candidate_id
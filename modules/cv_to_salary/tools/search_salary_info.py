@@ -1,20 +1,27 @@
-import json
-
 from agents import function_tool
 from loguru import logger
+from salary_stats import format_summary
+from shared.metrics import instrument_tool
 from utils import tavily_client
 
 
 @function_tool
-def search_salary_info(job_role: str) -> str:
-    """Search for salary information for a specific job role"""
+@instrument_tool
+async def search_salary_info(job_role: str) -> str:
+    """Search for salary information for a specific job role
+
+    Returns salary percentiles per location, normalized to yearly USD with
+    the local currency median, and the source URLs they were taken from.
+    """
     try:
         query = f"{job_role} salary range compensation currently"
-        results = tavily_client.search(
+        results = await tavily_client.search(
             query, include_raw_content="markdown", max_results=5
         )
         search_results = results.get("results", [])
         logger.info(f"Found {len(search_results)} salary results for {job_role}")
-        return json.dumps(search_results)
-    except Exception as e:
+        # Full pages are parsed here instead of being handed to the model
+        return format_summary(search_results)
+    # The agent gets the error as the tool result instead of the run failing
+    except Exception as e:  # noqa: BLE001
         return f"Error searching salary data: {e}"
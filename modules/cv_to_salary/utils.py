@@ -1,25 +1,181 @@
 import os
 
-import chromadb
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from dotenv import load_dotenv
-from mistralai import Mistral
-from openai import OpenAI
-from tavily import TavilyClient
+from shared.lazy import Lazy
+from shared.metrics import set_prefix
 
 load_dotenv()
+set_prefix("cv_to_salary")
 
-mistral_client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-chroma_client = chromadb.PersistentClient(path="data")
-ef = OpenAIEmbeddingFunction(
-    api_key=os.getenv("OPENAI_API_KEY"), model_name="text-embedding-3-small"
-)
 
-try:
-    cv_collection = chroma_client.get_collection(name="cv_data", embedding_function=ef)
-except Exception:
-    cv_collection = chroma_client.create_collection(
-        name="cv_data", embedding_function=ef
+def build_mistral_client():
+    """Create the rate limited Mistral client"""
+    import httpx
+    from mistralai import Mistral
+    from mistralai.utils import BackoffStrategy, RetryConfig
+    from shared.rate_limit import (
+        MAX_RETRY_DELAY,
+        AsyncRateLimitedTransport,
+        RateLimitedTransport,
+        mistral_limiter,
     )
+
+    return Mistral(
+        api_key=os.getenv("MISTRAL_API_KEY"),
+        server_url=os.getenv("MISTRAL_SERVER_URL"),
+        # The SDK does not retry unless told to, the transport only paces
+        retry_config=RetryConfig(
+            "backoff",
+            BackoffStrategy(500, int(MAX_RETRY_DELAY * 1000), 2.0, 300_000),
+            retry_connection_errors=True,
+        ),
+        client=httpx.Client(transport=RateLimitedTransport(mistral_limiter)),
+        async_client=httpx.AsyncClient(
+            transport=AsyncRateLimitedTransport(mistral_limiter)
+        ),
+    )
+
+
+def build_async_openai_client():
+    """Create the rate limited async OpenAI client (also used by the Agents SDK)"""
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    from shared.rate_limit import (
+        MAX_RATE_LIMIT_RETRIES,
+        AsyncRateLimitedTransport,
+        openai_limiter,
+    )
+
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=MAX_RATE_LIMIT_RETRIES,
+        http_client=DefaultAsyncHttpxClient(
+            transport=AsyncRateLimitedTransport(openai_limiter)
+        ),
+    )
+
+
+def build_tavily_client():
+    """Create the cached, rate limited async Tavily client"""
+    from shared.cache import CACHE_DIR, DAY, ResponseCache
+    from shared.rate_limit import RateLimitedTavily, tavily_limiter
+    from shared.search_cache import CachedTavily, SearchCache
+    from tavily import AsyncTavilyClient
+
+    return CachedTavily(
+        RateLimitedTavily(
+            AsyncTavilyClient(
+                api_key=os.getenv("TAVILY_API_KEY"),
+                api_base_url=os.getenv("TAVILY_BASE_URL"),
+            ),
+            tavily_limiter,
+        ),
+        SearchCache(
+            ResponseCache(
+                f"{CACHE_DIR}/tavily.sqlite",
+                metrics_path=f"{CACHE_DIR}/tavily_cache.prom",
+            ),
+            ttl=7 * DAY,
+        ),
+    )
+
+
+def build_chroma_client():
+    """Open the persistent Chroma store"""
+    import chromadb
+
+    return chromadb.PersistentClient(path="data")
+
+
+def build_embedding_function():
+    """OpenAI embeddings for the CV collection, sent through the shared rate limiter
+
+    Wrapped in an on-disk cache so text embedded before is never sent again.
+    """
+    from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+    from embedding_cache import CachedEmbeddingFunction
+    from openai import DefaultHttpxClient, OpenAI
+    from shared.rate_limit import (
+        MAX_RATE_LIMIT_RETRIES,
+        RateLimitedTransport,
+        openai_limiter,
+    )
+
+    ef = OpenAIEmbeddingFunction(
+        api_key=os.getenv("OPENAI_API_KEY"), model_name="text-embedding-3-small"
+    )
+    ef.client = OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=MAX_RATE_LIMIT_RETRIES,
+        http_client=DefaultHttpxClient(transport=RateLimitedTransport(openai_limiter)),
+    )
+    return CachedEmbeddingFunction(ef)
+
+
+# Chunks of every ingested candidate. HNSW settings are fixed at creation
+# and sized for 10k-100k chunks, see benchmarks/cv_store.py
+CV_COLLECTION = os.getenv("CV_COLLECTION", "cv_data")
+# Pages stored before chunks were kept per candidate, they have no candidate_id
+LEGACY_PAGE_IDS = [f"cv_extraction_page_{page}" for page in range(1, 101)]
+CV_HNSW_CONFIGURATION = {
+    "space": "cosine",
+    "max_neighbors": 32,
+    "ef_construction": 200,
+    "ef_search": 100,
+    "batch_size": 1000,
+    "sync_threshold": 10000,
+}
+
+
+def build_cv_collection():
+    """Open (or create) the CV chunk collection with OpenAI embeddings
+
+    Pages that an older version stored in cv_data have no candidate_id.
+    They are dropped, and their CV is ingested again on its next run. A
+    collection holding only such pages is recreated with the tuned HNSW
+    settings.
+    """
+    from loguru import logger
+
+    ef = embedding_function.resolve()
+    try:
+        collection = chroma_client.get_collection(
+            name=CV_COLLECTION, embedding_function=ef
+        )
+    except Exception:
+        collection = None
+    if collection is not None:
+        legacy = collection.get(ids=LEGACY_PAGE_IDS, include=[])["ids"]
+        if not legacy:
+            return collection
+        logger.info(f"Dropping {len(legacy)} legacy CV pages from {CV_COLLECTION}")
+        if collection.count() > len(legacy):
+            collection.delete(ids=legacy)
+            return collection
+        chroma_client.delete_collection(CV_COLLECTION)
+    return chroma_client.create_collection(
+        name=CV_COLLECTION,
+        embedding_function=ef,
+        configuration={"hnsw": CV_HNSW_CONFIGURATION},
+    )
+
+
+def build_cv_writer():
+    """Create the batching writer for the CV chunk collection"""
+    from batch_writer import BatchWriter
+
+    return BatchWriter(
+        cv_collection.resolve(),
+        embedding_function.resolve(),
+        max_chroma_batch=chroma_client.get_max_batch_size(),
+    )
+
+
+# Clients are built on first use so a trivial invocation does not pay for
+# chromadb, mistralai or the collection lookup
+mistral_client = Lazy(build_mistral_client)
+async_openai_client = Lazy(build_async_openai_client)
+tavily_client = Lazy(build_tavily_client)
+chroma_client = Lazy(build_chroma_client)
+embedding_function = Lazy(build_embedding_function)
+cv_collection = Lazy(build_cv_collection)
+cv_writer = Lazy(build_cv_writer)
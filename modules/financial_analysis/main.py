@@ -1,11 +1,15 @@
+import argparse
 import json
 
+from shared.compaction import as_dict, compact_messages
+from shared.journal import open_session
+from shared.metrics import instrument_tool, track_run
 from tools.broadcast import broadcast, broadcast_def
 from tools.generate_analysis import generate_analysis, generate_analysis_def
 from tools.research_plan import research_plan, research_plan_def
 from tools.resource_search import resource_search, resource_search_def
 from tools.self_reflection import self_reflection, self_reflection_def
-from utils import openai_client
+from utils import generate_file_name, openai_client, slugify
 
 tools_defs = [
     research_plan_def,
@@ -27,11 +31,28 @@ def execute_func(func_name: str, func_args: dict) -> str:
     func = tools_dict[func_name]
     if not func:
         return f"Function {func_name} not found."
-    return func(**func_args)
-
-
-def main_process(query: str) -> None:
-    """Main process for the Financial Analysis System"""
+    return instrument_tool(func)(**func_args)
+
+
+def main_process(
+    query: str | None, session_id: str | None = None, resume: bool = False
+) -> str:
+    """Main process for the Financial Analysis System
+
+    Every finished turn is journaled under `session_id`. With `resume`, an
+    existing journal of that session is replayed and the session continues
+    after its last finished turn without calling the API for them, `query`
+    may then be None.
+    """
+    journal = open_session(
+        session_id or generate_file_name(slugify(query)[:40]),
+        "financial-analysis",
+        query,
+        resume,
+    )
+    if journal.final is not None:
+        return journal.final["content"]
+    query = journal.header["input"]
 
     SYSTEM_PROMPT = """
         You are an AI Financial Analysis System that generates comprehensive, multi-dimensional market analysis with transparent reasoning chains and actionable insights.
@@ -50,6 +71,7 @@ def main_process(query: str) -> None:
         - **Provide clear progress updates** - Announce each phase as you begin it using the broadcast tool
         - **Focus on transparency** - Show reasoning work, flag uncertainties, and track assumptions
         - **Ensure analytical rigor** - Source all claims, quantify confidence, and present balanced perspectives
+        - **Pass artifacts by handle** - Give tools the `artifact:...` handles other tools returned instead of copying their text
 
         # COMMUNICATION PROTOCOL
         Before each major step, announce your progress using the broadcast tool:
@@ -83,38 +105,56 @@ def main_process(query: str) -> None:
                 - You MUST use the broadcast tool to communicate your progress to the user
                 """,
         },
+        *journal.replay(),
     ]
 
-    while True:
-        res = openai_client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=messages,
-            tools=tools_defs,
-            tool_choice="auto",
-        )
-
-        message = res.choices[0].message
-        messages.append(message)
-
-        if message.tool_calls:
-            for tool_call in message.tool_calls:
-                func_name = tool_call.function.name
-                func_args = json.loads(tool_call.function.arguments)
-
-                func_response = execute_func(func_name, func_args)
-                messages.append(
-                    {
-                        "role": "tool",
-                        "content": func_response,
-                        "tool_call_id": tool_call.id,
-                    }
-                )
-        else:
-            break
+    with track_run("financial-analysis"):
+        while True:
+            res = openai_client.chat.completions.create(
+                cache_tag="orchestrator",
+                model="gpt-4.1-mini",
+                temperature=0,
+                messages=compact_messages(messages),
+                tools=tools_defs,
+                tool_choice="auto",
+            )
+
+            message = res.choices[0].message
+            messages.append(message)
+
+            if message.tool_calls:
+                results = []
+                for tool_call in message.tool_calls:
+                    func_name = tool_call.function.name
+                    func_args = json.loads(tool_call.function.arguments)
+
+                    func_response = execute_func(func_name, func_args)
+                    results.append(
+                        {
+                            "role": "tool",
+                            "content": func_response,
+                            "tool_call_id": tool_call.id,
+                        }
+                    )
+                messages.extend(results)
+                journal.record_turn([as_dict(message), *results])
+            else:
+                journal.finish(message.content)
+                return message.content
 
 
 if __name__ == "__main__":
-    print("---" * 10)
-    input_topic = input("Enter the financial question you want to analyze: ")
-    print("---" * 10)
-    main_process(input_topic)
+    parser = argparse.ArgumentParser(description="Analyze a financial question")
+    parser.add_argument(
+        "--resume",
+        metavar="SESSION_ID",
+        help="Continue an interrupted session from its journal",
+    )
+    args = parser.parse_args()
+
+    input_topic = None
+    if not args.resume:
+        print("---" * 10)
+        input_topic = input("Enter the financial question you want to analyze: ")
+        print("---" * 10)
+    main_process(input_topic, session_id=args.resume, resume=bool(args.resume))
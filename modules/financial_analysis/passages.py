@@ -0,0 +1,108 @@
+import math
+import os
+import re
+from collections import Counter
+
+from shared.compaction import count_text_tokens
+
+# Token budget for the passages sent to the extraction call
+PASSAGE_TOKEN_BUDGET = int(os.getenv("PASSAGE_TOKEN_BUDGET", "3000"))
+PASSAGE_MAX_WORDS = 120
+
+# BM25 parameters, the usual defaults
+K1 = 1.5
+B = 0.75
+
+# Split from a string so the list stays two lines instead of one word per line
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "  # noqa: SIM905
+    "this to was were will with what how why when which who about into than".split()
+)
+TERM = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase words and numbers (keeping `4.5` or `1,200` whole), minus stopwords"""
+    return [term for term in TERM.findall(text.lower()) if term not in STOPWORDS]
+
+
+def split_passages(text: str) -> list[str]:
+    """Split page text into paragraphs, windowing paragraphs that are too long"""
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        for start in range(0, len(words), PASSAGE_MAX_WORDS):
+            passages.append(" ".join(words[start : start + PASSAGE_MAX_WORDS]))
+    return [passage for passage in passages if passage]
+
+
+def bm25_scores(query: list[str], documents: list[list[str]]) -> list[float]:
+    if not documents:
+        return []
+    average_length = sum(map(len, documents)) / len(documents) or 1
+    document_frequency = Counter(term for doc in documents for term in set(doc))
+    scores = []
+    for doc in documents:
+        frequencies = Counter(doc)
+        score = 0.0
+        for term in set(query):
+            if term not in frequencies:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            tf = frequencies[term]
+            score += (
+                idf
+                * tf
+                * (K1 + 1)
+                / (tf + K1 * (1 - B + B * len(doc) / average_length))
+            )
+        scores.append(score)
+    return scores
+
+
+def select_passages(
+    results: list[dict], query: str, budget: int = PASSAGE_TOKEN_BUDGET
+) -> list[dict]:
+    """Keep the passages most relevant to `query` across all results within `budget` tokens
+
+    Passages are ranked with BM25 over every paragraph of every result and
+    packed greedily by score. When no passage matches the query at all,
+    the budget is filled in page order instead. Each result keeps its
+    selected passages in page order; results with none selected are left
+    out.
+    """
+    passages = []
+    for result_index, result in enumerate(results):
+        text = result.get("raw_content") or result.get("content") or ""
+        for position, passage in enumerate(split_passages(text)):
+            passages.append((result_index, position, passage))
+
+    scores = bm25_scores(tokenize(query), [tokenize(p[2]) for p in passages])
+    # The sort is stable, so passages with equal scores stay in page order
+    ranked = sorted(zip(scores, passages), key=lambda item: -item[0])
+    matched = any(score > 0 for score in scores)
+
+    selected, used = [], 0
+    for score, passage in ranked:
+        if score <= 0 and matched:
+            break
+        tokens = count_text_tokens(passage[2])
+        if used + tokens > budget:
+            continue
+        selected.append(passage)
+        used += tokens
+
+    by_result = {}
+    for result_index, position, passage in sorted(selected):
+        by_result.setdefault(result_index, []).append(passage)
+
+    return [
+        {
+            "title": results[index].get("title", ""),
+            "url": results[index].get("url", ""),
+            "content": "\n\n".join(by_result[index]),
+            "score": results[index].get("score", 0),
+        }
+        for index in sorted(by_result)
+    ]
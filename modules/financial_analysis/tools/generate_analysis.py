@@ -1,5 +1,6 @@
 import os
 
+from shared.artifacts import artifacts
 from utils import generate_file_name, openai_client
 
 
@@ -9,7 +10,12 @@ def generate_analysis(
     reasoning_depth: str = "standard",
     allow_checkpoints: bool = True,
 ) -> str | None:
-    """Synthesize research findings into structured financial analysis with transparent reasoning"""
+    """Synthesize research findings into structured financial analysis with transparent reasoning
+
+    The plan and the findings may be artifact handles of the tools that produced them.
+    """
+    research_plan = artifacts.resolve(research_plan)
+    search_results = artifacts.resolve(search_results)
 
     SYSTEM_PROMPT = """
         You are a financial analyst who synthesizes research into clear, actionable insights with transparent reasoning.
@@ -93,6 +99,7 @@ def generate_analysis(
     )
 
     res = openai_client.chat.completions.create(
+        cache_tag="generate_analysis",
         model="gpt-4.1-mini",
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -117,12 +124,14 @@ def generate_analysis(
     result_file_name = generate_file_name("financial")
     if not os.path.exists(result_dir):
         os.makedirs(result_dir)
+    content = res.choices[0].message.content
     with open(f"{result_dir}/{result_file_name}.md", "w") as file:
-        content = res.choices[0].message.content
         if content is not None:
             file.write(content)
 
-    return res.choices[0].message.content
+    if content is None:
+        return None
+    return artifacts.publish(content, "Financial analysis")
 
 
 generate_analysis_def = {
@@ -135,12 +144,14 @@ generate_analysis_def = {
             "properties": {
                 "research_plan": {
                     "type": "string",
-                    "description": "The original research plan with sub-questions",
+                    "description": "Artifact handle of the research plan (e.g. artifact:1a2b3c4d5e6f), "
+                    "or the plan itself",
                 },
                 "search_results": {
                     "type": "array",
                     "items": {"type": "string"},
-                    "description": "List of research findings from searches",
+                    "description": "Artifact handles of the resource_search findings, "
+                    "or the findings themselves",
                 },
                 "reasoning_depth": {
                     "type": "string",
@@ -1,3 +1,4 @@
+from shared.artifacts import artifacts
 from utils import openai_client
 
 
@@ -55,7 +56,9 @@ def research_plan(query: str, user_context: dict = None) -> str | None:
         """
 
     res = openai_client.chat.completions.create(
+        cache_tag="research_plan",
         model="gpt-4.1-mini",
+        temperature=0,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
             {
@@ -64,7 +67,11 @@ def research_plan(query: str, user_context: dict = None) -> str | None:
             },
         ],
     )
-    return res.choices[0].message.content
+    plan = res.choices[0].message.content
+    if plan is None:
+        return None
+    # The orchestrator reads the whole plan but hands it on by handle
+    return artifacts.publish(plan, "Research plan", preview_chars=None)
 
 
 research_plan_def = {
@@ -1,6 +1,9 @@
 import json
 
 from loguru import logger
+from passages import PASSAGE_TOKEN_BUDGET, select_passages
+from shared.artifacts import artifacts
+from shared.extraction import EXTRACTION_SHARD_TOKENS, extract
 from utils import openai_client, tavily_client
 
 
@@ -28,25 +31,14 @@ def resource_search(query: str, context: str = None) -> str | None:
         f"Successfully retrieved {len(search_results)} financial search results"
     )
 
-    # Pre-process search results to reduce token count
-    processed_results = []
-    for idx, result in enumerate(search_results[:8], 1):  # Limit to top 8 results
-        # Truncate raw_content to first 1500 characters if it exists
-        raw_content = result.get("raw_content") or result.get("content") or ""
-        truncated_content = (
-            raw_content[:1500] + "..." if len(raw_content) > 1500 else raw_content
-        )
-
-        processed_results.append(
-            {
-                "title": result.get("title", ""),
-                "url": result.get("url", ""),
-                "content": truncated_content,
-                "score": result.get("score", 0),
-            }
-        )
-
-    logger.info("Processed and truncated search results for analysis")
+    # Keep the passages that answer the query rather than the top of each page
+    processed_results = select_passages(
+        search_results, f"{query} {context}" if context else query
+    )
+
+    logger.info(
+        f"Selected passages from {len(processed_results)} search results for analysis"
+    )
 
     SYSTEM_PROMPT = """
         You are a financial intelligence analyst extracting key insights from web sources.
@@ -92,26 +84,32 @@ def resource_search(query: str, context: str = None) -> str | None:
 
     context_str = f"\n\nContext: {context}" if context else ""
 
-    res = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {
-                "role": "user",
-                "content": f"""
+    def render(results: list[dict]) -> str:
+        return f"""
                     Query: {query}{context_str}
 
                     Search Results:
-                    {json.dumps(processed_results, indent=2)}
-                    """,
-            },
-        ],
-        temperature=0.3,
+                    {json.dumps(results, indent=2)}
+                    """
+
+    result = extract(
+        openai_client,
+        SYSTEM_PROMPT,
+        processed_results,
+        render,
+        cache_tag="resource_search",
+        model="gpt-4o-mini",
+        # The passages are capped at PASSAGE_TOKEN_BUDGET, so a full
+        # selection with its titles and URLs is extracted as two shards
+        shard_tokens=min(EXTRACTION_SHARD_TOKENS, PASSAGE_TOKEN_BUDGET * 2 // 3),
+        temperature=0,
         max_tokens=2000,
     )
 
     logger.info("Successfully generated financial search results")
-    return res.choices[0].message.content
+    if result is None:
+        return None
+    return artifacts.publish(result, "Search findings")
 
 
 resource_search_def = {
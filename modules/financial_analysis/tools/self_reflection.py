@@ -1,8 +1,10 @@
+from shared.artifacts import artifacts
 from utils import openai_client
 
 
 def self_reflection(analysis: str, quality_threshold: float = 8.0) -> str | None:
     """Validate analysis quality and identify gaps before delivery"""
+    analysis = artifacts.resolve(analysis)
 
     SYSTEM_PROMPT = """
         You are a quality assurance analyst who validates financial research for completeness and logical consistency.
@@ -75,7 +77,9 @@ def self_reflection(analysis: str, quality_threshold: float = 8.0) -> str | None
         """
 
     res = openai_client.chat.completions.create(
+        cache_tag="self_reflection",
         model="gpt-4.1-mini",
+        temperature=0,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
             {
@@ -102,7 +106,8 @@ self_reflection_def = {
             "properties": {
                 "analysis": {
                     "type": "string",
-                    "description": "The generated financial analysis to validate",
+                    "description": "Artifact handle of the generated analysis "
+                    "(e.g. artifact:1a2b3c4d5e6f), or the analysis itself",
                 },
                 "quality_threshold": {
                     "type": "number",
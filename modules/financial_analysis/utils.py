@@ -3,15 +3,86 @@ import re
 import time
 
 from dotenv import load_dotenv
-from openai import OpenAI
-from tavily import TavilyClient
+from shared.lazy import Lazy
+from shared.metrics import set_prefix
 
 load_dotenv()
+set_prefix("financial_analysis")
 
-openai_client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL")
-)
-tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+
+def build_openai_client():
+    """Create the cached, rate limited OpenAI client"""
+    from openai import DefaultHttpxClient, OpenAI
+    from shared.cache import CACHE_DIR, DAY, HOUR, CachedOpenAI, ResponseCache
+    from shared.rate_limit import (
+        MAX_RATE_LIMIT_RETRIES,
+        RateLimitedTransport,
+        openai_limiter,
+    )
+
+    # Sampled calls (temperature above 0, the API default is 1) skip the cache
+    # unless OPENAI_CACHE_MAX_TEMPERATURE allows them, "inf" caches every call
+    # Planning, extraction, review and orchestrator calls run at temperature 0
+    max_cached_temperature = float(os.getenv("OPENAI_CACHE_MAX_TEMPERATURE", "0"))
+
+    return CachedOpenAI(
+        OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL"),
+            max_retries=MAX_RATE_LIMIT_RETRIES,
+            http_client=DefaultHttpxClient(
+                transport=RateLimitedTransport(openai_limiter)
+            ),
+        ),
+        ResponseCache(
+            f"{CACHE_DIR}/openai.sqlite",
+            max_bytes=int(os.getenv("OPENAI_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            metrics_path=f"{CACHE_DIR}/openai_cache.prom",
+        ),
+        ttls={
+            "research_plan": DAY,
+            "resource_search": 6 * HOUR,
+            "resource_search_reduce": 6 * HOUR,
+            "generate_analysis": DAY,
+            "self_reflection": DAY,
+            "orchestrator": 6 * HOUR,
+        },
+        default_ttl=DAY,
+        max_temperature=max_cached_temperature,
+    )
+
+
+def build_tavily_client():
+    """Create the cached, rate limited Tavily client"""
+    from shared.cache import CACHE_DIR, DAY, HOUR, ResponseCache
+    from shared.rate_limit import RateLimitedTavily, tavily_limiter
+    from shared.search_cache import CachedTavily, SearchCache
+    from tavily import TavilyClient
+
+    # Market data goes stale quickly, `days`-filtered searches even more so
+    return CachedTavily(
+        RateLimitedTavily(
+            TavilyClient(
+                api_key=os.getenv("TAVILY_API_KEY"),
+                api_base_url=os.getenv("TAVILY_BASE_URL"),
+            ),
+            tavily_limiter,
+        ),
+        SearchCache(
+            ResponseCache(
+                f"{CACHE_DIR}/tavily.sqlite",
+                metrics_path=f"{CACHE_DIR}/tavily_cache.prom",
+            ),
+            ttl=DAY,
+            recent_ttl=HOUR,
+            stale_ttl=6 * HOUR,
+        ),
+    )
+
+
+# Clients are built on first use so importing the tools stays cheap
+openai_client = Lazy(build_openai_client)
+tavily_client = Lazy(build_tavily_client)
 
 
 def slugify(text: str) -> str:
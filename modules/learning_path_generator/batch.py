@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections.abc import Iterator
+from typing import TextIO
+
+from loguru import logger
+from main import MAX_CONCURRENT_TOOLS, main_process
+from utils import generate_file_name, new_session, slugify
+
+MAX_CONCURRENT_SESSIONS = int(os.getenv("MAX_CONCURRENT_SESSIONS", "8"))
+
+
+def read_topics(stream: TextIO) -> Iterator[str]:
+    """Yield one topic per non-empty line, skipping `#` comments"""
+    for line in stream:
+        topic = line.strip()
+        if topic and not topic.startswith("#"):
+            yield topic
+
+
+def read_manifest(manifest_path: str) -> dict[str, dict]:
+    """Entries of the sessions a previous run of the batch finished, by session id"""
+    with open(manifest_path) as manifest:
+        entries = [json.loads(line) for line in manifest if line.strip()]
+    return {entry["session_id"]: entry for entry in entries if entry["status"] == "ok"}
+
+
+async def run_topic(
+    topic: str, session_id: str, max_concurrency: int, resume: bool = False
+) -> dict:
+    """Run one learning path session and return its manifest entry"""
+    session = new_session()
+    start = time.perf_counter()
+    try:
+        await main_process(topic, max_concurrency, session_id, resume)
+        status, error = "ok", None
+    # One failed topic is recorded in the manifest, the batch goes on
+    except Exception as e:  # noqa: BLE001
+        logger.exception(f"Learning path for '{topic}' failed")
+        status, error = "error", f"{type(e).__name__}: {e}"
+
+    return {
+        "topic": topic,
+        "session_id": session_id,
+        "status": status,
+        "error": error,
+        "wall_time": round(time.perf_counter() - start, 3),
+        "prompt_tokens": session["prompt_tokens"],
+        "completion_tokens": session["completion_tokens"],
+        "total_tokens": session["prompt_tokens"] + session["completion_tokens"],
+        "cached_responses": session["cached_responses"],
+        "outputs": session["outputs"],
+    }
+
+
+async def run_batch(
+    topics: Iterator[str],
+    manifest_path: str,
+    max_sessions: int = MAX_CONCURRENT_SESSIONS,
+    max_concurrency: int = MAX_CONCURRENT_TOOLS,
+    resume: bool = False,
+) -> list[dict]:
+    """Generate learning paths for many topics with at most `max_sessions` at once
+
+    Each entry is appended to the JSONL manifest as soon as its topic
+    finishes, so a partial manifest survives an interrupted batch. Session
+    ids derive from the manifest name and topic position, so with `resume`
+    a rerun skips the topics that succeeded and continues the others from
+    their journals. Without it the manifest must not exist yet.
+    """
+    if not resume and os.path.exists(manifest_path):
+        raise FileExistsError(
+            f"{manifest_path} belongs to an earlier batch, resume it or pick a new manifest"
+        )
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    batch_id = os.path.splitext(os.path.basename(manifest_path))[0]
+    finished = read_manifest(manifest_path) if resume else {}
+    entries = list(finished.values())
+    numbered = enumerate(topics, start=1)
+
+    # One line is appended per finished topic, cheap enough for the loop
+    with open(manifest_path, "a" if resume else "w") as manifest:  # noqa: ASYNC230
+
+        async def worker() -> None:
+            # Workers pull from the shared iterator, so stdin is read lazily
+            for index, topic in numbered:
+                session_id = f"{batch_id}-{index:04d}-{slugify(topic)[:40]}"
+                if session_id in finished:
+                    continue
+                entry = await run_topic(topic, session_id, max_concurrency, resume)
+                entries.append(entry)
+                manifest.write(json.dumps(entry) + "\n")
+                manifest.flush()
+                logger.info(
+                    f"[{entry['status']}] {topic} in {entry['wall_time']}s "
+                    f"({entry['total_tokens']} tokens)"
+                )
+
+        await asyncio.gather(*(worker() for _ in range(max_sessions)))
+
+    return entries
+
+
+def summarize(entries: list[dict], wall_time: float) -> dict:
+    return {
+        "topics": len(entries),
+        "succeeded": sum(entry["status"] == "ok" for entry in entries),
+        "failed": sum(entry["status"] != "ok" for entry in entries),
+        "prompt_tokens": sum(entry["prompt_tokens"] for entry in entries),
+        "completion_tokens": sum(entry["completion_tokens"] for entry in entries),
+        "total_tokens": sum(entry["total_tokens"] for entry in entries),
+        "wall_time": round(wall_time, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate learning paths for many topics concurrently"
+    )
+    parser.add_argument(
+        "topics",
+        nargs="?",
+        default="-",
+        help="File with one topic per line, or - to read from stdin",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=f"results/batches/{generate_file_name('manifest')}.jsonl",
+        help="Where to write the per-topic JSONL manifest",
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=MAX_CONCURRENT_SESSIONS,
+        help="Maximum number of topics processed at the same time",
+    )
+    parser.add_argument(
+        "--tools",
+        type=int,
+        default=MAX_CONCURRENT_TOOLS,
+        help="Maximum number of concurrent tool calls per session",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the interrupted batch that wrote --manifest",
+    )
+    args = parser.parse_args()
+    if not args.resume and os.path.exists(args.manifest):
+        parser.error(
+            f"{args.manifest} belongs to an earlier batch, "
+            "pass --resume to continue it or choose another --manifest"
+        )
+    if args.resume and not os.path.exists(args.manifest):
+        parser.error(
+            f"--resume needs the manifest of an earlier run, {args.manifest} does not exist"
+        )
+
+    # Closed by the with block below, like stdin
+    stream = sys.stdin if args.topics == "-" else open(args.topics)  # noqa: SIM115
+    with stream:
+        start = time.perf_counter()
+        entries = asyncio.run(
+            run_batch(
+                read_topics(stream),
+                args.manifest,
+                args.sessions,
+                args.tools,
+                args.resume,
+            )
+        )
+
+    summary = summarize(entries, time.perf_counter() - start)
+    summary_path = f"{os.path.splitext(args.manifest)[0]}.summary.json"
+    with open(summary_path, "w") as file:
+        json.dump(summary, file, indent=2)
+
+    logger.info(
+        f"Batch finished in {summary['wall_time']}s: "
+        f"{summary['succeeded']}/{summary['topics']} succeeded, "
+        f"{summary['total_tokens']} tokens"
+    )
+    logger.info(f"Manifest saved to {args.manifest} and {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
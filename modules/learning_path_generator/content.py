@@ -0,0 +1,153 @@
+import json
+import re
+from urllib.parse import urljoin
+
+from loguru import logger
+from shared.metrics import observe
+
+# Short blocks containing any of these are site chrome rather than content
+BOILERPLATE = re.compile(
+    r"cookie|accept all|privacy policy|terms of (use|service)|all rights reserved|"
+    r"©|subscribe|newsletter|sign (in|up)|log ?in|create an account|skip to|"
+    r"share (on|this)|follow us|back to top|related (posts|articles)|advertisement",
+    re.IGNORECASE,
+)
+BOILERPLATE_MAX_WORDS = 30
+
+IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+LINK = re.compile(r"\[([^\]]*)\]\(([^)]*)\)")
+WORD = re.compile(r"\w+")
+
+# Share of a block's text that sits inside links above which it is a link farm
+LINK_FARM_RATIO = 0.6
+SHINGLE_SIZE = 5
+DUPLICATE_OVERLAP = 0.8
+
+# Only these fields are used by the extraction prompt
+KEPT_FIELDS = ("title", "url")
+
+
+def is_link_farm(block: str) -> bool:
+    """Navigation menus, tag clouds and footers are mostly link text"""
+    links = LINK.findall(block)
+    if len(links) < 3:
+        return False
+    link_chars = sum(len(text) for text, _ in links)
+    text_chars = len(LINK.sub(r"\1", block))
+    return link_chars / max(text_chars, 1) > LINK_FARM_RATIO
+
+
+def is_boilerplate(block: str) -> bool:
+    return len(block.split()) <= BOILERPLATE_MAX_WORDS and bool(
+        BOILERPLATE.search(block)
+    )
+
+
+def render_link(match: re.Match, base_url: str) -> str:
+    """`[text](target)` as `text (url)`, since the learning path cites these links"""
+    text, target = match.group(1).strip(), match.group(2).strip()
+    # Drop an optional `"title"` after the target
+    target = target.split()[0] if target else ""
+    if not target or target.startswith(("#", "javascript:", "mailto:")):
+        return text
+    url = urljoin(base_url, target)
+    return f"{text} ({url})" if text and text != url else url
+
+
+def clean_block(block: str, base_url: str = "") -> str:
+    block = IMAGE.sub("", block)
+    block = LINK.sub(lambda match: render_link(match, base_url), block)
+    return re.sub(r"[ \t]+", " ", block).strip()
+
+
+def shingles(words: list[str]) -> set:
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+class DuplicateIndex:
+    """Find blocks whose word shingles mostly overlap a block seen before"""
+
+    def __init__(self) -> None:
+        self.blocks = []
+        self.index = {}
+
+    def add(self, block: str) -> bool:
+        """Remember `block`, returning False if it is a near duplicate"""
+        block_shingles = shingles(WORD.findall(block.lower()))
+        overlaps = {}
+        for shingle in block_shingles:
+            for block_id in self.index.get(shingle, ()):
+                overlaps[block_id] = overlaps.get(block_id, 0) + 1
+        # Measured against the new block only: a long block that quotes a
+        # short earlier one still adds text of its own
+        if any(
+            overlap / len(block_shingles) >= DUPLICATE_OVERLAP
+            for overlap in overlaps.values()
+        ):
+            return False
+
+        block_id = len(self.blocks)
+        self.blocks.append(block_shingles)
+        for shingle in block_shingles:
+            self.index.setdefault(shingle, []).append(block_id)
+        return True
+
+
+def clean_content(text: str, seen: DuplicateIndex, base_url: str = "") -> str:
+    """Drop boilerplate, link farms and blocks already seen in earlier results
+
+    Links in the blocks that are kept keep their targets, resolved against
+    the page URL.
+    """
+    kept = []
+    for block in re.split(r"\n\s*\n", text):
+        if is_link_farm(block):
+            continue
+        # Judge a block by the text a reader sees, not by its link targets
+        visible = LINK.sub(r"\1", IMAGE.sub("", block))
+        if not WORD.search(visible) or is_boilerplate(visible):
+            continue
+        block = clean_block(block, base_url)
+        if seen.add(block):
+            kept.append(block)
+    return "\n\n".join(kept)
+
+
+def clean_search_results(results: list[dict]) -> list[dict]:
+    """Reduce Tavily results to the title, URL and cleaned page text
+
+    Near-duplicate paragraphs are collapsed across all results, keeping the
+    first occurrence, so results are expected in relevance order.
+    """
+    seen = DuplicateIndex()
+    cleaned = []
+    for result in results:
+        text = clean_content(
+            result.get("raw_content") or result.get("content") or "",
+            seen,
+            result.get("url", ""),
+        )
+        if not text:
+            continue
+        cleaned.append(
+            {
+                **{field: result[field] for field in KEPT_FIELDS if field in result},
+                "content": text,
+            }
+        )
+
+    raw_bytes = len(json.dumps(results))
+    cleaned_bytes = len(json.dumps(cleaned))
+    observe("search_payload_bytes", {"stage": "raw"}, raw_bytes)
+    observe("search_payload_bytes", {"stage": "cleaned"}, cleaned_bytes)
+    logger.info(
+        f"Cleaned {len(results)} search results: {raw_bytes:,} -> "
+        f"{cleaned_bytes:,} bytes "
+        f"({1 - cleaned_bytes / max(raw_bytes, 1):.0%} smaller)"
+    )
+    return cleaned
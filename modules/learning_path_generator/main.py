@@ -1,11 +1,25 @@
+import argparse
+import asyncio
 import json
+import os
+import time
 
+from loguru import logger
+from shared.compaction import as_dict, compact_messages
+from shared.journal import open_session
+from shared.metrics import instrument_tool, observe, track_run
 from tools.broadcast import broadcast, broadcast_def
 from tools.generate_learning import generate_learning, generate_learning_def
 from tools.research_plan import research_plan, research_plan_def
 from tools.resource_search import resource_search, resource_search_def
 from tools.self_reflection import self_reflection, self_reflection_def
-from utils import openai_client
+from utils import (
+    current_session,
+    generate_file_name,
+    openai_client,
+    record_output,
+    slugify,
+)
 
 tools_defs = [
     research_plan_def,
@@ -22,18 +36,75 @@ tools_dict = {
     "self_reflection": self_reflection,
 }
 
+MAX_CONCURRENT_TOOLS = int(os.getenv("MAX_CONCURRENT_TOOLS", "4"))
 
-def execute_func(func_name: str, func_args: dict) -> str:
-    func = tools_dict[func_name]
+
+async def execute_func(func_name: str, func_args: dict) -> str:
+    func = tools_dict.get(func_name)
     if not func:
+        return f"Function {func_name} not found."
+    return await instrument_tool(func)(**func_args)
+
+
+async def execute_tool_calls(
+    tool_calls: list, max_concurrency: int = MAX_CONCURRENT_TOOLS
+) -> list[dict]:
+    """Run the tool calls of one assistant turn concurrently, keeping their order"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_tool_call(tool_call) -> dict:
+        func_name = tool_call.function.name
+
+        queued_at = time.perf_counter()
+        async with semaphore:
+            observe(
+                "tool_queue_wait_seconds",
+                {"tool": func_name},
+                time.perf_counter() - queued_at,
+            )
+            try:
+                func_args = json.loads(tool_call.function.arguments)
+                func_response = await execute_func(func_name, func_args)
+            # A failed call becomes its own tool message, the sibling calls go on
+            except Exception as e:  # noqa: BLE001
+                logger.exception(f"Tool call {func_name} failed")
+                func_response = f"Error: {type(e).__name__}: {e}"
         return {
-            "error": f"Function {func_name} not found.",
+            "role": "tool",
+            "content": func_response,
+            "tool_call_id": tool_call.id,
         }
-    return func(**func_args)
 
-
-def main_process(topic: str) -> None:
-    """Main process for the Learning Path Generator"""
+    return await asyncio.gather(*(run_tool_call(tc) for tc in tool_calls))
+
+
+async def main_process(
+    topic: str | None,
+    max_concurrency: int = MAX_CONCURRENT_TOOLS,
+    session_id: str | None = None,
+    resume: bool = False,
+) -> str | None:
+    """Main process for the Learning Path Generator
+
+    Every finished turn is journaled under `session_id`. With `resume`, an
+    existing journal of that session is replayed and the session continues
+    after its last finished turn without calling the API for them, `topic`
+    may then be None.
+    """
+    journal = open_session(
+        session_id or generate_file_name(slugify(topic)[:40]),
+        "learning-path",
+        topic,
+        resume,
+    )
+    session = current_session.get()
+    # Files written by replayed turns still belong to this session
+    for turn in journal.turns:
+        for path in turn.get("outputs", []):
+            record_output(path)
+    if journal.final is not None:
+        return journal.final["content"]
+    topic = journal.header["input"]
 
     SYSTEM_PROMPT = """
         You are an AI Learning Path Generator that creates comprehensive, structured learning curricula for any topic or skill.
@@ -52,6 +123,7 @@ def main_process(topic: str) -> None:
         - **Provide clear progress updates** - Announce each phase as you begin it
         - **Focus on learner success** - Design paths that real people can follow and complete
         - **Ensure educational quality** - Prioritize credible, current, and practical resources
+        - **Pass artifacts by handle** - Give tools the `artifact:...` handles other tools returned instead of copying their text
 
         # COMMUNICATION PROTOCOL
         Before each major step, announce your progress:
@@ -84,38 +156,50 @@ def main_process(topic: str) -> None:
                 - You MUST use the broadcast tool to communicate your progress to the user
                 """,
         },
+        *journal.replay(),
     ]
 
-    while True:
-        res = openai_client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=messages,
-            tools=tools_defs,
-            tool_choice="auto",
-        )
-
-        message = res.choices[0].message
-        messages.append(message)
-
-        if message.tool_calls:
-            for tool_call in message.tool_calls:
-                func_name = tool_call.function.name
-                func_args = json.loads(tool_call.function.arguments)
-
-                func_response = execute_func(func_name, func_args)
-                messages.append(
-                    {
-                        "role": "tool",
-                        "content": func_response,
-                        "tool_call_id": tool_call.id,
-                    }
+    with track_run("learning-path"):
+        while True:
+            res = await openai_client.chat.completions.create(
+                cache_tag="orchestrator",
+                model="gpt-4.1-mini",
+                temperature=0,
+                messages=compact_messages(messages),
+                tools=tools_defs,
+                tool_choice="auto",
+            )
+
+            message = res.choices[0].message
+            messages.append(message)
+
+            if message.tool_calls:
+                known_outputs = len(session["outputs"]) if session else 0
+                results = await execute_tool_calls(message.tool_calls, max_concurrency)
+                messages.extend(results)
+                journal.record_turn(
+                    [as_dict(message), *results],
+                    outputs=session["outputs"][known_outputs:] if session else [],
                 )
-        else:
-            break
+            else:
+                journal.finish(message.content)
+                return message.content
 
 
 if __name__ == "__main__":
-    print("---" * 10)
-    input_topic = input("Enter the topic you want to learn about: ")
-    print("---" * 10)
-    main_process(input_topic)
+    parser = argparse.ArgumentParser(description="Generate a learning path")
+    parser.add_argument(
+        "--resume",
+        metavar="SESSION_ID",
+        help="Continue an interrupted session from its journal",
+    )
+    args = parser.parse_args()
+
+    input_topic = None
+    if not args.resume:
+        print("---" * 10)
+        input_topic = input("Enter the topic you want to learn about: ")
+        print("---" * 10)
+    asyncio.run(
+        main_process(input_topic, session_id=args.resume, resume=bool(args.resume))
+    )
@@ -1,10 +1,22 @@
+import asyncio
 import os
 
-from utils import generate_file_name, openai_client, slugify
+from shared.artifacts import artifacts
+from utils import generate_file_name, openai_client, record_output, slugify
 
 
-def generate_learning(topic: str, content: str) -> str:
-    """Generate learning content for a given topic"""
+def save_learning_path(path: str, learning_path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(learning_path)
+
+
+async def generate_learning(topic: str, content: str) -> str:
+    """Generate learning content for a given topic
+
+    `content` may hold artifact handles of resource_search outputs.
+    """
+    content = artifacts.resolve(content)
 
     SYSTEM_PROMPT = """
         You are a curriculum designer who creates structured, progressive learning paths from extracted resource information.
@@ -79,7 +91,8 @@ def generate_learning(topic: str, content: str) -> str:
         - Create clear success criteria for each phase
         """
 
-    res = openai_client.chat.completions.create(
+    res = await openai_client.chat.completions.create(
+        cache_tag="generate_learning",
         model="gpt-4.1-mini",
         messages=[
             {
@@ -95,12 +108,16 @@ def generate_learning(topic: str, content: str) -> str:
 
     result_dir = "results"
     result_file_name = generate_file_name(slugify(topic))
-    if not os.path.exists(result_dir):
-        os.makedirs(result_dir)
-    with open(f"{result_dir}/{result_file_name}.md", "w") as file:
-        file.write(res.choices[0].message.content)
+    learning_path = res.choices[0].message.content
+    await asyncio.to_thread(
+        save_learning_path, f"{result_dir}/{result_file_name}.md", learning_path
+    )
+    record_output(f"{result_dir}/{result_file_name}.md")
 
-    return f"Learning path generated and saved to {result_dir}/{result_file_name}.md"
+    return (
+        f"Learning path generated and saved to {result_dir}/{result_file_name}.md\n\n"
+        + artifacts.publish(learning_path, "Learning path")
+    )
 
 
 generate_learning_def = {
@@ -117,7 +134,8 @@ generate_learning_def = {
                 },
                 "content": {
                     "type": "string",
-                    "description": "The extracted resources for the topic",
+                    "description": "Artifact handles of the extracted resources "
+                    "(e.g. artifact:1a2b3c4d5e6f artifact:...), or the resources themselves",
                 },
             },
             "required": ["topic", "content"],
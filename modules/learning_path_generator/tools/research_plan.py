@@ -1,7 +1,7 @@
 from utils import openai_client
 
 
-def research_plan(topic: str) -> str:
+async def research_plan(topic: str) -> str:
     """Generate an analysis and research plan for a given topic"""
 
     SYSTEM_PROMPT = """
@@ -73,8 +73,10 @@ def research_plan(topic: str) -> str:
         - Focus on **actionable knowledge** that leads to real competency
         """
 
-    res = openai_client.chat.completions.create(
+    res = await openai_client.chat.completions.create(
+        cache_tag="research_plan",
         model="gpt-4.1-mini",
+        temperature=0,
         messages=[
             {
                 "role": "system",
@@ -1,12 +1,15 @@
 import json
 
+from content import clean_search_results
+from shared.artifacts import artifacts
+from shared.extraction import async_extract
 from utils import openai_client, tavily_client
 
 
-def resource_search(query: str) -> str:
+async def resource_search(query: str) -> str:
     """Internet search for resources related to a given topic"""
-    res = tavily_client.search(query, include_raw_content="markdown")
-    search_results = res.get("results", [])
+    res = await tavily_client.search(query, include_raw_content="markdown")
+    search_results = clean_search_results(res.get("results", []))
 
     SYSTEM_PROMPT = """
         You are an information extraction specialist who identifies and extracts key facts from web search results and documents.
@@ -63,20 +66,16 @@ def resource_search(query: str) -> str:
         - **Organization**: Group similar information together
         """
 
-    res = openai_client.chat.completions.create(
+    extracted = await async_extract(
+        openai_client,
+        SYSTEM_PROMPT,
+        search_results,
+        render=json.dumps,
+        cache_tag="resource_search",
         model="gpt-4.1-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": SYSTEM_PROMPT,
-            },
-            {
-                "role": "user",
-                "content": json.dumps(search_results),
-            },
-        ],
+        temperature=0,
     )
-    return res.choices[0].message.content
+    return artifacts.publish(extracted, "Extracted resources")
 
 
 resource_search_def = {
@@ -1,8 +1,10 @@
+from shared.artifacts import artifacts
 from utils import openai_client
 
 
-def self_reflection(topic: str, results: str) -> str:
+async def self_reflection(topic: str, results: str) -> str:
     """Reflect on the learning path generated for a given topic"""
+    results = artifacts.resolve(results)
 
     SYSTEM_PROMPT = """
         You are a learning path quality assurance specialist who evaluates and optimizes educational curricula for maximum learning effectiveness.
@@ -69,8 +71,10 @@ def self_reflection(topic: str, results: str) -> str:
         - **Success-Oriented**: Design for learner success, not failure
         """
 
-    res = openai_client.chat.completions.create(
+    res = await openai_client.chat.completions.create(
+        cache_tag="self_reflection",
         model="gpt-4.1-mini",
+        temperature=0,
         messages=[
             {
                 "role": "system",
@@ -99,7 +103,8 @@ self_reflection_def = {
                 },
                 "results": {
                     "type": "string",
-                    "description": "The results of the learning path generation",
+                    "description": "Artifact handle of the generated learning path "
+                    "(e.g. artifact:1a2b3c4d5e6f), or the learning path itself",
                 },
             },
             "required": ["topic", "results"],
@@ -1,15 +1,121 @@
 import os
 import re
 import time
+from contextvars import ContextVar
 
 from dotenv import load_dotenv
-from langfuse.openai import openai
-from tavily import TavilyClient
+from shared.lazy import Lazy
+from shared.metrics import set_prefix
 
 load_dotenv()
+set_prefix("learning_path_generator")
 
-openai_client = openai
-tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+# Per-session accounting, set by callers that want token usage and output paths
+current_session: ContextVar[dict | None] = ContextVar("current_session", default=None)
+
+
+def new_session() -> dict:
+    """Start accounting for the current task and return the session record"""
+    session = {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_responses": 0,
+        "outputs": [],
+    }
+    current_session.set(session)
+    return session
+
+
+def record_usage(tag: str, response, cached: bool) -> None:
+    """Add the token usage of a chat completion to the current session"""
+    session = current_session.get()
+    if session is None:
+        return
+    if cached:
+        session["cached_responses"] += 1
+    elif response.usage is not None:
+        session["prompt_tokens"] += response.usage.prompt_tokens
+        session["completion_tokens"] += response.usage.completion_tokens
+
+
+def record_output(path: str) -> None:
+    """Remember a file written during the current session"""
+    session = current_session.get()
+    if session is not None:
+        session["outputs"].append(path)
+
+
+def build_openai_client():
+    """Create the cached, rate limited async OpenAI client (with langfuse tracing)"""
+    from langfuse.openai import AsyncOpenAI
+    from openai import DefaultAsyncHttpxClient
+    from shared.cache import CACHE_DIR, DAY, CachedOpenAI, ResponseCache
+    from shared.rate_limit import (
+        MAX_RATE_LIMIT_RETRIES,
+        AsyncRateLimitedTransport,
+        openai_limiter,
+    )
+
+    # Sampled calls (temperature above 0, the API default is 1) skip the cache
+    # unless OPENAI_CACHE_MAX_TEMPERATURE allows them, "inf" caches every call
+    # Planning, extraction, review and orchestrator calls run at temperature 0
+    max_cached_temperature = float(os.getenv("OPENAI_CACHE_MAX_TEMPERATURE", "0"))
+
+    return CachedOpenAI(
+        AsyncOpenAI(
+            max_retries=MAX_RATE_LIMIT_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                transport=AsyncRateLimitedTransport(openai_limiter)
+            ),
+        ),
+        ResponseCache(
+            f"{CACHE_DIR}/openai.sqlite",
+            max_bytes=int(os.getenv("OPENAI_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            metrics_path=f"{CACHE_DIR}/openai_cache.prom",
+        ),
+        ttls={
+            "research_plan": 7 * DAY,
+            "resource_search": DAY,
+            "resource_search_reduce": DAY,
+            "generate_learning": 7 * DAY,
+            "self_reflection": 7 * DAY,
+            "orchestrator": DAY,
+        },
+        default_ttl=DAY,
+        max_temperature=max_cached_temperature,
+        on_response=record_usage,
+    )
+
+
+def build_tavily_client():
+    """Create the cached, rate limited async Tavily client"""
+    from shared.cache import CACHE_DIR, DAY, ResponseCache
+    from shared.rate_limit import RateLimitedTavily, tavily_limiter
+    from shared.search_cache import CachedTavily, SearchCache
+    from tavily import AsyncTavilyClient
+
+    # Learning resources are evergreen, so search results stay fresh for a long time
+    return CachedTavily(
+        RateLimitedTavily(
+            AsyncTavilyClient(
+                api_key=os.getenv("TAVILY_API_KEY"),
+                api_base_url=os.getenv("TAVILY_BASE_URL"),
+            ),
+            tavily_limiter,
+        ),
+        SearchCache(
+            ResponseCache(
+                f"{CACHE_DIR}/tavily.sqlite",
+                metrics_path=f"{CACHE_DIR}/tavily_cache.prom",
+            ),
+            ttl=30 * DAY,
+        ),
+    )
+
+
+# Clients are built on first use so importing the tools stays cheap
+openai_client = Lazy(build_openai_client)
+tavily_client = Lazy(build_tavily_client)
 
 
 def slugify(text: str) -> str:
@@ -0,0 +1 @@
+"""Infrastructure shared by the learning path, financial analysis and CV modules"""
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from loguru import logger
+
+ARTIFACT_DIR = os.getenv(
+    "ARTIFACT_DIR", os.path.join(os.getenv("CACHE_DIR", ".cache"), "artifacts")
+)
+# Characters of a stored text shown to the model next to its handle
+ARTIFACT_PREVIEW_CHARS = int(os.getenv("ARTIFACT_PREVIEW_CHARS", "600"))
+
+HANDLE = re.compile(r"\bartifact:([0-9a-f]{12})\b")
+
+
+class ArtifactStore:
+    """Large tool outputs kept out of tool arguments, referenced by short handles
+
+    A tool publishes its output and the model passes the handle on, so it
+    never has to generate the text again as arguments of the next tool,
+    which resolves the handle itself. Handles are derived from the
+    content, so the same output gets the same handle in every run and
+    cached orchestrator turns keep pointing at valid artifacts.
+    """
+
+    def __init__(self, directory: str = ARTIFACT_DIR) -> None:
+        self.directory = directory
+        self._texts = {}
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.md")
+
+    def put(self, text: str) -> str:
+        """Store a text and return its handle"""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        if digest not in self._texts:
+            self._texts[digest] = text
+            if not os.path.exists(self._path(digest)):
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "w") as file:
+                    file.write(text)
+                os.replace(tmp, self._path(digest))
+        return f"artifact:{digest}"
+
+    def get(self, digest: str) -> str | None:
+        if digest not in self._texts:
+            try:
+                with open(self._path(digest)) as file:
+                    self._texts[digest] = file.read()
+            except FileNotFoundError:
+                return None
+        return self._texts[digest]
+
+    def resolve(self, value):
+        """Replace the handles in a tool argument (text or list of texts) with their text"""
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        if not isinstance(value, str):
+            return value
+
+        def load(match: re.Match) -> str:
+            text = self.get(match.group(1))
+            if text is None:
+                logger.warning(f"Unknown {match.group(0)}, passing the handle through")
+                return match.group(0)
+            return text
+
+        return HANDLE.sub(load, value)
+
+    def publish(
+        self, text: str, label: str, preview_chars: int | None = ARTIFACT_PREVIEW_CHARS
+    ) -> str:
+        """Store a tool output and return its handle with a preview for the model
+
+        `preview_chars=None` shows the whole text, for outputs the model
+        has to read but should still pass on by handle.
+        """
+        handle = self.put(text)
+        preview = text
+        if preview_chars is not None and len(text) > preview_chars:
+            preview = text[:preview_chars].rstrip() + " ..."
+        return (
+            f"[{label} stored as {handle} ({len(text):,} characters). "
+            f"Pass {handle} to other tools instead of copying the text.]\n\n{preview}"
+        )
+
+
+artifacts = ArtifactStore()
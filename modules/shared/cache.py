@@ -0,0 +1,277 @@
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+
+from loguru import logger
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+from .metrics import record_completion
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+def _jsonable(value):
+    """Serialize SDK objects (e.g. assistant messages) found in request params"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def make_key(params: dict) -> str:
+    """Build a stable cache key from the request parameters"""
+    payload = json.dumps(params, sort_keys=True, default=_jsonable)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed key/value cache with per-entry TTL and size-based LRU eviction"""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        metrics_path: str | None = None,
+    ) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+        if metrics_path:
+            atexit.register(self.write_metrics, metrics_path)
+
+    def count(self, tag: str, event: str) -> None:
+        """Increment the hit/miss/bypass counter of a tag"""
+        with self._lock:
+            tag_counters = self.counters.setdefault(tag, {})
+            tag_counters[event] = tag_counters.get(event, 0) + 1
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached value, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, size, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= size
+                return None
+
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        """Store a value, evicting the least recently used entries when over budget"""
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, value, len(value), expires_at, now),
+            )
+            self._total_bytes += len(value) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+            tag_counters = self.counters.setdefault("_cache", {})
+            tag_counters["eviction"] = tag_counters.get("eviction", 0) + 1
+
+    def metrics(self) -> str:
+        """Render the counters in the Prometheus text exposition format"""
+        name = os.path.splitext(os.path.basename(self.path))[0]
+        lines = [
+            f"# TYPE {name}_cache_events_total counter",
+        ]
+        with self._lock:
+            for tag, tag_counters in sorted(self.counters.items()):
+                for event, value in sorted(tag_counters.items()):
+                    lines.append(
+                        f'{name}_cache_events_total{{tag="{tag}",event="{event}"}} {value}'
+                    )
+            lines.append(f"# TYPE {name}_cache_bytes gauge")
+            lines.append(f"{name}_cache_bytes {self._total_bytes}")
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, path: str) -> None:
+        """Write the counters to a file a Prometheus textfile collector can scrape"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            file.write(self.metrics())
+
+
+class _CachePolicy:
+    def __init__(
+        self,
+        cache: ResponseCache,
+        ttls: dict | None = None,
+        default_ttl: float | None = None,
+        max_temperature: float | None = 0.0,
+        on_response: Callable[[str, ChatCompletion, bool], None] | None = None,
+    ) -> None:
+        self.cache = cache
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_temperature = max_temperature
+        self.on_response = on_response
+
+    def notify(self, tag: str, response: ChatCompletion, cached: bool) -> None:
+        record_completion(tag, response, cached)
+        if self.on_response is not None:
+            self.on_response(tag, response, cached)
+
+    def should_bypass(self, params: dict) -> bool:
+        """Skip the cache for streams, and for sampled calls above `max_temperature`
+
+        Replaying a sampled response would pin one sample for the whole TTL,
+        so only deterministic calls are cached by default. `max_temperature`
+        None caches every call.
+        """
+        if params.get("stream"):
+            return True
+        if self.max_temperature is None:
+            return False
+        # The API samples with temperature 1 when none is given
+        return params.get("temperature", 1.0) > self.max_temperature
+
+    def lookup(self, tag: str, key: str) -> ChatCompletion | None:
+        cached = self.cache.get(key)
+        if cached is None:
+            self.cache.count(tag, "miss")
+            return None
+        self.cache.count(tag, "hit")
+        logger.debug(f"Response cache hit for {tag}")
+        return ChatCompletion.model_validate_json(cached)
+
+    def store(self, tag: str, key: str, response: ChatCompletion) -> None:
+        ttl = self.ttls.get(tag, self.default_ttl)
+        self.cache.set(key, response.model_dump_json().encode("utf-8"), ttl)
+
+
+class CachedCompletions(_CachePolicy):
+    def __init__(self, completions, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._completions = completions
+
+    def create(self, *, cache_tag: str = "default", **params) -> ChatCompletion:
+        if self.should_bypass(params):
+            self.cache.count(cache_tag, "bypass")
+            response = self._completions.create(**params)
+            self.notify(cache_tag, response, cached=False)
+            return response
+
+        key = make_key(params)
+        cached = self.lookup(cache_tag, key)
+        if cached is not None:
+            self.notify(cache_tag, cached, cached=True)
+            return cached
+
+        response = self._completions.create(**params)
+        self.store(cache_tag, key, response)
+        self.notify(cache_tag, response, cached=False)
+        return response
+
+
+class AsyncCachedCompletions(_CachePolicy):
+    def __init__(self, completions, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._completions = completions
+
+    async def create(self, *, cache_tag: str = "default", **params) -> ChatCompletion:
+        if self.should_bypass(params):
+            self.cache.count(cache_tag, "bypass")
+            response = await self._completions.create(**params)
+            self.notify(cache_tag, response, cached=False)
+            return response
+
+        # SQLite reads and commits run off the event loop
+        key = make_key(params)
+        cached = await asyncio.to_thread(self.lookup, cache_tag, key)
+        if cached is not None:
+            self.notify(cache_tag, cached, cached=True)
+            return cached
+
+        response = await self._completions.create(**params)
+        await asyncio.to_thread(self.store, cache_tag, key, response)
+        self.notify(cache_tag, response, cached=False)
+        return response
+
+
+class _Chat:
+    def __init__(self, completions) -> None:
+        self.completions = completions
+
+
+class CachedOpenAI:
+    """Wrap an OpenAI or AsyncOpenAI client so chat.completions.create is memoized
+
+    Callers may pass `cache_tag` to pick the TTL configured for that tool.
+    `on_response(tag, response, cached)` is called for every returned response.
+    Every other attribute is forwarded to the wrapped client.
+    """
+
+    def __init__(self, client, cache: ResponseCache, **policy) -> None:
+        self._client = client
+        completions_cls = (
+            AsyncCachedCompletions
+            if isinstance(client, AsyncOpenAI)
+            else CachedCompletions
+        )
+        self.chat = _Chat(completions_cls(client.chat.completions, cache, **policy))
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
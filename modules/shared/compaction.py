@@ -0,0 +1,143 @@
+import json
+import os
+from functools import lru_cache
+
+from loguru import logger
+
+MAX_HISTORY_TOKENS = int(os.getenv("MAX_HISTORY_TOKENS", "60000"))
+KEEP_RECENT_TURNS = int(os.getenv("KEEP_RECENT_TURNS", "2"))
+DIGEST_TOKENS = int(os.getenv("DIGEST_TOKENS", "200"))
+
+# Fixed overhead of the chat format, see the OpenAI cookbook on counting tokens
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+
+def as_dict(message) -> dict:
+    """Convert SDK message objects from the history to plain dicts"""
+    if hasattr(message, "model_dump"):
+        return message.model_dump(exclude_none=True)
+    return message
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    import tiktoken
+
+    # gpt-4.1 and gpt-4o family models share the o200k_base encoding
+    return tiktoken.get_encoding("o200k_base")
+
+
+@lru_cache(maxsize=4096)
+def count_text_tokens(text: str) -> int:
+    return len(get_encoding().encode(text))
+
+
+def count_message_tokens(message: dict) -> int:
+    tokens = TOKENS_PER_MESSAGE + count_text_tokens(message.get("role", ""))
+    if message.get("content"):
+        tokens += count_text_tokens(str(message["content"]))
+    for tool_call in message.get("tool_calls") or []:
+        tokens += count_text_tokens(tool_call["function"]["name"])
+        tokens += count_text_tokens(tool_call["function"]["arguments"])
+    return tokens
+
+
+def count_tokens(messages: list) -> int:
+    """Count the prompt tokens a list of chat messages will use"""
+    return TOKENS_PER_REPLY + sum(
+        count_message_tokens(as_dict(message)) for message in messages
+    )
+
+
+def digest(text: str, label: str, max_tokens: int = DIGEST_TOKENS) -> str:
+    """Keep the head of a long text and note how much was dropped"""
+    encoding = get_encoding()
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    head = encoding.decode(tokens[:max_tokens])
+    return f"{head}\n\n[compacted: {len(tokens) - max_tokens} more tokens of {label} omitted]"
+
+
+def compact_turn(turn: list[dict]) -> list[dict]:
+    """Digest the tool outputs and tool arguments of one assistant turn"""
+    assistant, *tool_messages = turn
+    tool_names = {}
+
+    compacted_calls = []
+    for tool_call in assistant.get("tool_calls") or []:
+        name = tool_call["function"]["name"]
+        tool_names[tool_call["id"]] = name
+        args = json.loads(tool_call["function"]["arguments"] or "{}")
+        args = {
+            key: digest(value, f"{name} {key}") if isinstance(value, str) else value
+            for key, value in args.items()
+        }
+        compacted_calls.append(
+            {
+                **tool_call,
+                "function": {**tool_call["function"], "arguments": json.dumps(args)},
+            }
+        )
+
+    compacted = {**assistant}
+    if compacted_calls:
+        compacted["tool_calls"] = compacted_calls
+    if assistant.get("content"):
+        compacted["content"] = digest(assistant["content"], "assistant message")
+
+    compacted_tool_messages = []
+    for message in tool_messages:
+        label = f"{tool_names.get(message.get('tool_call_id'), 'tool')} output"
+        content = message.get("content")
+        if isinstance(content, str):
+            message = {**message, "content": digest(content, label)}
+        compacted_tool_messages.append(message)
+
+    return [compacted] + compacted_tool_messages
+
+
+def split_turns(messages: list[dict]) -> tuple[list[dict], list[list[dict]]]:
+    """Split history into the leading prompt and assistant turns
+
+    Each turn is an assistant message followed by its tool responses, so a
+    tool_call is never separated from its result.
+    """
+    prompt, turns = [], []
+    for message in messages:
+        if message["role"] == "assistant":
+            turns.append([message])
+        elif turns:
+            turns[-1].append(message)
+        else:
+            prompt.append(message)
+    return prompt, turns
+
+
+def compact_messages(
+    messages: list,
+    max_tokens: int = MAX_HISTORY_TOKENS,
+    keep_recent_turns: int = KEEP_RECENT_TURNS,
+) -> list:
+    """Return the history to send, digesting older turns once over the token budget
+
+    The leading system/user prompt and the latest turns are kept verbatim.
+    The original list is left untouched.
+    """
+    total = count_tokens(messages)
+    if total <= max_tokens:
+        return messages
+
+    prompt, turns = split_turns([as_dict(message) for message in messages])
+    recent_start = max(len(turns) - keep_recent_turns, 0)
+
+    for index in range(recent_start):
+        before = sum(count_message_tokens(message) for message in turns[index])
+        turns[index] = compact_turn(turns[index])
+        total -= before - sum(count_message_tokens(message) for message in turns[index])
+        if total <= max_tokens:
+            break
+
+    logger.info(f"Compacted conversation history to {total} tokens")
+    return prompt + [message for turn in turns for message in turn]
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import re
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from loguru import logger
+
+from .compaction import count_text_tokens
+
+# Search results above this many tokens are extracted shard by shard
+EXTRACTION_SHARD_TOKENS = int(os.getenv("EXTRACTION_SHARD_TOKENS", "8000"))
+EXTRACTION_PARALLELISM = int(os.getenv("EXTRACTION_PARALLELISM", "4"))
+EXTRACTION_REDUCE_MODEL = os.getenv("EXTRACTION_REDUCE_MODEL", "gpt-4o-mini")
+
+REDUCE_PROMPT = """
+    You merge partial extractions that were produced from different parts of the same web search results.
+
+    # RULES
+    - Keep the exact output format (headings and bullet structure) used by the partial extractions
+    - Merge entries that describe the same resource, fact or claim into one entry
+    - Keep every distinct fact, number, date, name, source and link
+    - Do not add information that is not in the partial extractions
+    """
+
+
+def split_result(result: dict, max_tokens: int) -> list[dict]:
+    """Split one oversized result on paragraph boundaries, repeating its title and URL"""
+    parts, current, current_tokens = [], [], 0
+    for paragraph in re.split(r"\n\s*\n", result.get("content") or ""):
+        tokens = count_text_tokens(paragraph)
+        if current and current_tokens + tokens > max_tokens:
+            parts.append(current)
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += tokens
+    if current:
+        parts.append(current)
+    return [{**result, "content": "\n\n".join(part)} for part in parts]
+
+
+def shard_results(results: list[dict], max_tokens: int) -> list[list[dict]]:
+    """Pack results, in order, into shards of at most `max_tokens` tokens"""
+    shards, current, current_tokens = [], [], 0
+    for result in results:
+        tokens = count_text_tokens(json.dumps(result))
+        pieces = split_result(result, max_tokens) if tokens > max_tokens else [result]
+        for piece in pieces:
+            tokens = count_text_tokens(json.dumps(piece))
+            if current and current_tokens + tokens > max_tokens:
+                shards.append(current)
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        shards.append(current)
+    return shards
+
+
+def reduce_messages(partials: list[str]) -> list[dict]:
+    """Messages of the call that merges the shard extractions"""
+    return [
+        {"role": "system", "content": REDUCE_PROMPT},
+        {
+            "role": "user",
+            "content": "\n\n".join(
+                f"# PARTIAL EXTRACTION {index}\n\n{partial}"
+                for index, partial in enumerate(partials, 1)
+            ),
+        },
+    ]
+
+
+def extract(
+    client,
+    system_prompt: str,
+    results: list[dict],
+    render: Callable[[list[dict]], str],
+    cache_tag: str,
+    model: str,
+    shard_tokens: int = EXTRACTION_SHARD_TOKENS,
+    parallelism: int = EXTRACTION_PARALLELISM,
+    **params,
+) -> str:
+    """Run an extraction prompt over search results, map-reducing large result sets
+
+    `client` is the module's cached OpenAI client and `render` turns a list
+    of results into the user message. Result sets that fit in one shard
+    take a single call; larger ones are extracted shard by shard,
+    `parallelism` at a time, and merged by a reduce call.
+    """
+
+    def extract_shard(shard: list[dict]) -> str:
+        res = client.chat.completions.create(
+            cache_tag=cache_tag,
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": render(shard)},
+            ],
+            **params,
+        )
+        return res.choices[0].message.content
+
+    shards = shard_results(results, shard_tokens)
+    if len(shards) <= 1:
+        return extract_shard(results)
+
+    logger.info(f"Extracting {len(results)} results in {len(shards)} shards")
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        # Each shard runs in a copy of this context so run metrics are kept
+        futures = [
+            executor.submit(copy_context().run, extract_shard, shard)
+            for shard in shards
+        ]
+        partials = [future.result() for future in futures]
+
+    res = client.chat.completions.create(
+        cache_tag=f"{cache_tag}_reduce",
+        model=EXTRACTION_REDUCE_MODEL,
+        temperature=0,
+        messages=reduce_messages(partials),
+    )
+    return res.choices[0].message.content
+
+
+async def async_extract(
+    client,
+    system_prompt: str,
+    results: list[dict],
+    render: Callable[[list[dict]], str],
+    cache_tag: str,
+    model: str,
+    shard_tokens: int = EXTRACTION_SHARD_TOKENS,
+    parallelism: int = EXTRACTION_PARALLELISM,
+    **params,
+) -> str:
+    """`extract` for an async client, with the shards run under a semaphore"""
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def extract_shard(shard: list[dict]) -> str:
+        async with semaphore:
+            res = await client.chat.completions.create(
+                cache_tag=cache_tag,
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": render(shard)},
+                ],
+                **params,
+            )
+        return res.choices[0].message.content
+
+    shards = shard_results(results, shard_tokens)
+    if len(shards) <= 1:
+        return await extract_shard(results)
+
+    logger.info(f"Extracting {len(results)} results in {len(shards)} shards")
+    partials = await asyncio.gather(*(extract_shard(shard) for shard in shards))
+
+    res = await client.chat.completions.create(
+        cache_tag=f"{cache_tag}_reduce",
+        model=EXTRACTION_REDUCE_MODEL,
+        temperature=0,
+        messages=reduce_messages(partials),
+    )
+    return res.choices[0].message.content
@@ -0,0 +1,113 @@
+import json
+import os
+
+from loguru import logger
+
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "results/sessions")
+
+
+class Journal:
+    """Append-only record of an orchestrator session, one JSON line per finished turn
+
+    The first line holds the session input, each turn line an assistant
+    message with the tool results it led to, and a final line the answer.
+    Every line is synced to disk before the next turn starts, so a killed
+    session can be replayed up to its last finished turn without calling
+    the API again.
+    """
+
+    def __init__(self, session_id: str, directory: str = JOURNAL_DIR) -> None:
+        self.session_id = session_id
+        self.path = os.path.join(directory, f"{session_id}.jsonl")
+        self.header = None
+        self.turns = []
+        self.final = None
+        # Where the complete lines end when a crash left a torn last line
+        self._torn_at = None
+        if os.path.exists(self.path):
+            self._load()
+
+    @property
+    def exists(self) -> bool:
+        return self.header is not None
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as file:
+            data = file.read()
+        # Only the last line can be torn by a crash mid-write, and it has no newline
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            logger.warning(f"Ignoring the incomplete last line of {self.path}")
+            self._torn_at = complete
+        for line in data[:complete].decode("utf-8").splitlines():
+            entry = json.loads(line)
+            if entry["type"] == "start":
+                self.header = entry
+            elif entry["type"] == "turn":
+                self.turns.append(entry)
+            elif entry["type"] == "final":
+                self.final = entry
+
+    def _append(self, entry: dict) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self._torn_at is not None:
+            # The next line starts where the torn one did
+            with open(self.path, "r+b") as file:
+                file.truncate(self._torn_at)
+            self._torn_at = None
+        with open(self.path, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def start(self, pipeline: str, session_input: str) -> None:
+        self.header = {"type": "start", "pipeline": pipeline, "input": session_input}
+        self._append(self.header)
+
+    def record_turn(self, messages: list[dict], **extra) -> None:
+        """Record an assistant message and its tool results once all of them are in"""
+        entry = {"type": "turn", "messages": messages, **extra}
+        self.turns.append(entry)
+        self._append(entry)
+
+    def finish(self, content: str | None) -> None:
+        self.final = {"type": "final", "content": content}
+        self._append(self.final)
+
+    def replay(self) -> list[dict]:
+        """Messages of the finished turns, in order"""
+        return [message for turn in self.turns for message in turn["messages"]]
+
+
+def open_session(
+    session_id: str, pipeline: str, session_input: str | None, resume: bool = False
+) -> Journal:
+    """Start the session with `session_input`, or with `resume` continue its journal
+
+    An existing journal is never picked up without `resume`, so reusing a
+    session id cannot silently replay an earlier run.
+    """
+    journal = Journal(session_id)
+    if journal.exists:
+        if not resume:
+            raise FileExistsError(
+                f"Session {session_id} already has a journal in {JOURNAL_DIR}, "
+                "resume it or use another session id"
+            )
+        if journal.header["pipeline"] != pipeline:
+            raise ValueError(
+                f"Session {session_id} is a {journal.header['pipeline']} session"
+            )
+        if session_input is not None and session_input != journal.header["input"]:
+            raise ValueError(
+                f"Session {session_id} was started for {journal.header['input']!r}"
+            )
+        logger.info(
+            f"Resuming session {session_id} after {len(journal.turns)} finished turns"
+        )
+    elif session_input is None:
+        raise ValueError(f"No journal for session {session_id} in {JOURNAL_DIR}")
+    else:
+        journal.start(pipeline, session_input)
+        logger.info(f"Session {session_id}, resume it with --resume {session_id}")
+    return journal
@@ -0,0 +1,26 @@
+import threading
+from collections.abc import Callable
+
+
+class Lazy:
+    """Proxy that builds its target on first attribute access
+
+    Lets modules export clients as plain names (`from utils import client`)
+    without paying for heavy imports or client construction at import time.
+    """
+
+    def __init__(self, factory: Callable[[], object]) -> None:
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """Return the target, building it on the first call"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name: str):
+        return getattr(self.resolve(), name)
@@ -0,0 +1,270 @@
+import atexit
+import bisect
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# A relative METRICS_DIR is under the project root, wherever the process runs
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+METRICS_DIR = os.path.join(ROOT, os.getenv("METRICS_DIR", "results/metrics"))
+
+# Histogram bucket upper bounds, picked by the unit suffix of the metric name
+BUCKETS = {
+    "seconds": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    "bytes": tuple(256 * 4**i for i in range(9)),
+    "tokens": tuple(64 * 2**i for i in range(12)),
+}
+
+
+def _buckets(name: str) -> tuple:
+    return BUCKETS[name.rsplit("_", 1)[-1]]
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Histogram:
+    def __init__(self, bounds: tuple) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile"""
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and labels
+
+    Histogram names end in `_seconds`, `_bytes` or `_tokens`, which picks
+    their buckets. Snapshots render as Prometheus text or JSON.
+    """
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, labels: dict, value: float = 1) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: dict, value: float) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(_buckets(name))
+            self.histograms[key].observe(value)
+
+    def snapshot(self) -> dict:
+        """Return a JSON-friendly copy of every counter and histogram"""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": hist.count,
+                    "sum": round(hist.sum, 6),
+                    "max": round(hist.max, 6),
+                    "p50": hist.quantile(0.5),
+                    "p95": hist.quantile(0.95),
+                }
+                for (name, labels), hist in sorted(self.histograms.items())
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        lines, typed = [], set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        def render(labels: tuple, extra: tuple = ()) -> str:
+            pairs = ",".join(f'{key}="{value}"' for key, value in labels + extra)
+            return f"{{{pairs}}}" if pairs else ""
+
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                full_name = f"{self.prefix}_{name}"
+                declare(full_name, "counter")
+                lines.append(f"{full_name}{render(labels)} {value}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                full_name = f"{self.prefix}_{name}"
+                declare(full_name, "histogram")
+                cumulative = 0
+                for bound, count in zip(hist.bounds + ("+Inf",), hist.counts):
+                    cumulative += count
+                    le = render(labels, (("le", bound),))
+                    lines.append(f"{full_name}_bucket{le} {cumulative}")
+                lines.append(f"{full_name}_sum{render(labels)} {hist.sum}")
+                lines.append(f"{full_name}_count{render(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write `<path>.prom` and `<path>.json`"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.prom", "w") as file:
+            file.write(self.prometheus())
+        with open(f"{path}.json", "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+
+# Process-wide totals, plus the registry of the run in progress (if any)
+metrics = MetricsRegistry(os.getenv("METRICS_PREFIX", "agents"))
+current_run: ContextVar[MetricsRegistry | None] = ContextVar(
+    "current_run", default=None
+)
+
+
+def set_prefix(prefix: str) -> None:
+    """Name the metrics after the module using them, unless METRICS_PREFIX is set"""
+    metrics.prefix = os.getenv("METRICS_PREFIX", prefix)
+
+
+def write_process_metrics() -> None:
+    if metrics.counters or metrics.histograms:
+        metrics.write(f"{METRICS_DIR}/{metrics.prefix}-process-{os.getpid()}")
+
+
+@functools.cache
+def write_process_metrics_at_exit() -> None:
+    """Write the process totals when the interpreter exits, registered once"""
+    atexit.register(write_process_metrics)
+
+
+# Pipeline runs (track_run) write process totals, other importers only when
+# METRICS_DIR is set explicitly
+if "METRICS_DIR" in os.environ:
+    write_process_metrics_at_exit()
+
+
+def inc(name: str, labels: dict, value: float = 1) -> None:
+    """Increment a counter in the process and the current run"""
+    metrics.inc(name, labels, value)
+    if (run := current_run.get()) is not None:
+        run.inc(name, labels, value)
+
+
+def observe(name: str, labels: dict, value: float) -> None:
+    """Record a histogram sample in the process and the current run"""
+    metrics.observe(name, labels, value)
+    if (run := current_run.get()) is not None:
+        run.observe(name, labels, value)
+
+
+@contextmanager
+def track_run(name: str):
+    """Collect the metrics of one run and write them under METRICS_DIR when it ends"""
+    write_process_metrics_at_exit()
+    run = MetricsRegistry(metrics.prefix)
+    token = current_run.set(run)
+    try:
+        yield run
+    finally:
+        current_run.reset(token)
+        run.write(f"{METRICS_DIR}/{run.prefix}-{name}-{int(time.time() * 1000)}")
+
+
+def payload_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return len(json.dumps(value, default=str))
+
+
+def record_tool(tool: str, start: float, args, result, error: bool) -> None:
+    labels = {"tool": tool}
+    observe("tool_duration_seconds", labels, time.perf_counter() - start)
+    observe("tool_request_bytes", labels, payload_size(args))
+    observe("tool_response_bytes", labels, payload_size(result))
+    inc("tool_calls_total", {**labels, "status": "error" if error else "ok"})
+
+
+def instrument_tool(func):
+    """Record duration, payload sizes and failures of every call to `func`"""
+    tool = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def instrumented_async(*args, **kwargs):
+            start, result, error = time.perf_counter(), None, True
+            try:
+                result = await func(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                record_tool(tool, start, [args, kwargs], result, error)
+
+        return instrumented_async
+
+    @functools.wraps(func)
+    def instrumented(*args, **kwargs):
+        start, result, error = time.perf_counter(), None, True
+        try:
+            result = func(*args, **kwargs)
+            error = False
+            return result
+        finally:
+            record_tool(tool, start, [args, kwargs], result, error)
+
+    return instrumented
+
+
+def record_completion(tag: str, response, cached: bool) -> None:
+    """Record token usage and cache outcome of a chat completion"""
+    labels = {"tag": tag}
+    inc("llm_responses_total", {**labels, "cached": str(cached).lower()})
+    usage = getattr(response, "usage", None)
+    if cached or usage is None:
+        return
+    observe("llm_prompt_tokens", labels, usage.prompt_tokens)
+    observe("llm_completion_tokens", labels, usage.completion_tokens)
+
+
+def record_request(
+    provider: str,
+    endpoint: str,
+    status: int | str,
+    queue_wait: float,
+    duration: float,
+    request_bytes: int,
+    response_bytes: int,
+) -> None:
+    """Record one round trip to an external API"""
+    labels = {"provider": provider, "endpoint": endpoint}
+    inc("api_requests_total", {**labels, "status": status})
+    observe("api_queue_wait_seconds", labels, queue_wait)
+    observe("api_duration_seconds", labels, duration)
+    observe("api_request_bytes", labels, request_bytes)
+    observe("api_response_bytes", labels, response_bytes)
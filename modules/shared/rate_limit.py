@@ -0,0 +1,402 @@
+import asyncio
+import itertools
+import os
+import re
+import threading
+import time
+
+import httpx
+from loguru import logger
+from tavily import AsyncTavilyClient
+from tavily.errors import UsageLimitExceededError
+
+from .metrics import payload_size, record_request
+
+# Retry-After is only a hint, never wait longer than this before trying again
+MAX_RETRY_DELAY = 60.0
+# Retries of a rate limited call, by the SDK clients and RateLimitedTavily
+MAX_RATE_LIMIT_RETRIES = 5
+
+
+def parse_duration(value: str | None) -> float | None:
+    """Parse rate limit reset durations such as `1s`, `6m0s` or `250ms`"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    matches = re.findall(r"([\d.]+)(ms|s|m|h)", value)
+    if not matches:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in matches)
+
+
+class TokenBucket:
+    """Continuously refilling bucket with `capacity` units per minute"""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.level = min(self.capacity, self.level + elapsed * self.capacity / 60)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        # Requests larger than the whole bucket only wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+
+
+class RateLimiter:
+    """Process-wide limiter for one provider
+
+    Callers are served strictly first come, first served. A caller goes
+    ahead once there is budget in both the requests-per-minute and the
+    tokens-per-minute bucket, and a free slot in the concurrency window.
+    The window grows while responses report spare quota and halves on a
+    429. Rate limit headers resync the buckets with what the provider sees.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: float | None = None,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+    ) -> None:
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = max(min_concurrency, max_concurrency // 2)
+        self.in_flight = 0
+        self.paused_until = 0.0
+
+        self._condition = threading.Condition()
+        self._tickets = itertools.count()
+        self._now_serving = 0
+        self._abandoned = set()
+
+    def _try_acquire(self, ticket: int, tokens: float) -> float:
+        """Take capacity for `ticket` if it is its turn, else return how long to wait"""
+        now = time.monotonic()
+        while self._now_serving in self._abandoned:
+            self._abandoned.discard(self._now_serving)
+            self._now_serving += 1
+        if ticket != self._now_serving:
+            return 0.05
+
+        self.requests.refill(now)
+        wait = max(self.paused_until - now, self.requests.wait_time(1))
+        if self.tokens is not None:
+            self.tokens.refill(now)
+            wait = max(wait, self.tokens.wait_time(tokens))
+        if self.in_flight >= self.concurrency:
+            wait = max(wait, 0.05)
+        if wait > 0:
+            return wait
+
+        self.requests.level -= 1
+        if self.tokens is not None:
+            self.tokens.level -= min(tokens, self.tokens.capacity)
+        self.in_flight += 1
+        self._now_serving += 1
+        self._condition.notify_all()
+        return 0.0
+
+    def acquire(self, tokens: float = 0) -> None:
+        """Block the calling thread until the request may be sent"""
+        with self._condition:
+            ticket = next(self._tickets)
+            while (wait := self._try_acquire(ticket, tokens)) > 0:
+                self._condition.wait(timeout=wait)
+
+    async def acquire_async(self, tokens: float = 0) -> None:
+        """Wait without blocking the event loop until the request may be sent"""
+        with self._condition:
+            ticket = next(self._tickets)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_acquire(ticket, tokens)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(min(wait, 0.25))
+        except asyncio.CancelledError:
+            with self._condition:
+                if ticket >= self._now_serving:
+                    self._abandoned.add(ticket)
+                    self._condition.notify_all()
+            raise
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def update(self, status_code: int, headers: httpx.Headers | dict) -> None:
+        """Adapt buckets and the concurrency window to a provider response"""
+        headers = {key.lower(): value for key, value in headers.items()}
+        now = time.monotonic()
+        with self._condition:
+            for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                if bucket is None:
+                    continue
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if limit:
+                    bucket.capacity = float(limit)
+                if remaining:
+                    bucket.refill(now)
+                    bucket.level = min(bucket.level, float(remaining))
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if float(remaining) <= 0 and reset:
+                        self.paused_until = max(self.paused_until, now + reset)
+
+            if status_code == 429:
+                if headers.get("retry-after-ms"):
+                    retry_after = float(headers["retry-after-ms"]) / 1000
+                else:
+                    retry_after = parse_duration(headers.get("retry-after"))
+                retry_after = min(retry_after or 1.0, MAX_RETRY_DELAY)
+                self.paused_until = max(self.paused_until, now + retry_after)
+                self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                logger.warning(
+                    f"{self.name} rate limited, pausing {retry_after:.1f}s "
+                    f"with concurrency {self.concurrency}"
+                )
+            elif status_code < 400:
+                remaining = headers.get("x-ratelimit-remaining-requests")
+                has_headroom = (
+                    remaining is None or float(remaining) > self.requests.capacity * 0.2
+                )
+                if has_headroom and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+            self._condition.notify_all()
+
+
+def estimate_tokens(request: httpx.Request) -> float:
+    """Rough prompt + completion token estimate of a JSON API request"""
+    try:
+        body = request.content
+    except httpx.RequestNotRead:
+        # Streamed uploads (e.g. multipart files) carry no prompt tokens
+        return 0.0
+    completion_tokens = re.search(rb'"max(?:_completion)?_tokens":\s*(\d+)', body)
+    return len(body) / 4 + (int(completion_tokens.group(1)) if completion_tokens else 0)
+
+
+def request_size(request: httpx.Request) -> int:
+    try:
+        return len(request.content)
+    except httpx.RequestNotRead:
+        return int(request.headers.get("content-length") or 0)
+
+
+def endpoint(request: httpx.Request) -> str:
+    """URL path with resource ids collapsed, e.g. /v1/files/{id}/url"""
+    return re.sub(r"/[^/]*\d[^/]{6,}", "/{id}", request.url.path)
+
+
+class _MeteredStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Count response body bytes and record the round trip once the body is closed"""
+
+    def __init__(self, stream, on_close) -> None:
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+        self.bytes = 0
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self.bytes += len(chunk)
+            yield chunk
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self.bytes += len(chunk)
+            yield chunk
+
+    def _finish(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._on_close(self.bytes)
+
+    def close(self) -> None:
+        self._stream.close()
+        self._finish()
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        self._finish()
+
+
+def meter(
+    limiter: "RateLimiter",
+    request: httpx.Request,
+    response: httpx.Response,
+    queue_wait: float,
+    sent_at: float,
+) -> httpx.Response:
+    """Record the request in metrics when its response body has been read"""
+
+    def on_close(response_bytes: int) -> None:
+        record_request(
+            limiter.name,
+            endpoint(request),
+            response.status_code,
+            queue_wait,
+            time.perf_counter() - sent_at,
+            request_size(request),
+            response_bytes,
+        )
+
+    response.stream = _MeteredStream(response.stream, on_close)
+    return response
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that queues requests through a RateLimiter
+
+    429s are returned to the SDK, whose own retries go back through the
+    queue and wait out the pause the 429 set on the limiter.
+    """
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.BaseTransport = None):
+        self.limiter = limiter
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        queued_at = time.perf_counter()
+        self.limiter.acquire(estimate_tokens(request))
+        sent_at = time.perf_counter()
+        try:
+            response = self._transport.handle_request(request)
+        finally:
+            self.limiter.release()
+        self.limiter.update(response.status_code, response.headers)
+        return meter(self.limiter, request, response, sent_at - queued_at, sent_at)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of RateLimitedTransport"""
+
+    def __init__(
+        self, limiter: RateLimiter, transport: httpx.AsyncBaseTransport = None
+    ):
+        self.limiter = limiter
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        queued_at = time.perf_counter()
+        await self.limiter.acquire_async(estimate_tokens(request))
+        sent_at = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        finally:
+            self.limiter.release()
+        self.limiter.update(response.status_code, response.headers)
+        return meter(self.limiter, request, response, sent_at - queued_at, sent_at)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class RateLimitedTavily:
+    """Queue Tavily searches through a RateLimiter
+
+    The Tavily SDK does not expose response headers, so a 429
+    (UsageLimitExceededError) is treated as a short pause and retried.
+    Payload sizes are measured on the JSON request and decoded response.
+    """
+
+    def __init__(self, client, limiter: RateLimiter) -> None:
+        self._client = client
+        self.limiter = limiter
+        self.is_async = isinstance(client, AsyncTavilyClient)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def _record(self, query, params, response, queue_wait, sent_at) -> None:
+        record_request(
+            self.limiter.name,
+            "/search",
+            200,
+            queue_wait,
+            time.perf_counter() - sent_at,
+            payload_size({"query": query, **params}),
+            payload_size(response),
+        )
+
+    def search(self, query: str, **params):
+        if self.is_async:
+            return self._search_async(query, **params)
+
+        queue_wait = 0.0
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            queued_at = time.perf_counter()
+            self.limiter.acquire()
+            sent_at = time.perf_counter()
+            queue_wait += sent_at - queued_at
+            try:
+                response = self._client.search(query, **params)
+                self.limiter.update(200, {})
+                self._record(query, params, response, queue_wait, sent_at)
+                return response
+            except UsageLimitExceededError:
+                self.limiter.update(429, {"retry-after": str(2**attempt)})
+                if attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+            finally:
+                self.limiter.release()
+
+    async def _search_async(self, query: str, **params):
+        queue_wait = 0.0
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            queued_at = time.perf_counter()
+            await self.limiter.acquire_async()
+            sent_at = time.perf_counter()
+            queue_wait += sent_at - queued_at
+            try:
+                response = await self._client.search(query, **params)
+                self.limiter.update(200, {})
+                self._record(query, params, response, queue_wait, sent_at)
+                return response
+            except UsageLimitExceededError:
+                self.limiter.update(429, {"retry-after": str(2**attempt)})
+                if attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+            finally:
+                self.limiter.release()
+
+
+openai_limiter = RateLimiter(
+    "openai",
+    requests_per_minute=float(os.getenv("OPENAI_RPM", "500")),
+    tokens_per_minute=float(os.getenv("OPENAI_TPM", "200000")),
+    max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "32")),
+)
+tavily_limiter = RateLimiter(
+    "tavily",
+    requests_per_minute=float(os.getenv("TAVILY_RPM", "100")),
+    max_concurrency=int(os.getenv("TAVILY_MAX_CONCURRENCY", "8")),
+)
+mistral_limiter = RateLimiter(
+    "mistral",
+    requests_per_minute=float(os.getenv("MISTRAL_RPM", "60")),
+    tokens_per_minute=float(os.getenv("MISTRAL_TPM", "500000")),
+    max_concurrency=int(os.getenv("MISTRAL_MAX_CONCURRENCY", "4")),
+)
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from loguru import logger
+from tavily import AsyncTavilyClient
+
+from .cache import DAY, HOUR, ResponseCache, make_key
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so equivalent queries share an entry"""
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+class SearchCache:
+    """Compressed on-disk cache for search results with stale-while-revalidate
+
+    Entries are fresh for a TTL derived from the freshness window of the
+    search. Past that they are still served for `stale_ttl` seconds while a
+    refresh runs in the background.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        ttl: float = 7 * DAY,
+        recent_ttl: float = HOUR,
+        stale_ttl: float | None = None,
+    ) -> None:
+        self.cache = cache
+        self.ttl = ttl
+        self.recent_ttl = recent_ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else ttl
+
+    def make_key(self, query: str, params: dict) -> str:
+        params = {key: value for key, value in params.items() if value is not None}
+        return make_key({"query": normalize_query(query), **params})
+
+    def fresh_ttl(self, params: dict) -> float:
+        """Short TTL for date-filtered (news/recent) searches, long for evergreen ones"""
+        if (
+            params.get("days")
+            or params.get("time_range")
+            or params.get("topic") == "news"
+        ):
+            return self.recent_ttl
+        return self.ttl
+
+    def get(self, key: str) -> tuple[dict | None, bool]:
+        """Return (results, is_stale) for a key, or (None, False) on a miss"""
+        cached = self.cache.get(key)
+        if cached is None:
+            self.cache.count("search", "miss")
+            return None, False
+
+        entry = json.loads(zlib.decompress(cached))
+        if time.time() - entry["fetched_at"] < entry["fresh_for"]:
+            self.cache.count("search", "hit")
+            return entry["response"], False
+
+        self.cache.count("search", "stale")
+        return entry["response"], True
+
+    def set(self, key: str, params: dict, response: dict) -> None:
+        fresh_for = self.fresh_ttl(params)
+        entry = {
+            "fetched_at": time.time(),
+            "fresh_for": fresh_for,
+            "response": response,
+        }
+        value = zlib.compress(json.dumps(entry).encode("utf-8"))
+        self.cache.set(key, value, ttl=fresh_for + self.stale_ttl)
+
+
+class CachedTavily:
+    """Wrap a TavilyClient or AsyncTavilyClient so search results are cached
+
+    Concurrent misses for the same search share a single request. Every
+    other attribute is forwarded to the wrapped client.
+    """
+
+    def __init__(self, client, cache: SearchCache) -> None:
+        self._client = client
+        self._cache = cache
+        self._refreshing = set()
+        self._inflight = {}
+        self._background_tasks = set()
+        self._lock = threading.Lock()
+        # Wrappers such as RateLimitedTavily report the kind of client they hold
+        self.is_async = getattr(
+            client, "is_async", isinstance(client, AsyncTavilyClient)
+        )
+        if not self.is_async:
+            self._executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="search-refresh"
+            )
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def _claim_refresh(self, key: str) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _release_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def search(self, query: str, **params):
+        if self.is_async:
+            return self._search_async(query, **params)
+
+        key = self._cache.make_key(query, params)
+        response, is_stale = self._cache.get(key)
+        if response is None:
+            response = self._fetch(key, query, params)
+        elif is_stale and self._claim_refresh(key):
+            self._executor.submit(self._refresh, key, query, params)
+        return response
+
+    def _fetch(self, key: str, query: str, params: dict):
+        with self._lock:
+            future = self._inflight.get(key)
+            if owner := future is None:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            response = self._client.search(query, **params)
+            self._cache.set(key, params, response)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _refresh(self, key: str, query: str, params: dict) -> None:
+        try:
+            self._cache.set(key, params, self._client.search(query, **params))
+        # The stale entry is served until a later refresh succeeds
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Background search refresh failed for '{query}': {e}")
+        finally:
+            self._release_refresh(key)
+
+    async def _search_async(self, query: str, **params):
+        key = self._cache.make_key(query, params)
+        # SQLite reads and commits run off the event loop
+        response, is_stale = await asyncio.to_thread(self._cache.get, key)
+        if response is None:
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._fetch_async(key, query, params))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            # A cancelled caller must not cancel the request the others wait on
+            response = await asyncio.shield(task)
+        elif is_stale and self._claim_refresh(key):
+            task = asyncio.create_task(self._refresh_async(key, query, params))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        return response
+
+    async def _fetch_async(self, key: str, query: str, params: dict):
+        response = await self._client.search(query, **params)
+        await asyncio.to_thread(self._cache.set, key, params, response)
+        return response
+
+    async def _refresh_async(self, key: str, query: str, params: dict) -> None:
+        try:
+            response = await self._client.search(query, **params)
+            await asyncio.to_thread(self._cache.set, key, params, response)
+        # The stale entry is served until a later refresh succeeds
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Background search refresh failed for '{query}': {e}")
+        finally:
+            self._release_refresh(key)
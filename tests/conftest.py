@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Metrics written at exit and default cache locations stay out of the working tree
+_scratch = tempfile.mkdtemp(prefix="tests-")
+os.environ.setdefault("METRICS_DIR", os.path.join(_scratch, "metrics"))
+os.environ.setdefault("CACHE_DIR", os.path.join(_scratch, ".cache"))
+
+# `uv sync` installs the shared package, the tests also run without that
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "modules"))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The module runs as a script with flat imports, so its tests import it the same way
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "modules", "cv_to_salary")
+)
@@ -0,0 +1,70 @@
+import pytest
+from batch_writer import BatchWriter, embedding_batches
+
+
+class FakeCollection:
+    name = "cv_data"
+
+    def __init__(self, failing_ids=()) -> None:
+        self.failing_ids = set(failing_ids)
+        self.stored = {}
+
+    def upsert(self, ids, documents, metadatas, embeddings) -> None:
+        if self.failing_ids & set(ids):
+            raise ConnectionError("Chroma is unavailable")
+        self.stored.update(zip(ids, documents))
+
+
+def embed(documents):
+    return [[float(len(document))] for document in documents]
+
+
+def writer_for(collection) -> BatchWriter:
+    # Nothing is written before a flush, so each test decides the batches
+    return BatchWriter(collection, embed, max_documents=1000, max_delay=60)
+
+
+def test_embedding_batches_respect_input_and_token_limits():
+    documents = ["x" * 30] * 10
+    assert embedding_batches(documents, max_inputs=4) == [(0, 4), (4, 8), (8, 10)]
+    assert embedding_batches(documents, max_tokens=35) == [
+        (0, 3),
+        (3, 6),
+        (6, 9),
+        (9, 10),
+    ]
+
+
+def test_flush_writes_everything_added():
+    collection = FakeCollection()
+    writer = writer_for(collection)
+    writes = [writer.add([f"a{i}"], [f"doc {i}"], [{}]) for i in range(3)]
+    writer.flush(writes)
+    assert sorted(collection.stored) == ["a0", "a1", "a2"]
+    writer.close()
+
+
+def test_failed_write_is_raised_only_to_its_callers():
+    collection = FakeCollection(failing_ids={"a1"})
+    writer = writer_for(collection)
+    first = [writer.add(["a1"], ["candidate a"], [{}])]
+    writer.flush()
+    second = [writer.add(["b1"], ["candidate b"], [{}])]
+
+    # B's documents were written in a later batch, A's failure is not B's
+    writer.flush(second)
+    assert "b1" in collection.stored
+    with pytest.raises(ConnectionError):
+        writer.flush(first)
+    writer.close()
+
+
+def test_failure_reaches_every_caller_in_the_batch():
+    collection = FakeCollection(failing_ids={"b1"})
+    writer = writer_for(collection)
+    first = [writer.add(["a1"], ["candidate a"], [{}])]
+    second = [writer.add(["b1"], ["candidate b"], [{}])]
+    for writes in (first, second):
+        with pytest.raises(ConnectionError):
+            writer.flush(writes)
+    writer.close()
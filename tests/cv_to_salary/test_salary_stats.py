@@ -0,0 +1,103 @@
+import pytest
+from salary_stats import extract_figures, format_summary, parse_number, summarize
+
+
+def figures(text: str) -> list[tuple]:
+    return [
+        (figure.low, figure.high, figure.currency, figure.period, figure.location)
+        for figure in extract_figures(text)
+    ]
+
+
+@pytest.mark.parametrize(
+    ("number", "multiplier", "expected"),
+    [
+        ("120,000", "", 120_000),
+        ("45.000", "", 45_000),
+        ("8 000", "", 8_000),
+        ("1.5", "k", 1_500),
+        ("1.234.567,89", "", 1_234_567.89),
+        ("15", " juta", 15_000_000),
+        ("18", "LPA", 1_800_000),
+    ],
+)
+def test_parse_number(number, multiplier, expected):
+    assert parse_number(number, multiplier) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        (
+            "Salary: $120,000 - $150,000 per year in New York.",
+            (120_000, 150_000, "USD", "year", "United States"),
+        ),
+        (
+            "Data engineers in Jakarta earn Rp 15 juta per month.",
+            (15_000_000, 15_000_000, "IDR", "month", "Indonesia"),
+        ),
+        (
+            "RM 8,000 monthly in Kuala Lumpur",
+            (8_000, 8_000, "MYR", "month", "Malaysia"),
+        ),
+        ("₹18 LPA in Bangalore", (1_800_000, 1_800_000, "INR", "year", "India")),
+        (
+            "45.000 EUR per year in Berlin",
+            (45_000, 45_000, "EUR", "year", "Germany"),
+        ),
+        (
+            "US$90k to 120K annually",
+            (90_000, 120_000, "USD", "year", "United States"),
+        ),
+        (
+            "A$95k in Sydney, or $110k in Melbourne.",
+            (95_000, 95_000, "AUD", "year", "Australia"),
+        ),
+        # A foreign currency with no place nearby is not the page's country
+        (
+            "Data engineer jobs in Jakarta. Remote roles for US firms pay $180k.",
+            (180_000, 180_000, "USD", "year", "United States"),
+        ),
+    ],
+)
+def test_extract_figures(text, expected):
+    assert figures(text)[0] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # Currency codes inside words are not prefixes
+        "Our platform 150,000 users across Malaysia.",
+        "The firm 300k employees in the United States.",
+        "Its team has grown to 40 engineers and serves 2m customers.",
+        "Find us at Jl. Sudirman 52, Jakarta.",
+        # Lower case letter codes are words, not currencies
+        "Join 5,000 others: sign up free, no usd 10 fee.",
+        "Page 2 of 10",
+    ],
+)
+def test_extract_figures_ignores_numbers_that_are_not_salaries(text):
+    assert figures(text) == []
+
+
+def test_summarize_drops_implausible_values():
+    text = "Engineers in Singapore earn S$7,000 per month. Coffee costs S$5 per day."
+    rows = summarize(extract_figures(text))
+    assert [row["location"] for row in rows] == ["Singapore"]
+    assert rows[0]["figures"] == 1
+    assert rows[0]["median"] == pytest.approx(7_000 * 12 * 0.75)
+
+
+def test_format_summary_lists_sources():
+    summary = format_summary(
+        [
+            {
+                "title": "Salaries",
+                "url": "https://example.com",
+                "raw_content": "The median is $100,000 per year in Seattle.",
+            }
+        ]
+    )
+    assert "| United States | 1 |" in summary
+    assert "- Salaries (https://example.com): $100,000 /year" in summary
@@ -0,0 +1,97 @@
+import passages
+import pytest
+from passages import select_passages, split_passages, tokenize
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # One token per word keeps budgets readable and needs no tiktoken download
+    monkeypatch.setattr(passages, "count_text_tokens", lambda text: len(text.split()))
+
+
+def result(title: str, *paragraphs: str) -> dict:
+    return {
+        "title": title,
+        "url": f"https://example.com/{title}",
+        "content": "\n\n".join(paragraphs),
+    }
+
+
+def test_tokenize_keeps_numbers_whole_and_drops_stopwords():
+    assert tokenize("The NIM of BBCA was 5.8% on 1,200 loans") == [
+        "nim",
+        "bbca",
+        "5.8",
+        "1,200",
+        "loans",
+    ]
+
+
+def test_long_paragraphs_are_windowed():
+    chunks = split_passages(" ".join(["word"] * 250) + "\n\n  \n\nshort")
+    assert [len(chunk.split()) for chunk in chunks] == [120, 120, 10, 1]
+
+
+def test_relevant_passages_are_kept_within_budget():
+    results = [
+        result(
+            "bank",
+            "Bank Central Asia net interest margin rose to 5.8 percent",
+            "Cookie settings and newsletter sign up for our readers here",
+        ),
+        result("weather", "Jakarta weather is sunny with light rain expected later"),
+    ]
+    selected = select_passages(results, "bank net interest margin", budget=12)
+
+    assert selected == [
+        {
+            "title": "bank",
+            "url": "https://example.com/bank",
+            "content": "Bank Central Asia net interest margin rose to 5.8 percent",
+            "score": 0,
+        }
+    ]
+
+
+def test_selected_passages_keep_page_order():
+    results = [
+        result(
+            "outlook",
+            "Gold in the coming quarter",
+            "Unrelated paragraph about football scores and match results",
+            "Gold price outlook stays strong as central banks keep buying gold",
+        )
+    ]
+    selected = select_passages(results, "gold price outlook", budget=100)
+
+    # The last paragraph scores higher but stays after the first one
+    assert selected[0]["content"].split("\n\n") == [
+        "Gold in the coming quarter",
+        "Gold price outlook stays strong as central banks keep buying gold",
+    ]
+
+
+def test_passages_over_budget_are_skipped_for_smaller_ones():
+    results = [
+        result(
+            "rates",
+            "Rates " + " ".join(["rates"] * 20),
+            "Interest rates were cut",
+        )
+    ]
+    selected = select_passages(results, "interest rates", budget=10)
+
+    assert selected[0]["content"] == "Interest rates were cut"
+
+
+def test_without_any_match_the_budget_is_filled_in_page_order():
+    results = [
+        result("misc", "Nothing relevant here at all", "Still nothing useful"),
+        result("other", "Another page without matches", "Left out by the budget"),
+    ]
+    selected = select_passages(results, "bank margin", budget=12)
+
+    assert [(page["title"], page["content"]) for page in selected] == [
+        ("misc", "Nothing relevant here at all\n\nStill nothing useful"),
+        ("other", "Another page without matches"),
+    ]
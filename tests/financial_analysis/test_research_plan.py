@@ -0,0 +1,53 @@
+import importlib
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+from shared.cache import CachedOpenAI, ResponseCache
+
+
+class FakeCompletions:
+    def __init__(self) -> None:
+        self.calls = []
+
+    def create(self, **params) -> ChatCompletion:
+        self.calls.append(params)
+        return ChatCompletion.model_validate(
+            {
+                "id": f"chatcmpl-{len(self.calls)}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": params["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": f"Plan {len(self.calls)}",
+                        },
+                    }
+                ],
+            }
+        )
+
+
+def test_second_research_plan_comes_from_the_cache(
+    module_imports, monkeypatch, tmp_path
+):
+    research_plan = importlib.import_module("tools.research_plan")
+    api = FakeCompletions()
+    client = CachedOpenAI(
+        SimpleNamespace(chat=SimpleNamespace(completions=api)),
+        ResponseCache(str(tmp_path / "openai.sqlite")),
+    )
+    monkeypatch.setattr(research_plan, "openai_client", client)
+
+    first = research_plan.research_plan("Gold price outlook")
+    second = research_plan.research_plan("Gold price outlook")
+
+    assert first == second
+    assert len(api.calls) == 1
+    assert client.chat.completions.cache.counters["research_plan"] == {
+        "miss": 1,
+        "hit": 1,
+    }
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+MODULE_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "..", "modules", "learning_path_generator"
+)
+
+# The module runs as a script with flat imports, so its tests import it the same way
+sys.path.insert(0, MODULE_DIR)
+
+
+@pytest.fixture
+def module_imports(monkeypatch):
+    """Import this module's `main`, `utils` and `tools`, every module has its own"""
+    monkeypatch.syspath_prepend(MODULE_DIR)
+    for name in list(sys.modules):
+        if name in ("main", "utils", "tools") or name.startswith("tools."):
+            monkeypatch.delitem(sys.modules, name)
@@ -0,0 +1,62 @@
+from content import clean_search_results
+
+
+def clean(raw_content: str, url: str = "https://example.com/rust/guide") -> str:
+    results = clean_search_results(
+        [{"title": "Rust", "url": url, "raw_content": raw_content}]
+    )
+    return results[0]["content"] if results else ""
+
+
+def test_keeps_link_targets_of_content():
+    text = clean(
+        "Start with [Rustlings](https://github.com/rust-lang/rustlings), "
+        'then read [the book](../book/ "The Book") and https://doc.rust-lang.org/std/.'
+    )
+    assert text == (
+        "Start with Rustlings (https://github.com/rust-lang/rustlings), "
+        "then read the book (https://example.com/book/) and "
+        "https://doc.rust-lang.org/std/."
+    )
+
+
+def test_drops_navigation_images_and_page_anchors():
+    text = clean(
+        "[Home](/) | [Docs](/docs) | [Blog](/blog) | [Login](/login)\n\n"
+        "![logo](/logo.png)\n\n"
+        "Ownership is explained in [the next section](#ownership).\n\n"
+        "Copyright © 2024 All rights reserved"
+    )
+    assert text == "Ownership is explained in the next section."
+
+
+def test_link_targets_do_not_make_content_boilerplate():
+    text = clean("Exercises: [Rust by Example](https://example.org/login/rbe)")
+    assert text == "Exercises: Rust by Example (https://example.org/login/rbe)"
+
+
+def test_collapses_duplicates_across_results():
+    paragraph = "Rust guarantees memory safety without a garbage collector at all."
+    results = clean_search_results(
+        [
+            {"url": "https://a.example", "raw_content": paragraph},
+            {"url": "https://b.example", "raw_content": f"{paragraph}\n\nOnly here."},
+        ]
+    )
+    assert [result["content"] for result in results] == [paragraph, "Only here."]
+
+
+def test_keeps_long_blocks_that_contain_a_short_earlier_one():
+    sentence = "Rust guarantees memory safety without a garbage collector at all."
+    longer = (
+        f"{sentence} The borrow checker enforces this at compile time, and "
+        "lifetimes describe how long every reference stays valid."
+    )
+    results = clean_search_results(
+        [
+            {"url": "https://a.example", "raw_content": sentence},
+            {"url": "https://b.example", "raw_content": longer},
+            {"url": "https://c.example", "raw_content": sentence},
+        ]
+    )
+    assert [result["content"] for result in results] == [sentence, longer]
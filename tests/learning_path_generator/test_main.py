@@ -0,0 +1,45 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+
+def tool_call(call_id: str, name: str, arguments: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=call_id, function=SimpleNamespace(name=name, arguments=arguments)
+    )
+
+
+def test_failing_tool_calls_do_not_stop_their_siblings(module_imports, monkeypatch):
+    main = importlib.import_module("main")
+
+    async def resource_search(query: str) -> str:
+        raise RuntimeError("search is down")
+
+    async def broadcast(message: str) -> str:
+        await asyncio.sleep(0.01)
+        return f"sent {message}"
+
+    monkeypatch.setitem(main.tools_dict, "resource_search", resource_search)
+    monkeypatch.setitem(main.tools_dict, "broadcast", broadcast)
+
+    results = asyncio.run(
+        main.execute_tool_calls(
+            [
+                tool_call("call-1", "resource_search", '{"query": "rust"}'),
+                tool_call("call-2", "unknown_tool", "{}"),
+                tool_call("call-3", "broadcast", "{not json"),
+                tool_call("call-4", "broadcast", '{"message": "done"}'),
+            ]
+        )
+    )
+
+    assert [result["tool_call_id"] for result in results] == [
+        "call-1",
+        "call-2",
+        "call-3",
+        "call-4",
+    ]
+    assert results[0]["content"] == "Error: RuntimeError: search is down"
+    assert results[1]["content"] == "Function unknown_tool not found."
+    assert results[2]["content"].startswith("Error: JSONDecodeError")
+    assert results[3]["content"] == "sent done"
@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+import pytest
+from openai.types.chat import ChatCompletion
+from shared.cache import DAY, HOUR, AsyncCachedCompletions, ResponseCache
+from shared.search_cache import SearchCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=100)
+
+
+def test_entries_expire_after_their_ttl(cache, clock):
+    cache.set("a", b"value", ttl=60)
+    cache.set("b", b"forever")
+    clock[0] += 59
+    assert cache.get("a") == b"value"
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert cache.get("b") == b"forever"
+
+
+def test_least_recently_used_entries_are_evicted_over_budget(cache, clock):
+    for key in "abc":
+        cache.set(key, b"x" * 40)
+        clock[0] += 1
+    # Only two 40 byte entries fit in 100 bytes, the oldest one went
+    assert cache.get("a") is None
+    clock[0] += 1
+    assert cache.get("b") is not None
+    clock[0] += 1
+    cache.set("d", b"x" * 40)
+    # `b` was read after `c` was written, so `c` is the least recently used
+    assert cache.get("c") is None
+    assert cache.get("b") is not None
+    assert cache.counters["_cache"]["eviction"] == 2
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(path).set("a", b"value", ttl=DAY)
+    assert ResponseCache(path).get("a") == b"value"
+
+
+def completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4.1-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+        }
+    )
+
+
+class FakeCompletions:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def create(self, **params) -> ChatCompletion:
+        self.calls += 1
+        return completion(f"answer {self.calls}")
+
+
+def ask_twice(completions: AsyncCachedCompletions, **params) -> list[str]:
+    async def run() -> list[str]:
+        return [
+            (await completions.create(cache_tag="test", **params))
+            .choices[0]
+            .message.content
+            for _ in range(2)
+        ]
+
+    return asyncio.run(run())
+
+
+def test_sampled_calls_skip_the_cache_by_default(tmp_path):
+    api = FakeCompletions()
+    completions = AsyncCachedCompletions(
+        api, ResponseCache(str(tmp_path / "openai.sqlite"))
+    )
+    messages = [{"role": "user", "content": "hi"}]
+
+    assert ask_twice(completions, messages=messages) == ["answer 1", "answer 2"]
+    assert ask_twice(completions, messages=messages, temperature=0) == [
+        "answer 3",
+        "answer 3",
+    ]
+    assert completions.cache.counters["test"] == {"bypass": 2, "miss": 1, "hit": 1}
+
+
+def test_caching_sampled_calls_is_opt_in(tmp_path):
+    api = FakeCompletions()
+    completions = AsyncCachedCompletions(
+        api,
+        ResponseCache(str(tmp_path / "openai.sqlite")),
+        max_temperature=float("inf"),
+    )
+    messages = [{"role": "user", "content": "hi"}]
+    assert ask_twice(completions, messages=messages) == ["answer 1", "answer 1"]
+
+
+def test_search_results_stay_fresh_for_the_freshness_window(tmp_path, clock):
+    searches = SearchCache(
+        ResponseCache(str(tmp_path / "tavily.sqlite")),
+        ttl=7 * DAY,
+        recent_ttl=HOUR,
+        stale_ttl=DAY,
+    )
+    evergreen = searches.make_key("Rust  Tutorials", {})
+    news = searches.make_key("rust", {"topic": "news"})
+    assert evergreen == searches.make_key("rust tutorials", {"days": None})
+
+    searches.set(evergreen, {}, {"results": ["book"]})
+    searches.set(news, {"topic": "news"}, {"results": ["release"]})
+    clock[0] += 2 * HOUR
+    assert searches.get(evergreen) == ({"results": ["book"]}, False)
+    assert searches.get(news) == ({"results": ["release"]}, True)
+    clock[0] += DAY
+    assert searches.get(news) == (None, False)
@@ -0,0 +1,102 @@
+import copy
+import json
+
+import pytest
+from shared import compaction
+from shared.compaction import compact_messages, count_tokens, split_turns
+
+
+class WordEncoding:
+    def encode(self, text: str) -> list[str]:
+        return text.split()
+
+    def decode(self, tokens: list[str]) -> str:
+        return " ".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # One token per word keeps budgets readable and needs no tiktoken download
+    monkeypatch.setattr(compaction, "get_encoding", WordEncoding)
+    monkeypatch.setattr(compaction, "count_text_tokens", lambda text: len(text.split()))
+
+
+PROMPT = [
+    {"role": "system", "content": "You plan learning paths"},
+    {"role": "user", "content": "Rust"},
+]
+
+
+def tool_turn(n: int, words: int = 500) -> list[dict]:
+    calls = [
+        {
+            "id": f"call-{n}-{i}",
+            "type": "function",
+            "function": {
+                "name": "resource_search",
+                "arguments": json.dumps({"query": " ".join(["rust"] * words)}),
+            },
+        }
+        for i in range(2)
+    ]
+    return [
+        {"role": "assistant", "content": None, "tool_calls": calls},
+        *(
+            {
+                "role": "tool",
+                "tool_call_id": call["id"],
+                "content": " ".join(["result"] * words),
+            }
+            for call in calls
+        ),
+    ]
+
+
+def history(turns: int) -> list[dict]:
+    return PROMPT + [message for n in range(turns) for message in tool_turn(n)]
+
+
+def test_tool_calls_stay_in_the_turn_of_their_assistant_message():
+    prompt, turns = split_turns(history(3))
+
+    assert prompt == PROMPT
+    assert turns == [tool_turn(0), tool_turn(1), tool_turn(2)]
+
+
+def test_compacted_history_keeps_every_tool_response_after_its_call():
+    compacted = compact_messages(history(4), max_tokens=1000)
+
+    called = set()
+    for message in compacted:
+        if message["role"] == "assistant":
+            called = {call["id"] for call in message["tool_calls"]}
+        elif message["role"] == "tool":
+            assert message["tool_call_id"] in called
+    assert len(compacted) == len(history(4))
+
+
+def test_prompt_and_latest_turns_are_kept_verbatim():
+    compacted = compact_messages(history(4), max_tokens=1000, keep_recent_turns=2)
+
+    assert compacted[:2] == PROMPT
+    assert compacted[-6:] == tool_turn(2) + tool_turn(3)
+    assert "[compacted:" in compacted[3]["content"]
+
+
+def test_history_within_budget_is_returned_as_is():
+    messages = history(2)
+    assert compact_messages(messages, max_tokens=count_tokens(messages)) is messages
+
+
+def test_compaction_stops_once_within_budget():
+    messages = history(4)
+    original = copy.deepcopy(messages)
+    budget = count_tokens(messages) - 100
+
+    compacted = compact_messages(messages, max_tokens=budget, keep_recent_turns=1)
+
+    assert count_tokens(compacted) <= budget
+    # Digesting the oldest turn was enough, the next one stays verbatim
+    assert "[compacted:" in compacted[3]["content"]
+    assert compacted[5:8] == tool_turn(1)
+    assert messages == original
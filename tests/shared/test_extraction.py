@@ -0,0 +1,106 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from shared import extraction
+from shared.extraction import extract, shard_results
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # One token per word keeps shard sizes readable and needs no tiktoken download
+    monkeypatch.setattr(extraction, "count_text_tokens", lambda text: len(text.split()))
+
+
+class FakeCompletions:
+    def __init__(self) -> None:
+        self.calls = []
+
+    def create(self, **params):
+        self.calls.append(params)
+        content = f"extracted {params['messages'][-1]['content']}"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+
+def result(title: str, *paragraphs: str) -> dict:
+    return {
+        "title": title,
+        "url": f"https://example.com/{title}",
+        "content": "\n\n".join(paragraphs),
+    }
+
+
+def tokens(shard: list[dict]) -> int:
+    return sum(len(json.dumps(piece).split()) for piece in shard)
+
+
+def test_small_results_share_one_shard_in_order():
+    results = [result("a", "one two"), result("b", "three four")]
+    assert shard_results(results, max_tokens=100) == [results]
+
+
+def test_shards_stay_within_the_token_limit():
+    results = [result(str(n), " ".join(["word"] * 10)) for n in range(6)]
+    shards = shard_results(results, max_tokens=30)
+
+    assert len(shards) == 3
+    assert all(tokens(shard) <= 30 for shard in shards)
+    assert [piece for shard in shards for piece in shard] == results
+
+
+def test_oversized_result_is_split_on_paragraphs():
+    big = result("big", " ".join(["alpha"] * 10), " ".join(["beta"] * 10))
+    shards = shard_results([big], max_tokens=16)
+
+    pieces = [piece for shard in shards for piece in shard]
+    assert [piece["content"] for piece in pieces] == [
+        " ".join(["alpha"] * 10),
+        " ".join(["beta"] * 10),
+    ]
+    assert all(piece["url"] == "https://example.com/big" for piece in pieces)
+
+
+def test_large_results_are_extracted_per_shard_and_merged():
+    api = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=api))
+    results = [result(str(n), " ".join(["word"] * 10)) for n in range(4)]
+
+    merged = extract(
+        client,
+        "system",
+        results,
+        render=lambda shard: ",".join(piece["title"] for piece in shard),
+        cache_tag="search",
+        model="map-model",
+        shard_tokens=30,
+    )
+
+    maps, reduce = api.calls[:-1], api.calls[-1]
+    assert sorted(call["messages"][-1]["content"] for call in maps) == ["0,1", "2,3"]
+    assert reduce["cache_tag"] == "search_reduce"
+    assert reduce["messages"][-1]["content"] == (
+        "# PARTIAL EXTRACTION 1\n\nextracted 0,1\n\n"
+        "# PARTIAL EXTRACTION 2\n\nextracted 2,3"
+    )
+    assert merged.startswith("extracted # PARTIAL EXTRACTION 1")
+
+
+def test_results_within_one_shard_take_a_single_call():
+    api = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=api))
+
+    extracted = extract(
+        client,
+        "system",
+        [result("a", "one two")],
+        render=lambda shard: shard[0]["title"],
+        cache_tag="search",
+        model="map-model",
+        temperature=0,
+    )
+
+    assert extracted == "extracted a"
+    assert len(api.calls) == 1
+    assert api.calls[0]["temperature"] == 0
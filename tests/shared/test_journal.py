@@ -0,0 +1,89 @@
+import pytest
+from shared.journal import Journal, open_session
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Journals live under results/sessions relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def tool_turn(n: int) -> list[dict]:
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [{"id": f"call-{n}"}]},
+        {"role": "tool", "content": f"result {n}", "tool_call_id": f"call-{n}"},
+    ]
+
+
+def test_resume_replays_finished_turns():
+    journal = open_session("s1", "learning-path", "Rust")
+    journal.record_turn(tool_turn(1))
+    journal.record_turn(tool_turn(2), outputs=["results/rust.md"])
+
+    resumed = open_session("s1", "learning-path", None, resume=True)
+    assert resumed.header["input"] == "Rust"
+    assert resumed.replay() == tool_turn(1) + tool_turn(2)
+    assert resumed.turns[1]["outputs"] == ["results/rust.md"]
+    assert resumed.final is None
+
+
+def test_finished_session_keeps_its_answer():
+    open_session("s1", "financial-analysis", "Gold").finish("Buy")
+    assert open_session("s1", "financial-analysis", None, resume=True).final == {
+        "type": "final",
+        "content": "Buy",
+    }
+
+
+def test_torn_last_line_is_ignored(workdir):
+    journal = open_session("s1", "learning-path", "Rust")
+    journal.record_turn(tool_turn(1))
+    with open(journal.path, "a") as file:
+        file.write('{"type": "turn", "messa')
+
+    assert Journal("s1").replay() == tool_turn(1)
+
+
+def test_turns_after_a_torn_line_survive_the_next_resume():
+    journal = open_session("s1", "learning-path", "Rust")
+    journal.record_turn(tool_turn(1))
+    with open(journal.path, "a") as file:
+        file.write('{"type": "turn", "messa')
+
+    resumed = open_session("s1", "learning-path", None, resume=True)
+    resumed.record_turn(tool_turn(2))
+    resumed.finish("Done")
+
+    again = open_session("s1", "learning-path", None, resume=True)
+    assert again.replay() == tool_turn(1) + tool_turn(2)
+    assert again.final == {"type": "final", "content": "Done"}
+
+
+def test_torn_line_before_the_end_is_an_error():
+    journal = open_session("s1", "learning-path", "Rust")
+    with open(journal.path, "a") as file:
+        file.write('{"type": "turn"\n')
+    journal.record_turn(tool_turn(1))
+
+    with pytest.raises(ValueError):
+        Journal("s1")
+
+
+def test_existing_journal_needs_resume():
+    open_session("s1", "learning-path", "Rust")
+    with pytest.raises(FileExistsError):
+        open_session("s1", "learning-path", "Rust")
+
+
+def test_resume_checks_pipeline_and_input():
+    open_session("s1", "learning-path", "Rust")
+    with pytest.raises(ValueError, match="learning-path session"):
+        open_session("s1", "financial-analysis", None, resume=True)
+    with pytest.raises(ValueError, match="started for 'Rust'"):
+        open_session("s1", "learning-path", "Go", resume=True)
+
+
+def test_resume_without_journal_needs_input():
+    with pytest.raises(ValueError, match="No journal"):
+        open_session("missing", "learning-path", None, resume=True)
@@ -0,0 +1,89 @@
+import time
+
+import httpx
+import pytest
+from shared.rate_limit import RateLimitedTransport, RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def client(limiter: RateLimiter, *responses: httpx.Response) -> httpx.Client:
+    """Client whose transport answers with `responses` in turn"""
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return responses[len(sent) - 1]
+
+    transport = RateLimitedTransport(limiter, httpx.MockTransport(handler))
+    http = httpx.Client(transport=transport, base_url="https://api.example.com")
+    http.sent = sent
+    return http
+
+
+def wait_time(limiter: RateLimiter, ticket: int) -> float:
+    """How long `ticket` still waits, taking the capacity once it may go"""
+    with limiter._condition:
+        return limiter._try_acquire(ticket, 0)
+
+
+def test_callers_are_served_in_arrival_order(clock):
+    limiter = RateLimiter("test", requests_per_minute=1)
+    first, second, third = (next(limiter._tickets) for _ in range(3))
+
+    # Later callers wait for the head of the queue even when it is blocked
+    assert wait_time(limiter, second) > 0
+    assert wait_time(limiter, first) == 0
+    assert wait_time(limiter, third) > 0
+    assert wait_time(limiter, second) == pytest.approx(60)
+
+    clock[0] += 60
+    assert wait_time(limiter, third) > 0
+    assert wait_time(limiter, second) == 0
+
+
+def test_rate_limit_headers_resync_the_buckets(clock):
+    limiter = RateLimiter("test", requests_per_minute=500, tokens_per_minute=10_000)
+    headers = {
+        "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "6s",
+        "x-ratelimit-limit-tokens": "20000",
+        "x-ratelimit-remaining-tokens": "1500",
+    }
+    http = client(limiter, httpx.Response(200, headers=headers))
+
+    assert http.post("/v1/chat/completions", json={}).status_code == 200
+    assert limiter.requests.capacity == 100
+    assert limiter.requests.level == 0
+    assert limiter.tokens.capacity == 20_000
+    assert limiter.tokens.level == 1500
+    # No requests left until the reset the provider reported
+    assert limiter.paused_until == pytest.approx(clock[0] + 6)
+    assert wait_time(limiter, next(limiter._tickets)) == pytest.approx(6)
+
+
+def test_429_halves_concurrency_and_is_returned_once(clock):
+    limiter = RateLimiter("test", requests_per_minute=500, max_concurrency=16)
+    http = client(
+        limiter,
+        httpx.Response(429, headers={"retry-after": "2"}),
+        httpx.Response(200),
+    )
+    assert limiter.concurrency == 8
+
+    # Retrying is left to the SDK, the transport sends the request once
+    assert http.post("/v1/chat/completions", json={}).status_code == 429
+    assert len(http.sent) == 1
+    assert limiter.concurrency == 4
+    assert limiter.paused_until == pytest.approx(clock[0] + 2)
+    assert limiter.in_flight == 0
+
+    clock[0] += 2
+    assert http.post("/v1/chat/completions", json={}).status_code == 200
+    assert limiter.concurrency == 5